@@ -0,0 +1,127 @@
+# Starlette Imports
+from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.middleware import Middleware
+from starlette.routing import Mount
+from starlette.applications import Starlette
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Controller Import
+from controllers._async_base import AsyncController
+from controllers.indexes import IndexControl
+
+# Endpoint imports
+from endpoints import async_authentication, async_instructions
+
+# Miscellaneous Imports
+from config.config import config
+from util.jwt_cache import init_jwt
+from util.log import StructuredLogging
+from flask import Flask
+import asyncio
+
+
+class FlaskContextMiddleware:
+    """Pushes the Flask application context for every ASGI request so that
+    the JWT helpers use the same settings as the WSGI application"""
+
+    def __init__(
+        self: "FlaskContextMiddleware", app: ASGIApp, flask_app: Flask
+    ) -> None:
+        """Constructor for the FlaskContextMiddleware class
+
+        Args:
+            self (FlaskContextMiddleware): Current class type
+            app (ASGIApp): Wrapped ASGI application
+            flask_app (Flask): Application holding the JWT settings
+        """
+        self.app = app
+        self.flask_app = flask_app
+
+    async def __call__(
+        self: "FlaskContextMiddleware",
+        scope: Scope,
+        receive: Receive,
+        send: Send,
+    ) -> None:
+        """Handle the request within the Flask application context
+
+        Args:
+            self (FlaskContextMiddleware): Current class type
+            scope (Scope): ASGI connection scope
+            receive (Receive): ASGI receive channel
+            send (Send): ASGI send channel
+        """
+        with self.flask_app.app_context():
+            await self.app(scope, receive, send)
+
+
+async def provision_indexes() -> None:
+    """Apply the declared indexes on startup without blocking the event
+    loop"""
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, IndexControl.provision)
+
+
+def close_client() -> None:
+    """Close the asynchronous MongoDB client on shutdown"""
+    AsyncController.MONGO.close()
+
+
+def create_app() -> Starlette:
+    """Make the ASGI application. Nothing is configured on import, the
+    application is made by the server in every worker, e.g. with
+    `uvicorn --factory asgi:create_app`
+
+    Returns:
+        Starlette: ASGI application
+    """
+
+    # Write JSON logs from a background thread
+    if config.logging.enabled:
+        StructuredLogging(config.logging)
+
+    # Flask application holding the JWT settings shared with the WSGI
+    # application
+    flask_app = Flask(__name__)
+    init_jwt(flask_app, config.JWT)
+
+    # Compress large responses with gzip if enabled
+    compression = (
+        [
+            Middleware(
+                GZipMiddleware,
+                minimum_size=config.compression.min_size,
+                compresslevel=config.compression.level,
+            )
+        ]
+        if config.compression.enabled
+        else []
+    )
+
+    # Make app instance
+    return Starlette(
+        routes=[
+            Mount("/authentication", routes=async_authentication.routes),
+            Mount("/instructions", routes=async_instructions.routes),
+        ],
+        middleware=[
+            Middleware(
+                CORSMiddleware, allow_origins=["*"], allow_methods=["*"]
+            ),
+            Middleware(FlaskContextMiddleware, flask_app=flask_app),
+            *compression,
+        ],
+        on_startup=(
+            [provision_indexes] if config.indexes.ensure_on_startup else []
+        ),
+        on_shutdown=[close_client],
+    )
+
+
+# Main run thread
+if __name__ == "__main__":
+    import uvicorn
+
+    print("Starting the ASGI application...")
+    uvicorn.run(create_app(), host="0.0.0.0", port=5000)
@@ -0,0 +1,128 @@
+# Imports
+from starlette.testclient import TestClient
+from controllers._base import Controller
+from typing import Any, Optional
+from asgi import create_app
+import uuid
+
+
+def call(
+    client: TestClient,
+    path: str,
+    body: dict,
+    status: int,
+    token: Optional[str] = None,
+) -> Any:
+    """Post to an endpoint and check the status of its response
+
+    Args:
+        client (TestClient): Client of the ASGI application
+        path (str): Path of the endpoint
+        body (dict): JSON body of the request
+        status (int): Expected status code
+        token (Optional[str], optional): Token to authenticate with.
+            Defaults to None.
+
+    Returns:
+        Any: JSON body of the response
+    """
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    res = client.post(path, json=body, headers=headers)
+    assert res.status_code == status, (path, res.status_code, res.text)
+    print(f"{res.status_code} {path}")
+    return res.json()
+
+
+# Main run thread
+if __name__ == "__main__":
+    # A user of its own for every run
+    email = f"smoke-{uuid.uuid4().hex}@example.com"
+    user = {"first_name": "Smoke", "last_name": "Test", "password": "pw"}
+
+    # Keep one event loop for every request, as the database client is
+    # bound to the loop it was first used on
+    with TestClient(create_app()) as client:
+        try:
+            # Registration rejects known emails regardless of their case
+            auth = "/authentication"
+            call(client, f"{auth}/register/", {**user, "email": email}, 200)
+            call(
+                client,
+                f"{auth}/register/",
+                {**user, "email": email.upper()},
+                400,
+            )
+            tokens = call(
+                client,
+                f"{auth}/login/",
+                {"email": email, "password": "pw"},
+                200,
+            )
+            access = tokens["access_token"]
+            call(client, f"{auth}/who_am_i/", {}, 200, access)
+
+            # Create a group and read it back through a page
+            inst = "/instructions"
+            call(
+                client,
+                f"{inst}/create_instruction_group/",
+                {"name": "Smoke"},
+                200,
+                access,
+            )
+            page = call(
+                client,
+                f"{inst}/get_users_instruction_groups/",
+                {"page_size": 1, "include_total": True, "view": "summary"},
+                200,
+                access,
+            )
+            assert page["total"] == 1 and page["next_cursor"] is None, page
+            group = page["message"][0]["_id"]
+
+            # Versioned writes report a conflict on a stale version
+            path = f"{inst}/update_instruction_group/"
+            update = {"id": group, "name": "Renamed", "version": 0}
+            res = call(client, path, update, 200, access)
+            assert res["version"] == 1, res
+            call(client, path, update, 409, access)
+            patch = {
+                "id": group,
+                "version": 1,
+                "operations": [{"op": "delete", "index": 0}],
+            }
+            call(
+                client, f"{inst}/patch_instruction_group/", patch, 200, access
+            )
+            call(
+                client,
+                f"{inst}/delete_instruction_group/",
+                {"id": group},
+                200,
+                access,
+            )
+
+            # Signing out revokes both tokens right away
+            call(
+                client,
+                f"{auth}/signout/",
+                {
+                    "access_token": access,
+                    "refresh_token": tokens["refresh_token"],
+                },
+                200,
+                access,
+            )
+            call(client, f"{auth}/who_am_i/", {}, 401, access)
+            call(
+                client, f"{auth}/refresh/", {}, 401, tokens["refresh_token"]
+            )
+        finally:
+            # Remove what the run left behind
+            owner = Controller.USER_COL.find_one({"email": email}, {"_id": 1})
+            if owner is not None:
+                Controller.INSTRUCTION_GROUP_COL.delete_many(
+                    {"owner": owner["_id"]}
+                )
+                Controller.USER_COL.delete_one({"_id": owner["_id"]})
+    print("async smoke run passed")
@@ -0,0 +1,77 @@
+# Imports
+from benchmarks.stand_in import install
+from flask_jwt_extended import create_access_token, decode_token, jwt_required
+from flask import request
+from functools import wraps
+from typing import Callable
+import timeit
+
+# Serve the app from the in-memory stand-in without latency, so that only
+# the token handling is measured
+install(0)
+from main import app  # noqa: E402
+from controllers._base import Controller  # noqa: E402
+from endpoints._base import token_required  # noqa: E402
+from util.jwt_cache import ClaimsCache  # noqa: E402
+
+# Amount of authenticated calls per measurement
+NUMBER = 5000
+
+
+def legacy_token_required(func: Callable) -> Callable:
+    """Access check as token_required did it before the claims cache, with
+    the token verified by jwt_required and then decoded a second time
+
+    Args:
+        func (Callable): Endpoint to wrap
+
+    Returns:
+        Callable: Result of the endpoint
+    """
+
+    @wraps(func)
+    @jwt_required()
+    def decorated_function(*args, **kwargs):
+        _, token = request.headers.get("Authorization").split()
+        kwargs["_id"] = decode_token(token)["sub"]["_id"]
+        return func(*args, **kwargs)
+
+    return decorated_function
+
+
+def endpoint(_id: str) -> str:
+    """Stand-in endpoint returning the ID of the caller"""
+    return _id
+
+
+# Main run thread
+if __name__ == "__main__":
+    # Token of a caller
+    with app.app_context():
+        token = create_access_token(
+            identity={"email": "bench@example.com", "_id": "a" * 24}
+        )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    # Time every path within one request context, as the checks only read
+    # the request headers
+    paths = {
+        "legacy": legacy_token_required(endpoint),
+        "cold": token_required(endpoint),
+        "warm": token_required(endpoint),
+    }
+    results = {}
+    with app.test_request_context("/who_am_i/", headers=headers):
+        for name, func in paths.items():
+            # The cold path verifies every call, the warm one reuses claims
+            Controller.CLAIMS_CACHE = ClaimsCache(0 if name == "cold" else 64)
+            func()
+            results[name] = timeit.timeit(func, number=NUMBER) / NUMBER
+
+    # Report the per-request overhead in microseconds
+    for name, seconds in results.items():
+        print(
+            f"{name:<7} {seconds * 1e6:8.2f}us "
+            + f"speedup={results['legacy'] / seconds:5.1f}x"
+        )
+    print(f"cache   {Controller.CLAIMS_CACHE.stats()}")
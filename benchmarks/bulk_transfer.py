@@ -0,0 +1,142 @@
+# Imports
+from benchmarks.stand_in import install
+from flask_jwt_extended import create_access_token
+from typing import Any, Callable, Iterator, Tuple
+import tracemalloc
+import json
+import time
+import io
+
+# Serve the app from the in-memory stand-in without latency
+install(0)
+from main import app  # noqa: E402
+
+# Amounts of instruction groups per measurement
+SIZES = [1000, 10000]
+
+
+class LineStream(io.RawIOBase):
+    """Request body that makes its NDJSON lines as they are read, so that
+    the body itself is never held in memory"""
+
+    def __init__(self: "LineStream", owner: str, size: int) -> None:
+        """Constructor for the LineStream class
+
+        Args:
+            self (LineStream): Current class type
+            owner (str): Prefix of the group names
+            size (int): Amount of groups
+        """
+        self.lines = (
+            json.dumps(
+                {
+                    "name": f"{owner} #{i}",
+                    "steps": [
+                        {"name": f"Step #{j}", "description": "Lorem Ipsum"}
+                        for j in range(20)
+                    ],
+                }
+            ).encode()
+            + b"\n"
+            for i in range(size)
+        )
+        self.pending = b""
+
+    def readable(self: "LineStream") -> bool:
+        """The stream can be read"""
+        return True
+
+    def readinto(self: "LineStream", buffer: memoryview) -> int:
+        """Fill the buffer with the next bytes of the body"""
+        while not self.pending:
+            self.pending = next(self.lines, b"")
+            if not self.pending:
+                return 0
+        size = min(len(buffer), len(self.pending))
+        buffer[:size] = self.pending[:size]
+        self.pending = self.pending[size:]
+        return size
+
+
+def measure(func: Callable[[], Any]) -> Tuple[float, int]:
+    """Run a transfer while tracing allocations
+
+    Args:
+        func (Callable[[], Any]): Transfer to run
+
+    Returns:
+        Tuple[float, int]: Seconds taken and peak working memory in bytes,
+            not counting what the stand-in keeps
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak - current
+
+
+def consume(chunks: Iterator[bytes]) -> int:
+    """Read a streamed body without keeping it
+
+    Args:
+        chunks (Iterator[bytes]): Chunks of the body
+
+    Returns:
+        int: Amount of lines read
+    """
+    return sum(chunk.count(b"\n") for chunk in chunks)
+
+
+# Main run thread
+if __name__ == "__main__":
+    client = app.test_client()
+    for size in SIZES:
+        # Token of a user of its own for every size
+        owner = f"bulk-{size}"
+        with app.app_context():
+            headers = {
+                "Authorization": "Bearer "
+                + create_access_token(
+                    identity={"email": f"{owner}@x.io", "_id": owner}
+                )
+            }
+
+        # Import the groups from a streamed body, then export them
+        imported = measure(
+            lambda: client.post(
+                "/instructions/import_instruction_groups/",
+                headers=headers,
+                content_type="application/x-ndjson",
+                environ_overrides={
+                    "wsgi.input": io.BufferedReader(LineStream(owner, size)),
+                    "wsgi.input_terminated": True,
+                },
+            )
+        )
+        lines = []
+        exported = measure(
+            lambda: lines.append(
+                consume(
+                    client.post(
+                        "/instructions/export_instruction_groups/",
+                        headers=headers,
+                        json={},
+                        buffered=False,
+                    ).response
+                )
+            )
+        )
+        assert lines == [size], lines
+
+        # Report the throughput and working memory of both directions
+        for name, (elapsed, memory) in [
+            ("import", imported),
+            ("export", exported),
+        ]:
+            print(
+                f"{name} groups={size:<6} "
+                + f"groups/s={size / elapsed:9.0f} "
+                + f"peak={memory / 1024:8.0f}KiB"
+            )
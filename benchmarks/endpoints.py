@@ -0,0 +1,377 @@
+# Imports
+from benchmarks.load import Operation, make_tokens, run_load, stand_in_server
+from typing import List, Optional
+import subprocess
+import argparse
+import platform
+import random
+import json
+import time
+
+# Password of every seeded user
+PASSWORD = "password"
+
+
+def seeded_group(user: dict, index: int) -> str:
+    """Get the ID of one of the user's seeded instruction groups"""
+    return f"{int(user['_id'], 16):016x}{index:016x}"
+
+
+def kept_group(user: dict, rng: random.Random) -> str:
+    """Pick one of the user's groups that are never deleted"""
+    return seeded_group(user, rng.randrange(user["keep"]))
+
+
+def make_steps(rng: random.Random, amount: int) -> List[dict]:
+    """Make the steps of an instruction group update"""
+    return [
+        {"name": f"Step {i}", "description": f"Updated {rng.random()}"}
+        for i in range(amount)
+    ]
+
+
+def take_disposable(user: dict, rng: random.Random) -> Optional[dict]:
+    """Take one of the user's groups left to delete, if any"""
+    if not user["disposable"]:
+        return None
+    return {"id": user["disposable"].pop()}
+
+
+def patch_body(user: dict, rng: random.Random) -> dict:
+    """Replace the first step of a group at the version last seen"""
+    group = kept_group(user, rng)
+    user["last_patched"] = group
+    return {
+        "id": group,
+        "version": user["versions"].get(group, 0),
+        "operations": [
+            {
+                "op": "replace",
+                "index": 0,
+                "step": {"name": "Step 0", "description": "Patched"},
+            }
+        ],
+    }
+
+
+def update_body(user: dict, rng: random.Random) -> dict:
+    """Replace the name and steps of a group"""
+    group = kept_group(user, rng)
+    user["last_updated"] = group
+    return {
+        "id": group,
+        "name": f"Renamed {rng.randrange(1000)}",
+        "steps": make_steps(rng, user["steps"]),
+    }
+
+
+# Every endpoint of endpoints/authentication.py and endpoints/instructions.py,
+# weighted towards the reads. The checks make sure every response belongs
+# to the caller, and the writes keep track of the versions they made so that
+# patches do not conflict
+SCENARIO: List[Operation] = [
+    Operation(
+        "register",
+        "/authentication/register/",
+        lambda user, rng: {
+            "first_name": "Bench",
+            "last_name": "User",
+            "email": f"bench-{rng.getrandbits(64):016x}@example.com",
+            "password": PASSWORD,
+        },
+        lambda res, user: res["status"] == "success",
+        auth="none",
+    ),
+    Operation(
+        "login",
+        "/authentication/login/",
+        lambda user, rng: {"email": user["email"], "password": PASSWORD},
+        lambda res, user: "access_token" in res,
+        auth="none",
+    ),
+    Operation(
+        "refresh",
+        "/authentication/refresh/",
+        lambda user, rng: {},
+        lambda res, user: "access_token" in res,
+        auth="refresh",
+    ),
+    Operation(
+        "who_am_i",
+        "/authentication/who_am_i/",
+        lambda user, rng: {},
+        lambda res, user: res["_id"] == user["_id"],
+        weight=3,
+    ),
+    Operation(
+        "signout",
+        "/authentication/signout/",
+        lambda user, rng: {
+            "access_token": user["spare_access"],
+            "refresh_token": user["spare_refresh"],
+        },
+        lambda res, user: res["status"] == "success",
+    ),
+    Operation(
+        "create_instruction_group",
+        "/instructions/create_instruction_group/",
+        lambda user, rng: {"name": f"Bench {rng.randrange(1000)}"},
+        lambda res, user: res["status"] == "success",
+    ),
+    Operation(
+        "get_instruction_group",
+        "/instructions/get_instruction_group/",
+        lambda user, rng: {"id": kept_group(user, rng)},
+        lambda res, user: res["message"]["owner"] == user["_id"],
+        weight=6,
+        auth="none",
+    ),
+    Operation(
+        "get_users_instruction_groups",
+        "/instructions/get_users_instruction_groups/",
+        lambda user, rng: {"page_size": 20, "fields": ["name", "owner"]},
+        lambda res, user: all(
+            group["owner"] == user["_id"] for group in res["message"]
+        ),
+        weight=4,
+    ),
+    Operation(
+        "get_checkpoint",
+        "/instructions/get_checkpoint/",
+        lambda user, rng: {"id": kept_group(user, rng)},
+        lambda res, user: isinstance(res["message"], int),
+        weight=4,
+    ),
+    Operation(
+        "update_instruction_group",
+        "/instructions/update_instruction_group/",
+        update_body,
+        record=lambda res, user: user["versions"].update(
+            {user["last_updated"]: res["version"]}
+        ),
+    ),
+    Operation(
+        "patch_instruction_group",
+        "/instructions/patch_instruction_group/",
+        patch_body,
+        record=lambda res, user: user["versions"].update(
+            {user["last_patched"]: res["version"]}
+        ),
+    ),
+    Operation(
+        "save_checkpoint",
+        "/instructions/save_checkpoint/",
+        lambda user, rng: {
+            "id": kept_group(user, rng),
+            "pos": rng.randrange(user["steps"]),
+        },
+        lambda res, user: res["status"] == "success",
+        weight=2,
+    ),
+    Operation(
+        "delete_instruction_group",
+        "/instructions/delete_instruction_group/",
+        take_disposable,
+        lambda res, user: res["status"] == "success",
+    ),
+]
+
+
+def make_users(args: argparse.Namespace) -> List[dict]:
+    """Make the virtual users of the seeded data, each with the tokens it
+    authenticates with and a spare pair to sign out
+
+    Args:
+        args (argparse.Namespace): Command line arguments
+
+    Returns:
+        List[dict]: Virtual users
+    """
+    ids = [f"{u:032x}" for u in range(args.users)]
+    tokens, spares = make_tokens(ids), make_tokens(ids)
+    users = []
+    for u, _id in enumerate(ids):
+        user = {
+            "_id": _id,
+            "email": f"user{u}@example.com",
+            "access": tokens[_id]["access"],
+            "refresh": tokens[_id]["refresh"],
+            "spare_access": spares[_id]["access"],
+            "spare_refresh": spares[_id]["refresh"],
+            "keep": args.keep,
+            "steps": args.steps,
+            "versions": {},
+        }
+        user["disposable"] = [
+            seeded_group(user, g) for g in range(args.keep, args.groups)
+        ]
+        users.append(user)
+    return users
+
+
+def compare(baseline: dict, current: dict) -> dict:
+    """Compare the endpoints of two reports
+
+    Args:
+        baseline (dict): Report of the reference commit
+        current (dict): Report of the commit to check
+
+    Returns:
+        dict: Relative change of the throughput and latency percentiles of
+            every endpoint both reports have, positive when higher
+    """
+
+    def change(old: Optional[float], new: Optional[float]) -> Optional[float]:
+        """Relative change between two values"""
+        if not old or new is None:
+            return None
+        return round((new - old) / old, 4)
+
+    # Compare every endpoint and the overall results
+    before = dict(baseline["endpoints"], overall=baseline["overall"])
+    after = dict(current["endpoints"], overall=current["overall"])
+    return {
+        name: {
+            key: change(before[name][key], after[name][key])
+            for key in ["rps", "p50_ms", "p95_ms", "p99_ms"]
+        }
+        for name in after
+        if name in before
+    }
+
+
+def commit() -> Optional[str]:
+    """Get the commit of the working tree, if it is a git checkout"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Main run thread
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Load every authentication and instructions endpoint"
+    )
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--groups", type=int, default=30)
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=10,
+        help="Groups of every user that are never deleted, the others are "
+        "deleted during the run",
+    )
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--checkpoints", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--url",
+        help="Load a running server seeded by --seed-only instead of "
+        "serving the in-memory stand-in",
+    )
+    parser.add_argument(
+        "--seed-only",
+        action="store_true",
+        help="Seed the configured MongoDB with the volumes and exit",
+    )
+    parser.add_argument("--profile", default="threaded")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, every worker holds its own stand-in data",
+    )
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.002,
+        help="Seconds of every stand-in database operation",
+    )
+    parser.add_argument("--port", type=int, default=5056)
+    parser.add_argument(
+        "--skip",
+        default="",
+        help="Endpoints to leave out, e.g. login,register as they mostly "
+        "measure password hashing",
+    )
+    parser.add_argument("--output", help="File to write the JSON report to")
+    parser.add_argument(
+        "--compare", help="Report of another commit to compare against"
+    )
+    args = parser.parse_args()
+    volumes = {
+        "users": args.users,
+        "groups": args.groups,
+        "steps": args.steps,
+        "checkpoints": args.checkpoints,
+    }
+
+    # Seed a real database for --url, the volumes must match the run's
+    if args.seed_only:
+        from benchmarks.stand_in import seed
+
+        seed(
+            args.users,
+            args.groups,
+            args.steps,
+            args.checkpoints,
+            PASSWORD,
+            args.seed,
+        )
+        raise SystemExit(0)
+
+    # Load the given server or a stand-in served with the profile
+    users = make_users(args)
+    skipped = args.skip.split(",")
+    scenario = [op for op in SCENARIO if op.name not in skipped]
+    if args.url:
+        report = run_load(
+            args.url,
+            scenario,
+            users,
+            args.concurrency,
+            args.duration,
+            args.seed,
+        )
+    else:
+        with stand_in_server(
+            args.profile, args.port, args.workers, args.latency, volumes
+        ) as base_url:
+            report = run_load(
+                base_url,
+                scenario,
+                users,
+                args.concurrency,
+                args.duration,
+                args.seed,
+            )
+
+    # Describe the run so that reports of different commits can be compared
+    report["run"] = {
+        "commit": commit(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "target": args.url or "stand-in",
+        "profile": None if args.url else args.profile,
+        "workers": None if args.url else args.workers,
+        "latency_s": None if args.url else args.latency,
+        "volumes": volumes,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            report["change"] = compare(json.load(f), report)
+
+    # Write the report as JSON
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
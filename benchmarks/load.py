@@ -0,0 +1,324 @@
+# Imports
+from flask_jwt_extended import (
+    JWTManager,
+    create_access_token,
+    create_refresh_token,
+)
+from typing import Any, Callable, Dict, Iterator, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+from config.config import config
+from datetime import timedelta
+from flask import Flask
+import http.client
+import subprocess
+import threading
+import random
+import signal
+import json
+import time
+import os
+
+
+class Operation:
+    """Request of a load scenario along with the check of its response"""
+
+    def __init__(
+        self: "Operation",
+        name: str,
+        path: str,
+        body: Callable[[dict, random.Random], dict],
+        check: Optional[Callable[[Any, dict], bool]] = None,
+        weight: int = 1,
+        auth: str = "access",
+        record: Optional[Callable[[Any, dict], None]] = None,
+    ) -> None:
+        """Constructor for the Operation class
+
+        Args:
+            self (Operation): Current class type
+            name (str): Name of the operation in the report
+            path (str): Path of the endpoint
+            body (Callable[[dict, random.Random], dict]): Makes the JSON body
+                from the virtual user and its random generator, or None to
+                skip the operation when the user has nothing left for it
+            check (Optional[Callable[[Any, dict], bool]], optional): Checks
+                the JSON response against the virtual user. Defaults to None.
+            weight (int, optional): Relative frequency in the scenario.
+                Defaults to 1.
+            auth (str, optional): Token to send, access, refresh or none.
+                Defaults to "access".
+            record (Optional[Callable[[Any, dict], None]], optional): Keeps
+                what a successful JSON response tells about the virtual
+                user's data, e.g. a new version. Defaults to None.
+        """
+        self.name = name
+        self.path = path
+        self.body = body
+        self.check = check
+        self.weight = weight
+        self.auth = auth
+        self.record = record
+
+
+def make_tokens(user_ids: List[str]) -> Dict[str, Dict[str, str]]:
+    """Make access and refresh tokens the API accepts for the given users
+
+    Args:
+        user_ids (List[str]): IDs of the users
+
+    Returns:
+        Dict[str, Dict[str, str]]: Access and refresh tokens by user ID
+    """
+
+    # Sign with the API's JWT settings
+    app = Flask(__name__)
+    app.config["JWT_SECRET_KEY"] = config.JWT.secret
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(
+        hours=config.JWT.access_expiry
+    )
+    app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(
+        hours=config.JWT.refresh_expiry
+    )
+    JWTManager(app)
+    with app.app_context():
+        return {
+            _id: {
+                "access": create_access_token(identity={"_id": _id}),
+                "refresh": create_refresh_token(identity={"_id": _id}),
+            }
+            for _id in user_ids
+        }
+
+
+def percentile(values: List[float], share: float) -> Optional[float]:
+    """Get a percentile with the nearest-rank method
+
+    Args:
+        values (List[float]): Sorted values
+        share (float): Percentile between 0 and 1
+
+    Returns:
+        Optional[float]: Value of the percentile, None without values
+    """
+    if not values:
+        return None
+    return values[min(len(values) - 1, max(0, int(share * len(values)) - 1))]
+
+
+def summarize(latencies: List[float], errors: int, seconds: float) -> dict:
+    """Summarize the latencies of an operation
+
+    Args:
+        latencies (List[float]): Seconds of every successful request
+        errors (int): Amount of failed requests
+        seconds (float): Duration of the load
+
+    Returns:
+        dict: Throughput and latency percentiles in milliseconds
+    """
+    latencies = sorted(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": round(len(latencies) / seconds, 2),
+        "p50_ms": _ms(percentile(latencies, 0.50)),
+        "p95_ms": _ms(percentile(latencies, 0.95)),
+        "p99_ms": _ms(percentile(latencies, 0.99)),
+    }
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    """Round seconds into milliseconds"""
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def _counters() -> dict:
+    """Make the empty counters of an operation"""
+    return {"latencies": [], "errors": 0, "mismatches": 0, "skipped": 0}
+
+
+def run_load(
+    base_url: str,
+    scenario: List[Operation],
+    users: List[dict],
+    concurrency: int = 16,
+    duration: float = 10.0,
+    seed: int = 0,
+) -> dict:
+    """Drive a running server with a weighted scenario from concurrent
+    virtual users, each with its own keep-alive connection and user
+
+    Args:
+        base_url (str): Base URL of the server
+        scenario (List[Operation]): Operations to pick from by weight
+        users (List[dict]): Virtual users with at least their _id and
+            tokens, cycled through by the concurrent clients
+        concurrency (int, optional): Amount of concurrent clients. Defaults
+            to 16.
+        duration (float, optional): Seconds of load. Defaults to 10.0.
+        seed (int, optional): Seed of the operation choices. Defaults to 0.
+
+    Returns:
+        dict: Overall and per-operation throughput and latencies, along with
+            the amount of responses that failed their check
+    """
+    url = urlsplit(base_url)
+    weights = [op.weight for op in scenario]
+    results = {op.name: _counters() for op in scenario}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index: int) -> None:
+        """Send requests until the deadline"""
+        rng = random.Random(seed + index)
+        user = users[index % len(users)]
+        conn = http.client.HTTPConnection(url.hostname, url.port, timeout=30)
+        local = {op.name: _counters() for op in scenario}
+        while time.perf_counter() < deadline:
+            # Make the request of a random operation
+            op = rng.choices(scenario, weights)[0]
+            payload = op.body(user, rng)
+            if payload is None:
+                local[op.name]["skipped"] += 1
+                continue
+            headers = {"Content-Type": "application/json"}
+            if op.auth != "none":
+                headers["Authorization"] = "Bearer " + user[op.auth]
+            body = json.dumps(payload)
+
+            # Time it until the whole body is read
+            start = time.perf_counter()
+            try:
+                conn.request("POST", op.path, body, headers)
+                response = conn.getresponse()
+                data = response.read()
+                ok = response.status < 400
+            except (OSError, http.client.HTTPException):
+                conn.close()
+                ok, data = False, b""
+            elapsed = time.perf_counter() - start
+
+            # Count failures and responses that fail their check
+            if not ok:
+                local[op.name]["errors"] += 1
+                continue
+            res = json.loads(data) if data else None
+            if op.check is not None and not op.check(res, user):
+                local[op.name]["mismatches"] += 1
+                continue
+            local[op.name]["latencies"].append(elapsed)
+            if op.record is not None:
+                op.record(res, user)
+        conn.close()
+
+        # Merge the results of the client
+        with lock:
+            for name, result in local.items():
+                results[name]["latencies"] += result["latencies"]
+                results[name]["errors"] += result["errors"]
+                results[name]["mismatches"] += result["mismatches"]
+                results[name]["skipped"] += result["skipped"]
+
+    # Run the clients
+    start = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        list(pool.map(client, range(concurrency)))
+    seconds = time.perf_counter() - start
+
+    # Summarize per operation and overall
+    report = {
+        "concurrency": concurrency,
+        "duration_s": round(seconds, 3),
+        "endpoints": {},
+    }
+    every, errors, mismatches = [], 0, 0
+    for name, result in results.items():
+        report["endpoints"][name] = summarize(
+            result["latencies"], result["errors"], seconds
+        )
+        report["endpoints"][name]["mismatches"] = result["mismatches"]
+        report["endpoints"][name]["skipped"] = result["skipped"]
+        every += result["latencies"]
+        errors += result["errors"]
+        mismatches += result["mismatches"]
+    report["overall"] = summarize(every, errors, seconds)
+    report["overall"]["mismatches"] = mismatches
+    return report
+
+
+def wait_until_up(base_url: str, timeout: float = 60.0) -> None:
+    """Wait for a server to answer its landing page
+
+    Args:
+        base_url (str): Base URL of the server
+        timeout (float, optional): Seconds to wait. Defaults to 60.0.
+
+    Raises:
+        TimeoutError: If the server does not answer in time
+    """
+    url = urlsplit(base_url)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection(url.hostname, url.port, 2)
+            conn.request("GET", "/")
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+        finally:
+            conn.close()
+    raise TimeoutError(f"{base_url} did not start in {timeout} seconds")
+
+
+@contextmanager
+def stand_in_server(
+    profile: str, port: int, workers: int, latency: float, volumes: dict
+) -> Iterator[str]:
+    """Serve the app from the seeded in-memory stand-in with a gunicorn
+    profile until the context exits
+
+    Args:
+        profile (str): Name of the gunicorn profile
+        port (int): Local port to bind
+        workers (int): Amount of worker processes
+        latency (float): Seconds of every stand-in database operation
+        volumes (dict): Seeded users, groups, steps and checkpoints, passed
+            to benchmarks.stand_in_wsgi
+
+    Yields:
+        Iterator[str]: Base URL of the server once it answers
+    """
+
+    # Start gunicorn with the profile
+    env = dict(
+        os.environ,
+        RUN_MODE="0",
+        GUNICORN_PROFILE=profile,
+        GUNICORN_BIND=f"127.0.0.1:{port}",
+        GUNICORN_WORKERS=str(workers),
+        STAND_IN_LATENCY=str(latency),
+        **{f"STAND_IN_{k.upper()}": str(v) for k, v in volumes.items()},
+    )
+    server = subprocess.Popen(
+        [
+            "gunicorn",
+            "-c",
+            "gunicorn.conf.py",
+            "--log-level",
+            "warning",
+            "benchmarks.stand_in_wsgi:app",
+        ],
+        env=env,
+    )
+
+    # Hand it over once it answers, then stop it
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(base_url)
+        yield base_url
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(30)
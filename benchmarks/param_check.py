@@ -0,0 +1,71 @@
+# Imports
+from endpoints._base import compile_params, validate_params
+from inspect import signature, Parameter
+from util.typing import is_valid_type
+from typing import Callable, List
+import timeit
+
+# Amount of validations per measurement
+NUMBER = 20000
+
+
+def update_instruction_group_endpoint(
+    id: str, _id: str, name: str = "", steps: List[dict] = []
+) -> None:
+    """Stand-in with the signature of the update_instruction_group route"""
+
+
+def legacy_check(func: Callable, json_data: dict) -> bool:
+    """Per-request validation as param_check did it before compilation
+
+    Args:
+        func (Callable): Route function to validate against
+        json_data (dict): JSON body of the request
+
+    Returns:
+        bool: True if the body is valid, False if not
+    """
+
+    # Introspect the signature and walk the types on every call
+    sig = signature(func)
+    for param in sig.parameters.values():
+        if param.name == "_id":
+            continue
+        if param.name not in json_data and param.default == Parameter.empty:
+            return False
+        if param.name in json_data and param.annotation != Parameter.empty:
+            if not is_valid_type(json_data[param.name], param.annotation):
+                return False
+    return True
+
+
+# Main run thread
+if __name__ == "__main__":
+    # Body with a realistic amount of steps
+    for size in [1, 50, 500]:
+        body = {
+            "id": "a" * 32,
+            "name": "Group",
+            "steps": [
+                {"name": f"Step #{i}", "description": "Lorem Ipsum"}
+                for i in range(size)
+            ],
+        }
+
+        # Time both validation paths
+        fields = compile_params(update_instruction_group_endpoint)
+        before = timeit.timeit(
+            lambda: legacy_check(update_instruction_group_endpoint, body),
+            number=NUMBER,
+        )
+        after = timeit.timeit(
+            lambda: validate_params(fields, body), number=NUMBER
+        )
+
+        # Report the per-request overhead in microseconds
+        print(
+            f"steps={size:<4} "
+            + f"before={before / NUMBER * 1e6:8.2f}us "
+            + f"after={after / NUMBER * 1e6:8.2f}us "
+            + f"speedup={before / after:5.1f}x"
+        )
@@ -0,0 +1,65 @@
+# Imports
+from util.password import PasswordHasher, hash_password, verify_password
+from config.config import config
+from util.hash import sha256
+import time
+import os
+
+# Amount of logins per measurement
+LOGINS = 8
+
+# Spicer of the legacy hashes
+SPICER = "bench"
+
+
+def logins_per_second(hasher: PasswordHasher, encoded: str) -> float:
+    """Measure login verifications per second through a hasher
+
+    Args:
+        hasher (PasswordHasher): Hasher to verify with
+        encoded (str): Stored hash to verify against
+
+    Returns:
+        float: Verified logins per second
+    """
+
+    # Submit every login at once, like a login storm would
+    start = time.perf_counter()
+    futures = [
+        hasher.submit_verify("password", encoded) for _ in range(LOGINS)
+    ]
+    for future in futures:
+        future.result()
+    return LOGINS / (time.perf_counter() - start)
+
+
+# Main run thread
+if __name__ == "__main__":
+    params = dict(config.password_hashing)
+    cores = os.cpu_count()
+
+    # Stored hashes of every scheme with the configured costs
+    hashes = {
+        "sha256 (legacy)": sha256("password", SPICER),
+        "pbkdf2_sha256": hash_password("password", "pbkdf2_sha256", params),
+        "scrypt": hash_password("password", "scrypt", params),
+    }
+
+    # Time the verification of every scheme on a single core
+    for name, encoded in hashes.items():
+        start = time.perf_counter()
+        for _ in range(LOGINS):
+            verify_password("password", encoded, SPICER)
+        rate = LOGINS / (time.perf_counter() - start)
+        print(f"{name:<16} inline         {rate:10.1f} logins/s/core")
+
+    # Time the configured scheme through the process pool
+    for pool_size in sorted({1, 2, cores}):
+        hasher = PasswordHasher(
+            params["scheme"], params, SPICER, pool_size=pool_size
+        )
+        rate = logins_per_second(hasher, hashes[params["scheme"]])
+        print(
+            f"{params['scheme']:<16} pool={pool_size:<9} "
+            + f"{rate:10.1f} logins/s ({rate / pool_size:.1f}/core)"
+        )
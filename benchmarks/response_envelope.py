@@ -0,0 +1,90 @@
+# Imports
+from util.dict_obj import DictObj, LazyDictObject
+from typing import Callable, List
+import tracemalloc
+import timeit
+import json
+
+# Amount of groups and steps per group of the response
+GROUPS = 200
+STEPS = 50
+
+# Amount of responses per measurement
+NUMBER = 20
+
+
+def make_documents() -> List[dict]:
+    """Make instruction group documents as pymongo would return them
+
+    Returns:
+        List[dict]: Instruction group documents
+    """
+    return [
+        {
+            "_id": f"{i:032x}",
+            "name": f"Group #{i}",
+            "owner": "0" * 32,
+            "steps": [
+                {"name": f"Step #{j}", "description": "Lorem Ipsum " * 10}
+                for j in range(STEPS)
+            ],
+            "version": 0,
+            "meta": {"tags": {"color": "blue"}},
+        }
+        for i in range(GROUPS)
+    ]
+
+
+def eager(docs: List[dict]) -> dict:
+    """Previous path: recursive DictObj for every model and the result"""
+    groups = [DictObj(doc) for doc in docs]
+    return DictObj({"status": "success", "message": groups})
+
+
+def lazy(docs: List[dict]) -> dict:
+    """Current path: lazy wrapping of every model and the result"""
+    groups = [LazyDictObject(doc) for doc in docs]
+    return LazyDictObject({"status": "success", "message": groups})
+
+
+def measure(func: Callable, docs: List[dict]) -> tuple:
+    """Measure the latency and the allocations of building a response
+
+    Args:
+        func (Callable): Response building path
+        docs (List[dict]): Instruction group documents
+
+    Returns:
+        tuple: Milliseconds per serialized response, KiB and blocks
+            allocated while building the response
+    """
+
+    # Time the path along with the serialization of the response
+    seconds = timeit.timeit(
+        lambda: json.dumps(func(docs)), number=NUMBER
+    ) / NUMBER
+
+    # Trace the allocations of building a single response
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    res = func(docs)
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    size = sum(stat.size_diff for stat in diff)
+    blocks = sum(stat.count_diff for stat in diff)
+    del res
+
+    # Return the measurements
+    return seconds * 1e3, size / 1024, blocks
+
+
+# Main run thread
+if __name__ == "__main__":
+    docs = make_documents()
+    for name, func in [("DictObj", eager), ("LazyDictObject", lazy)]:
+        ms, size, blocks = measure(func, docs)
+        print(
+            f"{name:<15} {ms:8.2f} ms/response "
+            + f"built={size:8.1f} KiB blocks={blocks}"
+        )
@@ -0,0 +1,176 @@
+# Imports
+from benchmarks.load import Operation, run_load, stand_in_server
+from benchmarks.endpoints import SCENARIO, commit, make_users
+from typing import Dict, List
+import argparse
+import platform
+import json
+import time
+
+
+def seeded(user: dict) -> int:
+    """Amount of the user's seeded instruction groups"""
+    return user["keep"] + len(user["disposable"])
+
+
+def group_of(user: dict, rng) -> str:
+    """Pick one of the user's seeded instruction groups"""
+    return f"{int(user['_id'], 16):016x}{rng.randrange(seeded(user)):016x}"
+
+
+# Read-heavy scenario of the polled endpoints. who_am_i checks that every
+# response belongs to the caller, so that a request context or identity
+# leaking between threads or greenlets shows up as a mismatch
+READS: List[Operation] = [
+    Operation(
+        "get_instruction_group",
+        "/instructions/get_instruction_group/",
+        lambda user, rng: {"id": group_of(user, rng)},
+        lambda res, user: res["message"]["owner"] == user["_id"],
+        weight=4,
+        auth="none",
+    ),
+    Operation(
+        "get_users_instruction_groups",
+        "/instructions/get_users_instruction_groups/",
+        lambda user, rng: {"view": "summary"},
+        lambda res, user: len(res["message"]) == seeded(user),
+        weight=2,
+    ),
+    Operation(
+        "get_checkpoint",
+        "/instructions/get_checkpoint/",
+        lambda user, rng: {"id": group_of(user, rng)},
+        weight=2,
+    ),
+    Operation(
+        "who_am_i",
+        "/authentication/who_am_i/",
+        lambda user, rng: {},
+        lambda res, user: res["_id"] == user["_id"],
+        weight=2,
+    ),
+]
+
+
+# Scenarios to compare the profiles with. The full one is the scenario of
+# benchmarks.endpoints, with registration, login, refresh, signout and every
+# write along with the reads
+SCENARIOS: Dict[str, List[Operation]] = {"full": SCENARIO, "reads": READS}
+
+
+def run_profile(profile: str, args: argparse.Namespace) -> dict:
+    """Serve the stand-in app with a gunicorn profile and load it
+
+    Args:
+        profile (str): Name of the gunicorn profile
+        args (argparse.Namespace): Command line arguments
+
+    Returns:
+        dict: Load report of the profile
+    """
+
+    # Every profile gets fresh virtual users, as the writes consume and
+    # record their data
+    volumes = {
+        "users": args.users,
+        "groups": args.groups,
+        "steps": args.steps,
+        "checkpoints": args.checkpoints,
+    }
+    users = make_users(args)
+
+    # Serve the stand-in with the profile and load it. A profile that does
+    # not boot is reported rather than stopping the comparison
+    try:
+        with stand_in_server(
+            profile, args.port, args.workers, args.latency, volumes
+        ) as base_url:
+            report = run_load(
+                base_url,
+                SCENARIOS[args.scenario],
+                users,
+                args.concurrency,
+                args.duration,
+                args.seed,
+            )
+    except TimeoutError as e:
+        report = {"error": str(e)}
+    report["profile"] = profile
+    return report
+
+
+# Main run thread
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Compare the gunicorn profiles under the same load"
+    )
+    parser.add_argument(
+        "--profiles", default="sync,threaded,gevent", help="Profiles to run"
+    )
+    parser.add_argument(
+        "--scenario",
+        choices=sorted(SCENARIOS),
+        default="full",
+        help="Load every endpoint, including authentication and writes, "
+        "or only the polled reads",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Worker processes, every worker holds its own stand-in data",
+    )
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--groups", type=int, default=30)
+    parser.add_argument(
+        "--keep",
+        type=int,
+        default=10,
+        help="Groups of every user that are never deleted, the others are "
+        "deleted during the full scenario",
+    )
+    parser.add_argument("--steps", type=int, default=20)
+    parser.add_argument("--checkpoints", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency",
+        type=float,
+        default=0.005,
+        help="Seconds of every stand-in database operation",
+    )
+    parser.add_argument("--port", type=int, default=5055)
+    parser.add_argument("--output", help="File to write the JSON reports to")
+    args = parser.parse_args()
+
+    # Run every profile and describe the runs, so that the reports of
+    # different commits can be compared
+    reports = {
+        "profiles": [
+            run_profile(profile, args)
+            for profile in args.profiles.split(",")
+        ],
+        "run": {
+            "commit": commit(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "scenario": args.scenario,
+            "workers": args.workers,
+            "latency_s": args.latency,
+            "volumes": {
+                "users": args.users,
+                "groups": args.groups,
+                "steps": args.steps,
+                "checkpoints": args.checkpoints,
+            },
+        },
+    }
+
+    # Write the reports as JSON
+    output = json.dumps(reports, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+    print(output)
@@ -0,0 +1,725 @@
+# Imports
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from pymongo import UpdateOne
+from bson import ObjectId
+from typing import Any, Dict, Iterator, List, Optional
+from controllers._base import Controller
+from util.password import hash_password
+from types import SimpleNamespace
+from config.config import config
+import threading
+import datetime
+import random
+import copy
+import time
+
+# Documents of every collection by database and collection name, shared by
+# every stand-in client of the process
+STORE: Dict[str, Dict[str, Dict[Any, dict]]] = {}
+
+# Unique keys of every collection by database and collection name
+UNIQUE: Dict[str, Dict[str, List[List[str]]]] = {}
+
+# Unique keys that skip documents without them, by the same names
+SPARSE: Dict[str, Dict[str, List[List[str]]]] = {}
+
+# Seconds every operation waits to stand in for a network round trip
+LATENCY = 0.0
+
+# Simulated round trips since the stand-in was installed
+ROUND_TRIPS = 0
+
+# Lock of the shared store
+LOCK = threading.RLock()
+
+
+def _get(doc: Any, path: str) -> Any:
+    """Get the value of a dotted path, None if it is missing
+
+    Args:
+        doc (Any): Document to read
+        path (str): Dotted path, array elements are numbered
+
+    Returns:
+        Any: Value of the path
+    """
+    for part in path.split("."):
+        if isinstance(doc, dict):
+            doc = doc.get(part)
+        elif isinstance(doc, list) and part.isdigit():
+            doc = doc[int(part)] if int(part) < len(doc) else None
+        else:
+            return None
+    return doc
+
+
+def _exists(doc: Any, path: str) -> bool:
+    """Check if a dotted path exists
+
+    Args:
+        doc (Any): Document to read
+        path (str): Dotted path, array elements are numbered
+
+    Returns:
+        bool: True if the path exists
+    """
+    for part in path.split("."):
+        if isinstance(doc, dict) and part in doc:
+            doc = doc[part]
+        elif isinstance(doc, list) and part.isdigit() and int(part) < len(doc):
+            doc = doc[int(part)]
+        else:
+            return False
+    return True
+
+
+def _match(doc: dict, query: dict) -> bool:
+    """Check if a document matches a query
+
+    Supports equality along with $gt, $gte, $lt, $lte, $ne, $in and $exists.
+
+    Args:
+        doc (dict): Document to check
+        query (dict): Query to check against
+
+    Returns:
+        bool: True if the document matches
+    """
+    for path, cond in query.items():
+        value = _get(doc, path)
+        operators = isinstance(cond, dict) and all(
+            k.startswith("$") for k in cond
+        )
+        if not operators or not cond:
+            if value != cond:
+                return False
+            continue
+        for op, arg in cond.items():
+            if op == "$exists":
+                ok = _exists(doc, path) == bool(arg)
+            elif op == "$in":
+                ok = value in arg
+            elif op == "$ne":
+                ok = value != arg
+            elif value is None:
+                ok = False
+            elif op == "$gt":
+                ok = value > arg
+            elif op == "$gte":
+                ok = value >= arg
+            elif op == "$lt":
+                ok = value < arg
+            elif op == "$lte":
+                ok = value <= arg
+            else:
+                raise NotImplementedError(f"Unsupported query operator {op}")
+            if not ok:
+                return False
+    return True
+
+
+def _eval(expr: Any, doc: dict) -> Any:
+    """Evaluate an aggregation expression against a document
+
+    Supports field paths, $literal, $size, $ifNull, $slice, $max,
+    $concatArrays, $arrayElemAt, $add, $concat, $cond, $eq and $type.
+
+    Args:
+        expr (Any): Expression to evaluate
+        doc (dict): Document the field paths refer to
+
+    Returns:
+        Any: Value of the expression
+    """
+
+    # Field paths and literals
+    if isinstance(expr, str):
+        return _get(doc, expr[1:]) if expr.startswith("$") else expr
+    if isinstance(expr, list):
+        return [_eval(item, doc) for item in expr]
+    if not isinstance(expr, dict):
+        return expr
+    if len(expr) != 1 or not next(iter(expr)).startswith("$"):
+        return {k: _eval(v, doc) for k, v in expr.items()}
+
+    # Operators
+    op, arg = next(iter(expr.items()))
+    if op == "$literal":
+        return arg
+    if op == "$type" and isinstance(arg, str) and arg.startswith("$"):
+        if not _exists(doc, arg[1:]):
+            return "missing"
+    args = _eval(arg, doc)
+    if op == "$size":
+        return len(args)
+    if op == "$ifNull":
+        return next((a for a in args if a is not None), None)
+    if op == "$slice":
+        array = args[0] or []
+        if len(args) == 2:
+            n = args[1]
+            return array[:n] if n >= 0 else array[n:]
+        position = args[1] if args[1] >= 0 else max(len(array) + args[1], 0)
+        return array[position: position + args[2]]
+    if op == "$max":
+        return max(args) if isinstance(args, list) else args
+    if op == "$concatArrays":
+        return [item for array in args for item in array]
+    if op == "$arrayElemAt":
+        array, index = args
+        return array[index] if -len(array) <= index < len(array) else None
+    if op == "$add":
+        return sum(args)
+    if op == "$concat":
+        return None if None in args else "".join(args)
+    if op == "$cond":
+        return args[1] if args[0] else args[2]
+    if op == "$eq":
+        return args[0] == args[1]
+    if op == "$type":
+        return "null" if args is None else type(args).__name__
+    raise NotImplementedError(f"Unsupported expression operator {op}")
+
+
+def _project(doc: dict, projection: Optional[dict]) -> dict:
+    """Apply a projection to a copy of a document
+
+    Args:
+        doc (dict): Document to project
+        projection (Optional[dict]): Projection, None for the full document
+
+    Returns:
+        dict: Projected copy of the document
+    """
+
+    # Full documents and exclusions
+    doc = copy.deepcopy(doc)
+    if not projection:
+        return doc
+    fields = [v for k, v in projection.items() if k != "_id"]
+    if (fields and not any(fields)) or projection == {"_id": 0}:
+        return {k: v for k, v in doc.items() if projection.get(k, 1) != 0}
+
+    # Inclusions and computed fields
+    result = {} if projection.get("_id", 1) == 0 else {"_id": doc["_id"]}
+    for key, value in projection.items():
+        if key == "_id":
+            continue
+        if isinstance(value, dict):
+            result[key] = _eval(value, doc)
+        elif key in doc:
+            result[key] = doc[key]
+    return result
+
+
+def _update(doc: dict, update: Any, insert: bool = False) -> dict:
+    """Apply an update document or pipeline to a copy of a document
+
+    Args:
+        doc (dict): Document to update
+        update (Any): Update with $set, $setOnInsert, $unset, $inc and
+            $currentDate, or a pipeline of $set and $unset stages
+        insert (bool, optional): Is the document being upserted? Defaults
+            to False.
+
+    Returns:
+        dict: Updated copy of the document
+    """
+    doc = copy.deepcopy(doc)
+
+    # Pipelines evaluate expressions stage by stage
+    if isinstance(update, list):
+        for stage in update:
+            for op, arg in stage.items():
+                if op == "$set":
+                    values = {k: _eval(v, doc) for k, v in arg.items()}
+                    doc.update(values)
+                elif op == "$unset":
+                    for key in [arg] if isinstance(arg, str) else arg:
+                        doc.pop(key, None)
+                else:
+                    raise NotImplementedError(f"Unsupported stage {op}")
+        return doc
+
+    # Update documents
+    for op, arg in update.items():
+        for key, value in arg.items():
+            if op == "$set" or (op == "$setOnInsert" and insert):
+                doc[key] = copy.deepcopy(value)
+            elif op == "$setOnInsert":
+                pass
+            elif op == "$currentDate":
+                doc[key] = datetime.datetime.utcnow()
+            elif op == "$unset":
+                doc.pop(key, None)
+            elif op == "$inc":
+                doc[key] = (doc.get(key) or 0) + value
+            else:
+                raise NotImplementedError(f"Unsupported update {op}")
+    return doc
+
+
+class StandInCursor:
+    """Cursor over a snapshot of the matched documents"""
+
+    def __init__(
+        self: "StandInCursor", docs: List[dict], projection: Optional[dict]
+    ) -> None:
+        """Constructor for the StandInCursor class
+
+        Args:
+            self (StandInCursor): Current class type
+            docs (List[dict]): Matched documents
+            projection (Optional[dict]): Projection of the documents
+        """
+        self.docs = docs
+        self.projection = projection
+        self._limit = 0
+
+    def sort(self: "StandInCursor", key: Any, direction: int = 1):
+        """Sort the documents
+
+        Args:
+            self (StandInCursor): Current class type
+            key (Any): Field to sort by or a list of (field, direction)
+            direction (int, optional): 1 or -1. Defaults to 1.
+
+        Returns:
+            StandInCursor: The same cursor
+        """
+        keys = key if isinstance(key, list) else [(key, direction)]
+        for field, order in reversed(keys):
+            self.docs.sort(key=lambda d: _get(d, field), reverse=order < 0)
+        return self
+
+    def limit(self: "StandInCursor", limit: int) -> "StandInCursor":
+        """Limit the amount of documents
+
+        Args:
+            self (StandInCursor): Current class type
+            limit (int): Maximum amount of documents, 0 for no limit
+
+        Returns:
+            StandInCursor: The same cursor
+        """
+        self._limit = limit
+        return self
+
+    def batch_size(self: "StandInCursor", size: int) -> "StandInCursor":
+        """Accept the batch size, the documents are already in memory
+
+        Args:
+            self (StandInCursor): Current class type
+            size (int): Documents per batch
+
+        Returns:
+            StandInCursor: The same cursor
+        """
+        return self
+
+    def __iter__(self: "StandInCursor") -> Iterator[dict]:
+        """Yield the projected documents
+
+        Args:
+            self (StandInCursor): Current class type
+
+        Yields:
+            Iterator[dict]: Projected documents
+        """
+        docs = self.docs[: self._limit] if self._limit else self.docs
+        for doc in docs:
+            yield _project(doc, self.projection)
+
+
+class StandInCollection:
+    """In-memory stand-in for the subset of pymongo's Collection used by the
+    controllers, waiting LATENCY seconds per operation"""
+
+    def __init__(self: "StandInCollection", db: str, name: str) -> None:
+        """Constructor for the StandInCollection class
+
+        Args:
+            self (StandInCollection): Current class type
+            db (str): Name of the database
+            name (str): Name of the collection
+        """
+        self.name = name
+        self.full_name = f"{db}.{name}"
+        with LOCK:
+            self.docs = STORE.setdefault(db, {}).setdefault(name, {})
+            self.unique = UNIQUE.setdefault(db, {}).setdefault(name, [])
+            self.sparse = SPARSE.setdefault(db, {}).setdefault(name, [])
+
+    def _wait(self: "StandInCollection") -> None:
+        """Count and wait for the simulated round trip"""
+        global ROUND_TRIPS
+        ROUND_TRIPS += 1
+        if LATENCY:
+            time.sleep(LATENCY)
+
+    def _matches(self: "StandInCollection", query: dict) -> List[dict]:
+        """Get the stored documents that match a query"""
+        if set(query) == {"_id"} and not isinstance(query["_id"], dict):
+            doc = self.docs.get(query["_id"])
+            return [doc] if doc is not None else []
+        return [doc for doc in self.docs.values() if _match(doc, query)]
+
+    def _check_unique(self: "StandInCollection", doc: dict) -> None:
+        """Raise like the server if a document breaks a unique key"""
+        for keys in self.unique:
+            value = [_get(doc, k) for k in keys]
+            if keys in self.sparse and not any(_exists(doc, k) for k in keys):
+                continue
+            for other in self.docs.values():
+                if other["_id"] != doc["_id"] and value == [
+                    _get(other, k) for k in keys
+                ]:
+                    raise DuplicateKeyError(
+                        f"E11000 duplicate key error collection: "
+                        f"{self.full_name} dup key: {dict(zip(keys, value))}",
+                        11000,
+                    )
+
+    def _store(self: "StandInCollection", doc: dict) -> None:
+        """Store a document after checking its unique keys"""
+        self._check_unique(doc)
+        self.docs[doc["_id"]] = doc
+
+    def find_one(
+        self: "StandInCollection",
+        query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+    ) -> Optional[dict]:
+        """Find the first matching document"""
+        self._wait()
+        with LOCK:
+            docs = self._matches(query or {})
+            return _project(docs[0], projection) if docs else None
+
+    def find(
+        self: "StandInCollection",
+        query: Optional[dict] = None,
+        projection: Optional[dict] = None,
+    ) -> StandInCursor:
+        """Find every matching document"""
+        self._wait()
+        with LOCK:
+            return StandInCursor(list(self._matches(query or {})), projection)
+
+    def count_documents(self: "StandInCollection", query: dict) -> int:
+        """Count the matching documents"""
+        self._wait()
+        with LOCK:
+            return len(self._matches(query))
+
+    def estimated_document_count(self: "StandInCollection") -> int:
+        """Count every document"""
+        self._wait()
+        return len(self.docs)
+
+    def insert_one(self: "StandInCollection", doc: dict) -> SimpleNamespace:
+        """Insert a document"""
+        self._wait()
+        with LOCK:
+            if doc.get("_id") in self.docs:
+                raise DuplicateKeyError("E11000 duplicate key error", 11000)
+            doc.setdefault("_id", ObjectId())
+            self._store(copy.deepcopy(doc))
+        return SimpleNamespace(inserted_id=doc["_id"], acknowledged=True)
+
+    def insert_many(
+        self: "StandInCollection", docs: List[dict], ordered: bool = True
+    ) -> SimpleNamespace:
+        """Insert documents without waiting per document, reporting the
+        duplicates like the server"""
+        self._wait()
+        errors = []
+        with LOCK:
+            for index, doc in enumerate(docs):
+                doc.setdefault("_id", ObjectId())
+                try:
+                    if doc["_id"] in self.docs:
+                        raise DuplicateKeyError("E11000 duplicate key", 11000)
+                    self._store(copy.deepcopy(doc))
+                except DuplicateKeyError as e:
+                    errors.append({"index": index, "code": 11000, "errmsg": e})
+                    if ordered:
+                        break
+        if errors:
+            raise BulkWriteError(
+                {"writeErrors": errors, "writeConcernErrors": []}
+            )
+        return SimpleNamespace(inserted_ids=[d["_id"] for d in docs])
+
+    def replace_one(
+        self: "StandInCollection",
+        query: dict,
+        doc: dict,
+        upsert: bool = False,
+    ) -> SimpleNamespace:
+        """Replace the first matching document"""
+        self._wait()
+        with LOCK:
+            return self._replace(query, doc, upsert)
+
+    def _replace(
+        self: "StandInCollection", query: dict, doc: dict, upsert: bool
+    ) -> SimpleNamespace:
+        """Replace the first matching document while holding the lock"""
+        docs = self._matches(query)
+        if not docs and not upsert:
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        _id = docs[0]["_id"] if docs else query.get("_id", doc.get("_id"))
+        if _id is None:
+            _id = f"{len(self.docs):024x}"
+        self._store({**copy.deepcopy(doc), "_id": _id})
+        return SimpleNamespace(
+            matched_count=len(docs[:1]),
+            modified_count=len(docs[:1]),
+            upserted_id=None if docs else _id,
+        )
+
+    def update_one(
+        self: "StandInCollection",
+        query: dict,
+        update: Any,
+        upsert: bool = False,
+    ) -> SimpleNamespace:
+        """Update the first matching document"""
+        self._wait()
+        with LOCK:
+            return self._update_one(query, update, upsert)
+
+    def _update_one(
+        self: "StandInCollection", query: dict, update: Any, upsert: bool
+    ) -> SimpleNamespace:
+        """Update the first matching document while holding the lock"""
+        docs = self._matches(query)
+        if not docs:
+            if not upsert:
+                return SimpleNamespace(matched_count=0, modified_count=0)
+            base = {k: v for k, v in query.items() if not isinstance(v, dict)}
+            base.setdefault("_id", f"{len(self.docs):024x}")
+            self._store(_update(base, update, insert=True))
+            return SimpleNamespace(matched_count=0, modified_count=0)
+        self._store(_update(docs[0], update))
+        return SimpleNamespace(matched_count=1, modified_count=1)
+
+    def find_one_and_update(
+        self: "StandInCollection",
+        query: dict,
+        update: Any,
+        projection: Optional[dict] = None,
+        return_document: bool = False,
+        upsert: bool = False,
+    ) -> Optional[dict]:
+        """Update the first matching document and return it"""
+        self._wait()
+        with LOCK:
+            docs = self._matches(query)
+            if not docs:
+                return None
+            updated = _update(docs[0], update)
+            self._store(updated)
+            result = updated if return_document else docs[0]
+            return _project(result, projection)
+
+    def delete_one(self: "StandInCollection", query: dict) -> SimpleNamespace:
+        """Delete the first matching document"""
+        self._wait()
+        with LOCK:
+            docs = self._matches(query)
+            if docs:
+                del self.docs[docs[0]["_id"]]
+        return SimpleNamespace(deleted_count=len(docs[:1]))
+
+    def delete_many(self: "StandInCollection", query: dict) -> SimpleNamespace:
+        """Delete every matching document"""
+        self._wait()
+        with LOCK:
+            docs = self._matches(query)
+            for doc in docs:
+                del self.docs[doc["_id"]]
+        return SimpleNamespace(deleted_count=len(docs))
+
+    def bulk_write(
+        self: "StandInCollection", requests: List[Any], ordered: bool = True
+    ) -> SimpleNamespace:
+        """Run ReplaceOne and UpdateOne requests in a single round trip"""
+        self._wait()
+        with LOCK:
+            for request in requests:
+                write = (
+                    self._update_one
+                    if isinstance(request, UpdateOne)
+                    else self._replace
+                )
+                write(request._filter, request._doc, request._upsert)
+        return SimpleNamespace(acknowledged=True)
+
+    def index_information(self: "StandInCollection") -> dict:
+        """Get the indexes of the collection"""
+        with LOCK:
+            return dict(self._indexes())
+
+    def _indexes(self: "StandInCollection") -> dict:
+        """Stored index specifications"""
+        return STORE.setdefault("__indexes__", {}).setdefault(
+            self.full_name, {"_id_": {"key": [("_id", 1)]}}
+        )
+
+    def create_indexes(self: "StandInCollection", models: List[Any]) -> list:
+        """Record indexes and enforce their unique keys"""
+        with LOCK:
+            for model in models:
+                spec = dict(model.document)
+                name = spec.pop("name")
+                spec["key"] = list(spec["key"].items())
+                self._indexes()[name] = spec
+                if spec.get("unique"):
+                    self.unique.append([k for k, _ in spec["key"]])
+                    if spec.get("sparse"):
+                        self.sparse.append([k for k, _ in spec["key"]])
+        return [model.document["name"] for model in models]
+
+
+class StandInDatabase:
+    """In-memory stand-in for a pymongo Database"""
+
+    def __init__(self: "StandInDatabase", name: str) -> None:
+        """Constructor for the StandInDatabase class
+
+        Args:
+            self (StandInDatabase): Current class type
+            name (str): Name of the database
+        """
+        self.name = name
+
+    def __getitem__(self: "StandInDatabase", name: str) -> StandInCollection:
+        """Get a collection"""
+        return StandInCollection(self.name, name)
+
+
+class StandInClient:
+    """In-memory stand-in for pymongo's MongoClient, accepting and ignoring
+    the client options"""
+
+    def __init__(self: "StandInClient", *args: Any, **kwargs: Any) -> None:
+        """Constructor for the StandInClient class"""
+
+    def __getitem__(self: "StandInClient", name: str) -> StandInDatabase:
+        """Get a database"""
+        return StandInDatabase(name)
+
+    def close(self: "StandInClient") -> None:
+        """Nothing to close"""
+
+
+def install(latency: float = 0.0) -> None:
+    """Make the controllers use the in-memory stand-in instead of MongoDB
+
+    Must run before the controllers use the database in this process.
+
+    Args:
+        latency (float, optional): Seconds every operation waits to stand in
+            for a network round trip. Defaults to 0.0.
+    """
+    global LATENCY
+    LATENCY = latency
+    Controller.MONGO.client_class = StandInClient
+    Controller.MONGO.close()
+
+
+def seed(
+    users: int = 100,
+    groups_per_user: int = 10,
+    steps_per_group: int = 20,
+    checkpoints_per_user: int = 5,
+    password: str = "password",
+    seed: int = 0,
+) -> dict:
+    """Fill the database with deterministic users, groups and checkpoints,
+    so that every process seeded with the same arguments holds the same
+    data
+
+    Args:
+        users (int, optional): Amount of users. Defaults to 100.
+        groups_per_user (int, optional): Instruction groups of every user.
+            Defaults to 10.
+        steps_per_group (int, optional): Steps of every group. Defaults to
+            20.
+        checkpoints_per_user (int, optional): Checkpoints of every user.
+            Defaults to 5.
+        password (str, optional): Password of every user. Defaults to
+            "password".
+        seed (int, optional): Seed of the generated content. Defaults to 0.
+
+    Returns:
+        dict: IDs and emails of the users, IDs of the groups and the
+            password
+    """
+    rng = random.Random(seed)
+    words = "lorem ipsum dolor sit amet consectetur adipiscing elit".split()
+
+    # Hash the shared password once with the configured scheme
+    encoded = hash_password(
+        password, config.password_hashing.scheme, config.password_hashing
+    )
+
+    # Make the documents
+    user_docs, group_docs, checkpoint_docs = [], [], []
+    for u in range(users):
+        user_id = f"{u:032x}"
+        user_docs.append(
+            {
+                "_id": user_id,
+                "first_name": f"First{u}",
+                "last_name": f"Last{u}",
+                "email": f"user{u}@example.com",
+                "password": encoded,
+            }
+        )
+        for g in range(groups_per_user):
+            group_docs.append(
+                {
+                    "_id": f"{u:016x}{g:016x}",
+                    "name": f"Group {u}-{g}",
+                    "owner": user_id,
+                    "steps": [
+                        {
+                            "name": f"Step {s}",
+                            "description": " ".join(
+                                rng.choice(words) for _ in range(30)
+                            ),
+                        }
+                        for s in range(steps_per_group)
+                    ],
+                    "version": 0,
+                }
+            )
+        for g in range(min(checkpoints_per_user, groups_per_user)):
+            checkpoint_docs.append(
+                {
+                    "_id": f"{u:016x}{g:016x}",
+                    "ig_id": f"{u:016x}{g:016x}",
+                    "user_id": user_id,
+                    "position": rng.randrange(steps_per_group or 1),
+                }
+            )
+
+    # Insert them
+    Controller.USER_COL.insert_many(user_docs)
+    Controller.INSTRUCTION_GROUP_COL.insert_many(group_docs)
+    Controller.CHECKPOINT_COL.insert_many(checkpoint_docs)
+
+    # Return what the load needs to know about the data
+    return {
+        "users": [(d["_id"], d["email"]) for d in user_docs],
+        "groups": {
+            d["_id"]: [
+                f"{u:016x}{g:016x}" for g in range(groups_per_user)
+            ]
+            for u, d in enumerate(user_docs)
+        },
+        "password": password,
+    }
@@ -0,0 +1,16 @@
+# Imports
+from benchmarks.stand_in import install, seed
+import os
+
+# Serve the app from the in-memory stand-in with the seeded volumes, which
+# are the same in every worker
+install(float(os.environ.get("STAND_IN_LATENCY", "0.002")))
+seed(
+    users=int(os.environ.get("STAND_IN_USERS", "100")),
+    groups_per_user=int(os.environ.get("STAND_IN_GROUPS", "10")),
+    steps_per_group=int(os.environ.get("STAND_IN_STEPS", "20")),
+    checkpoints_per_user=int(os.environ.get("STAND_IN_CHECKPOINTS", "5")),
+)
+
+# The app is imported after the stand-in so that it never reaches MongoDB
+from main import app  # noqa: E402, F401
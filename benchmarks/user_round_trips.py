@@ -0,0 +1,81 @@
+# Imports
+from benchmarks import stand_in
+from typing import Callable
+
+# Count the round trips of the user operations against the stand-in
+stand_in.install(0)
+from controllers._base import Controller  # noqa: E402
+from controllers.indexes import IndexControl  # noqa: E402
+from controllers.users import UserControl  # noqa: E402
+from models.user import User  # noqa: E402
+
+
+def legacy_register(email: str) -> None:
+    """Registration as register_user did it before, checking for the email
+    before inserting"""
+    if Controller.USER_COL.find_one({"email": email}) is None:
+        Controller.USER_COL.insert_one(
+            {"first_name": "Ada", "last_name": "Lovelace", "email": email}
+        )
+
+
+def legacy_login(email: str) -> None:
+    """Login as it was done before, fetching the hash and then the user"""
+    user = Controller.USER_COL.find_one({"email": email}, {"password": 1})
+    Controller.USER_COL.find_one({"_id": user["_id"]})
+
+
+def legacy_update(id: str) -> None:
+    """Update as update_user did it before, reading the names first"""
+    user = User(**Controller.USER_COL.find_one({"_id": id}, User.PROJECTION))
+    user.info.first_name = "Augusta"
+    Controller.USER_COL.update_one(
+        {"_id": id},
+        {"$set": {"first_name": "Augusta", "full_name": user.get_fullname()}},
+    )
+
+
+def round_trips(func: Callable, *args: str, **kwargs: str) -> int:
+    """Count the round trips of a call
+
+    Args:
+        func (Callable): Operation to run
+        *args (str): Positional arguments of the operation
+        **kwargs (str): Keyword arguments of the operation
+
+    Returns:
+        int: Simulated round trips of the call
+    """
+    start = stand_in.ROUND_TRIPS
+    func(*args, **kwargs)
+    return stand_in.ROUND_TRIPS - start
+
+
+# Main run thread
+if __name__ == "__main__":
+    # Declare the unique email index the registration relies on
+    IndexControl.ensure_indexes()
+
+    # Count the round trips of both paths of every operation
+    name = {"first_name": "Ada", "last_name": "Lovelace"}
+    register = round_trips(
+        UserControl.register_user, **name, email="ada@x.io", password="pw"
+    )
+    duplicate = round_trips(
+        UserControl.register_user, **name, email="ADA@x.io", password="pw"
+    )
+    login = round_trips(UserControl.login, "ada@x.io", "pw")
+    id = Controller.USER_COL.find_one({"email": "ada@x.io"})["_id"]
+    update = round_trips(UserControl.update_user, id, first_name="Augusta")
+    rows = [
+        ("register", round_trips(legacy_register, "bob@x.io"), register),
+        ("register dup", round_trips(legacy_register, "bob@x.io"), duplicate),
+        ("login", round_trips(legacy_login, "ada@x.io"), login),
+        ("update_user", round_trips(legacy_update, id), update),
+    ]
+
+    # Report the round trips and check the name the database computed
+    for operation, before, after in rows:
+        print(f"{operation:<13} before={before} after={after}")
+    user = Controller.USER_COL.find_one({"_id": id})
+    assert user["full_name"] == "Lovelace, Augusta", user["full_name"]
@@ -0,0 +1,55 @@
+# Imports
+from motor.motor_asyncio import AsyncIOMotorClient
+from util.dict_obj import LazyDictObject
+from util.mongo import ConnectionManager
+from ._base import Controller
+from functools import wraps
+from typing import Any
+
+
+class AsyncController(Controller):
+    """Encapsulation of all asynchronous database actions
+
+    Args:
+        Controller (Controller): Inherits the Controller parent class for the
+            database specifications and the message helpers
+    """
+
+    # Make the asynchronous MongoDB client lazily in every process from the
+    # same specifications and pool settings, so that it is never made
+    # before a fork nor outside the event loop of the worker
+    MONGO = ConnectionManager(
+        Controller.MONGO_URI,
+        Controller.DB_SPECS.db,
+        Controller.MONGO.options,
+        client_class=AsyncIOMotorClient,
+        listeners=Controller.MONGO.listeners,
+    )
+    DB = MONGO.database()
+
+    # Collection constant definition
+    USER_COL = DB["users"]
+    BLACKLIST_COL = DB["jwtBlacklist"]
+    INSTRUCTION_GROUP_COL = DB["instructionGroups"]
+    CHECKPOINT_COL = DB["checkpoints"]
+
+    def return_dict_obj(func: object) -> object:
+        """Wrapper to return async controller function's returns in DictObj
+        format
+
+        Args:
+            func (object): Coroutine function to convert its return format
+
+        Returns:
+            object: Return format
+        """
+
+        @wraps(func)
+        async def wrapper(*args: Any, **kwargs: Any) -> LazyDictObject:
+            """Wrapping definition"""
+
+            # Return with lazy wrapping so that nested results are not copied
+            return LazyDictObject(await func(*args, **kwargs))
+
+        # End of wrapper definition
+        return wrapper
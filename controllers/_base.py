@@ -1,9 +1,15 @@
 # Imports
-from util.dict_obj import DictObj
+from util.revocation_cache import RevocationCache
+from util.write_behind import WriteBehindBuffer
+from util.password import PasswordHasher
+from util.metrics import CommandMetrics, Metrics
+from util.read_cache import make_cache
+from util.jwt_cache import ClaimsCache
+from util.mongo import ConnectionManager
+from util.dict_obj import LazyDictObject
 from config.config import config
 from functools import wraps
 from typing import Any
-import pymongo
 import os
 
 
@@ -18,16 +24,30 @@ class Controller:
 
     # Set MongoDB information based on the database specifications
     if db_spec.user != "" and db_spec.password != "":
-        CLIENT = pymongo.MongoClient(
+        MONGO_URI = (
             f"mongodb://{db_spec.user}:{db_spec.password}@{db_spec.domain}"
             + f":{db_spec.port}/{db_spec.db}"
         )
-        DB = CLIENT[db_spec.db]
     else:
-        CLIENT = pymongo.MongoClient(
-            f"mongodb://{db_spec.domain}:{db_spec.port}/"
-        )
-        DB = CLIENT[db_spec.db]
+        MONGO_URI = f"mongodb://{db_spec.domain}:{db_spec.port}/"
+
+    # Request and database metrics of the worker, shared with the other
+    # workers through the metrics directory
+    METRICS = Metrics(
+        config.metrics.buckets,
+        os.environ.get("METRICS_DIR", config.metrics.dir),
+        config.metrics.flush_interval,
+    )
+
+    # Make the client lazily in every process with the configured pool
+    # settings, so that workers forked after import get their own
+    MONGO = ConnectionManager(
+        MONGO_URI,
+        db_spec.db,
+        dict(config.mongo_client),
+        listeners=[CommandMetrics(METRICS)] if config.metrics.enabled else [],
+    )
+    DB = MONGO.database()
 
     # Collection constant definition
     USER_COL = DB["users"]
@@ -35,6 +55,44 @@ class Controller:
     INSTRUCTION_GROUP_COL = DB["instructionGroups"]
     CHECKPOINT_COL = DB["checkpoints"]
 
+    # Whether the unique email index that registration relies on was seen,
+    # registrations check for the email first until it is
+    UNIQUE_EMAIL = False
+
+    # Per-worker cache of the revoked JWT identifiers
+    REVOCATION_CACHE = RevocationCache(
+        BLACKLIST_COL,
+        field="jti",
+        max_staleness=config.revocation_cache.max_staleness,
+        poll_overlap=config.revocation_cache.poll_overlap,
+        reconcile_every=config.revocation_cache.reconcile_every,
+    )
+
+    # Per-worker cache of verified JWT claims
+    CLAIMS_CACHE = ClaimsCache(config.JWT.claims_cache_size)
+
+    # Password hashing pool of the worker
+    PASSWORD_HASHER = PasswordHasher(
+        config.password_hashing.scheme,
+        config.password_hashing,
+        db_spec.spicer,
+        pool_size=config.password_hashing.pool_size,
+        max_pending=config.password_hashing.max_pending,
+    )
+
+    # Per-worker write-behind buffer of the users' checkpoints
+    CHECKPOINT_BUFFER = WriteBehindBuffer(
+        CHECKPOINT_COL,
+        flush_interval=config.checkpoint_buffer.flush_interval,
+        max_size=config.checkpoint_buffer.max_size,
+        max_pending=config.checkpoint_buffer.max_pending,
+    )
+
+    # Read-through caches of the full instruction groups and of the amount
+    # of groups of each owner
+    GROUP_CACHE = make_cache(config.group_cache, "group")
+    COUNT_CACHE = make_cache(config.group_cache, "count")
+
     # Set config constants
     DB_SPECS = db_spec
     CONFIG = config
@@ -84,11 +142,11 @@ class Controller:
         """
 
         @wraps(func)
-        def wrapper(*args: Any, **kwargs: Any) -> DictObj:
+        def wrapper(*args: Any, **kwargs: Any) -> LazyDictObject:
             """Wrapping definition"""
 
-            # Return with parsing wrapping if all else is good
-            return DictObj(func(*args, **kwargs))
+            # Return with lazy wrapping so that nested results are not copied
+            return LazyDictObject(func(*args, **kwargs))
 
         # End of wrapper definition
         return wrapper
@@ -0,0 +1,389 @@
+# Imports
+from models.instruction_group import InstructionGroup
+from ._async_base import AsyncController
+from .instructions import InstructionControl
+from util.pagination import CursorPage
+from util.dict_obj import DictObj
+from typing import Any, List, Optional
+from pprint import pprint  # noqa
+import pymongo
+
+
+class AsyncInstructionControl(AsyncController):
+    """Asynchronous counterpart of InstructionControl
+
+    Args:
+        AsyncController (AsyncController): Inherits the AsyncController parent
+            class
+    """
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def create_instruction_group(name: str, _id: str) -> DictObj:
+        """Create a new instruction group
+
+        Args:
+            name (str): Name of the new instruction group
+            _id (str): ID of the owner of the new instruction group
+
+        Returns:
+            DictObj: Result of the query
+        """
+
+        # Prep data to be inserted
+        insert = InstructionControl._new_group(name, _id)
+
+        # Insert into the collection and drop the cached amount of groups
+        await AsyncController.INSTRUCTION_GROUP_COL.insert_one(insert)
+        await AsyncController.COUNT_CACHE.delete_async(_id)
+
+        # Return a statement
+        return AsyncController.success("Instruction group created")
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def get_instruction_group(
+        id: str, view: str = "full", fields: List[str] = []
+    ) -> DictObj:
+        """Controller to handle the search of an instruction group
+
+        Args:
+            id (str): ID of the instruction group to return
+            view (str, optional): Name of the view to return. Defaults to
+                "full".
+            fields (List[str], optional): Fields to return instead of a view.
+                Defaults to [].
+
+        Returns:
+            DictObj: Result of the search, an InstructionGroup for the full
+                view or the projected document otherwise
+        """
+
+        # Get the projection of the requested view
+        try:
+            projection = InstructionGroup.projection(view, fields)
+        except ValueError as e:
+            return AsyncController.error(str(e))
+
+        # Read the full instruction group through the cache
+        cache = AsyncController.GROUP_CACHE
+        cached = (
+            projection is None and AsyncController.CONFIG.group_cache.enabled
+        )
+        group, generation = (
+            await cache.get_async(id) if cached else (None, None)
+        )
+        if group is None:
+            group = await AsyncController.INSTRUCTION_GROUP_COL.find_one(
+                {"_id": id}, projection
+            )
+            if group and cached:
+                await cache.set_async(id, group, generation)
+
+        # Return the instruction group
+        return InstructionControl._group_result(group, projection)
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def get_users_instruction_groups(
+        _id: str,
+        page_size: int = 0,
+        cursor: str = "",
+        include_total: bool = False,
+        view: str = "full",
+        fields: List[str] = [],
+    ) -> DictObj:
+        """Controller to get a page of the user's instruction groups, ordered
+        by ID
+
+        Args:
+            _id (str): ID of the owner requesting their instruction groups
+            page_size (int, optional): Page size of result, 0 for the
+                default. Defaults to 0.
+            cursor (str, optional): Continuation token of the previous page,
+                empty for the first page. Defaults to "".
+            include_total (bool, optional): Should the amount of the user's
+                instruction groups be returned? Defaults to False.
+            view (str, optional): Name of the view to return. Defaults to
+                "full".
+            fields (List[str], optional): Fields to return instead of a view.
+                Defaults to [].
+
+        Returns:
+            DictObj: Instruction groups of the page, or their projected
+                documents, along with the next page's token
+        """
+
+        # Get the projection of the requested view, then the query and size
+        # of the page
+        try:
+            projection = InstructionGroup.projection(view, fields)
+            query, page_size = InstructionControl._page_query(
+                _id, page_size, cursor, False
+            )
+        except ValueError as e:
+            return AsyncController.error(str(e))
+
+        # Count only if requested
+        extra = {}
+        if include_total:
+            extra["total"] = await AsyncInstructionControl._owner_count(_id)
+
+        # Get one more group than requested to know if there is a next page
+        items = (
+            await AsyncController.INSTRUCTION_GROUP_COL.find(query, projection)
+            .sort("_id", pymongo.ASCENDING)
+            .to_list(page_size + 1)
+        )
+        page = CursorPage(
+            items,
+            page_size,
+            None if projection else lambda item: InstructionGroup(**item),
+        )
+
+        # Return list of owned instruction groups and the next page's token
+        groups = list(page)
+        return AsyncController.success(
+            groups, next_cursor=page.next_cursor, **extra
+        )
+
+    @staticmethod
+    async def _owner_count(_id: str) -> int:
+        """Get the amount of a user's instruction groups through the count
+        cache, like InstructionControl._owner_count
+
+        Args:
+            _id (str): ID of the owner
+
+        Returns:
+            int: Amount of the user's instruction groups
+        """
+
+        # Count with the owner index on a miss
+        cache = AsyncController.COUNT_CACHE
+        cached = AsyncController.CONFIG.group_cache.enabled
+        total, generation = (
+            await cache.get_async(_id) if cached else (None, None)
+        )
+        if total is None:
+            col = AsyncController.INSTRUCTION_GROUP_COL
+            total = await col.count_documents({"owner": _id})
+            if cached:
+                await cache.set_async(_id, total, generation)
+
+        # Return the amount
+        return total
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def get_checkpoint(id: str, _id: str) -> DictObj:
+        """Get the user's checkpoint while doing an instruction group
+
+        Args:
+            id (str): ID of the instruction group
+            _id (str): ID of the user requesting the checkpoint
+
+        Returns:
+            DictObj: Indexed positioning of the user's checkpoint
+        """
+
+        # Get the user's checkpoint information, reading through the
+        # write-behind buffer first
+        pos = AsyncController.CHECKPOINT_BUFFER.get((id, _id))
+        if pos is None:
+            pos = await AsyncController.CHECKPOINT_COL.find_one(
+                InstructionControl._checkpoint_query(id, _id),
+                InstructionControl.CHECKPOINT_PROJECTION,
+            )
+
+        # Return the result
+        if pos is None:
+            return AsyncController.success(0)
+        else:
+            return AsyncController.success(pos["position"])
+
+    @staticmethod
+    async def _write_failure(
+        id: str, _id: str, version: Optional[int]
+    ) -> dict:
+        """Explain why a versioned write to an instruction group matched
+        nothing. Only called after a failed write, so successful writes
+        stay a single round trip.
+
+        Args:
+            id (str): ID of the instruction group
+            _id (str): ID of the user requesting the write
+            version (Optional[int]): Version the write was based on
+
+        Returns:
+            dict: Error message of the failure
+        """
+
+        # Get the ownership and version of the instruction group
+        res = await AsyncController.INSTRUCTION_GROUP_COL.find_one(
+            {"_id": id}, {"owner": 1, "version": 1}
+        )
+        if not res or res["owner"] != _id:
+            return AsyncController.error(
+                "You cannot edit this instruction group"
+            )
+
+        # Report a conflict if the instruction group was changed meanwhile
+        current = res.get("version", 0)
+        if version is not None and version != current:
+            return AsyncController.error(
+                "The instruction group was modified by someone else",
+                conflict=True,
+                version=current,
+            )
+
+        # Otherwise a step index was out of range
+        return AsyncController.error("Step index out of range")
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def update_instruction_group(
+        id: str, _id: str, version: Optional[int] = None, **kwargs: Any
+    ) -> DictObj:
+        """Controller to update an instruction group
+
+        Args:
+            id (str): ID of the instruction group to update
+            _id (str): ID of the user requesting the update
+            version (Optional[int], optional): Version the update is based
+                on, None to skip the version check. Defaults to None.
+
+        Returns:
+            DictObj: Result of the operation along with the new version
+        """
+
+        # Build the update of the given fields
+        try:
+            update = InstructionControl._group_update(kwargs)
+        except ValueError as e:
+            return AsyncController.error(str(e))
+
+        # Update the instruction group if the user owns it and it is still
+        # at the given version
+        res = await AsyncController.INSTRUCTION_GROUP_COL.find_one_and_update(
+            InstructionControl._version_filter(id, _id, version),
+            update,
+            projection={"version": 1},
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        if res is None:
+            return await AsyncInstructionControl._write_failure(
+                id, _id, version
+            )
+        await AsyncController.GROUP_CACHE.delete_async(id)
+
+        # Return result
+        return AsyncController.success(
+            "Update is a success", version=res["version"]
+        )
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def patch_instruction_group(
+        id: str, _id: str, version: int, operations: List[dict]
+    ) -> DictObj:
+        """Controller to apply step-level patch operations to an instruction
+        group in a single round trip
+
+        Args:
+            id (str): ID of the instruction group to patch
+            _id (str): ID of the user requesting the patch
+            version (int): Version the patch is based on
+            operations (List[dict]): Operations to apply in order
+
+        Returns:
+            DictObj: Result of the operation along with the new version
+        """
+
+        # Build the filter and pipeline of the operations
+        try:
+            query, stages = InstructionControl._patch(
+                id, _id, version, operations
+            )
+        except ValueError as e:
+            return AsyncController.error(str(e))
+
+        # Apply the operations if the user owns the group at that version
+        res = await AsyncController.INSTRUCTION_GROUP_COL.find_one_and_update(
+            query,
+            stages,
+            projection={"version": 1},
+            return_document=pymongo.ReturnDocument.AFTER,
+        )
+        if res is None:
+            return await AsyncInstructionControl._write_failure(
+                id, _id, version
+            )
+        await AsyncController.GROUP_CACHE.delete_async(id)
+
+        # Return result
+        return AsyncController.success(
+            "Patch is a success", version=res["version"]
+        )
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def save_checkpoint(id: str, _id: str, pos: int) -> DictObj:
+        """Update a user's checkpoint on an instruction group
+
+        Args:
+            id (str): ID of the instruction group that the user is on
+            _id (str): ID of the user
+            pos (int): Numerical position of the user in the playthrough
+
+        Returns:
+            DictObj: Status of the update
+        """
+
+        # Buffer the checkpoint to be written behind if enabled, which is
+        # the same buffer the synchronous controllers use
+        query = InstructionControl._checkpoint_query(id, _id)
+        checkpoint = {**query, "position": pos}
+        if AsyncController.CONFIG.checkpoint_buffer.enabled:
+            AsyncController.CHECKPOINT_BUFFER.put((id, _id), query, checkpoint)
+            return AsyncController.success("Checkpoint saved")
+
+        # Replace one and upsert to save checkpoint
+        await AsyncController.CHECKPOINT_COL.replace_one(
+            query, checkpoint, upsert=True
+        )
+
+        # Send updated status
+        return AsyncController.success("Checkpoint saved")
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def delete_instruction_group(id: str, _id: str) -> DictObj:
+        """Controller to delete an instruction group
+
+        Args:
+            id (str): ID of the instruction group to delete
+            _id (str): ID of the user requesting the deletion
+
+        Returns:
+            DictObj: Result of the deletion
+        """
+
+        # Check if the user has ownership of the instruction group
+        res = await AsyncController.INSTRUCTION_GROUP_COL.find_one(
+            {"_id": id, "owner": _id}
+        )
+        if not res:
+            return AsyncController.error(
+                "You do not have access to this instruction group"
+            )
+
+        # If so, delete the instruction group
+        await AsyncController.INSTRUCTION_GROUP_COL.delete_one(
+            {"_id": id, "owner": _id}
+        )
+        await AsyncController.GROUP_CACHE.delete_async(id)
+        await AsyncController.COUNT_CACHE.delete_async(_id)
+
+        # Return success message
+        return AsyncController.success("Deletion complete")
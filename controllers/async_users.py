@@ -0,0 +1,246 @@
+# Imports
+from util.jwt_cache import decode_verified
+from ._async_base import AsyncController
+from .indexes import IndexControl
+from util.revocation_cache import (
+    only_duplicates,
+    revocation,
+    revocation_writes,
+    revoked_query,
+)
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from typing import List, Union
+from util.dict_obj import DictObj
+from models.user import User
+from pprint import pprint  # noqa
+import logging
+import uuid
+
+# Logger of the user controllers
+logger = logging.getLogger(__name__)
+
+
+class AsyncUserControl(AsyncController):
+    """Asynchronous counterpart of UserControl
+
+    Args:
+        AsyncController (AsyncController): Inherits the AsyncController parent
+            class
+    """
+
+    @staticmethod
+    async def _unique_email() -> bool:
+        """Check that the unique email index exists. Once it is seen, it is
+        not looked up again.
+
+        Returns:
+            bool: True if the database rejects duplicate emails
+        """
+        if not AsyncController.UNIQUE_EMAIL:
+            AsyncController.UNIQUE_EMAIL = IndexControl.is_unique(
+                await AsyncController.USER_COL.index_information(), "email"
+            )
+            if not AsyncController.UNIQUE_EMAIL:
+                logger.warning(
+                    "The unique email index is missing, registrations "
+                    + "check for the email first"
+                )
+        return AsyncController.UNIQUE_EMAIL
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def register_user(
+        first_name: str,
+        last_name: str,
+        email: str,
+        password: str
+    ) -> DictObj:
+        """Method that handles registering a user to the system
+
+        Args:
+            first_name (str): First name of the new user
+            last_name (str): Last name of the new user
+            email (str): Email of the new user
+            password (str): Password of the new user
+
+        Returns:
+            DictObj: User object
+        """
+
+        # Prep data to be inserted
+        data = {
+            "_id": uuid.uuid4().hex,
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email.lower(),
+            "password": await AsyncController.PASSWORD_HASHER.hash_async(
+                password
+            ),
+        }
+
+        # Without the unique email index, check for the email first rather
+        # than let a duplicate in
+        if not await AsyncUserControl._unique_email() and (
+            await AsyncController.USER_COL.find_one(
+                {"email": data["email"]}, {"_id": 1}
+            )
+        ):
+            return AsyncController.error(
+                "You have registered or is already authorized"
+            )
+
+        # Insert user into the database and return success, the unique
+        # email index rejects the given information if it is in the system
+        try:
+            await AsyncController.USER_COL.insert_one(data)
+        except DuplicateKeyError:
+            return AsyncController.error(
+                "You have registered or is already authorized"
+            )
+        return AsyncController.success("Registration successful!")
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def login(email: str, password: str) -> Union[User, DictObj]:
+        """Method that returns the user object based on the given user and pass
+
+        Args:
+            email (str): Email of the user trying to login
+            password (str): Password attempt
+
+        Returns:
+            Union[User, DictObj]: Returns the user object if successful or an
+                error message if not
+        """
+
+        # Get the fields of the user model based on the given email
+        user = await AsyncController.USER_COL.find_one(
+            {"email": email.lower()}, User.PROJECTION
+        )
+
+        # Check the password attempt against the stored hash
+        if user is None:
+            return AsyncController.error("Incorrect email or password")
+        valid, rehashed = await AsyncController.PASSWORD_HASHER.verify_async(
+            password, user["password"]
+        )
+        if not valid:
+            return AsyncController.error("Incorrect email or password")
+
+        # Migrate outdated hashes while the plain password is known
+        if rehashed is not None:
+            await AsyncController.USER_COL.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": rehashed}},
+            )
+            user["password"] = rehashed
+
+        # Return user content
+        return AsyncController.success(User(**user))
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def get_user(id: str) -> DictObj:
+        """Get a user based on their ID
+
+        Args:
+            id (str): ID of the user to search
+
+        Returns:
+            DictObj: A response that contains the user's info in dictionary
+                format
+        """
+
+        # Get the results from the query
+        user = await AsyncController.USER_COL.find_one({"_id": id})
+
+        # If no user was found, send an error
+        if user is None:
+            return AsyncController.error("User not found")
+
+        # Return results based on types of representation
+        return AsyncController.success(User(**user))
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def get_users(ids: List[str]) -> DictObj:
+        """Get a list of users that the given IDs are pertaining to
+
+        Args:
+            ids (List[str]): List of users to find
+
+        Returns:
+            DictObj: Return a list of user object based on the list of users
+        """
+
+        # Get all users that are in the user collection and the ID list
+        cursor = AsyncController.USER_COL.find({"_id": {"$in": ids}})
+        users = [User(**i) async for i in cursor]
+
+        # Return result
+        return AsyncController.success(users)
+
+    @staticmethod
+    async def is_token_revoked(*jtis: str) -> bool:
+        """Check if any of the given JTIs is in the blacklist
+
+        Args:
+            *jtis (str): JTIs of the tokens to check
+
+        Returns:
+            bool: True if a token is blacklisted, False if not
+        """
+
+        # Answer from the revocation cache shared with the sync application
+        # if it is enabled
+        if AsyncController.CONFIG.revocation_cache.enabled:
+            cache = AsyncController.REVOCATION_CACHE
+            return await cache.is_revoked_async(*jtis)
+
+        # Check every token in a single lookup
+        query = await AsyncController.BLACKLIST_COL.find_one(
+            revoked_query(jtis), {"_id": 1}
+        )
+
+        # Return true if one is, false if not
+        return query is not None
+
+    @staticmethod
+    @AsyncController.return_dict_obj
+    async def handle_jwt_blacklisting(refresh: str, access: str) -> DictObj:
+        """Handles the blacklisting of JWT tokens
+
+        Needs to be awaited within a Flask application context so that the
+        tokens are decoded with the application's JWT settings.
+
+        Args:
+            refresh (str): Refresh JWT information to trash
+            access (str): Access JWT information to trash
+
+        Returns:
+            DictObj: Result of the blacklist
+        """
+
+        # Keep only the JTI, type and expiry of each token
+        entries = [
+            revocation(decode_verified(token, AsyncController.CLAIMS_CACHE))
+            for token in [refresh, access]
+        ]
+
+        # Place tokens to blacklist collection, where they expire along
+        # with the tokens. Tokens that were already revoked are skipped
+        try:
+            await AsyncController.BLACKLIST_COL.bulk_write(
+                revocation_writes(entries), ordered=False
+            )
+        except BulkWriteError as e:
+            if not only_duplicates(e):
+                raise
+
+        # Revoke the tokens in this worker without waiting for the next poll
+        for entry in entries:
+            AsyncController.REVOCATION_CACHE.add(
+                entry["jti"], entry["expires_at"]
+            )
+
+        return AsyncController.success("Signed out")
@@ -0,0 +1,238 @@
+# Imports
+from pymongo.errors import OperationFailure, PyMongoError
+from pymongo import IndexModel, ASCENDING
+from pymongo.collection import Collection
+from util.dict_obj import DictObj
+from ._base import Controller
+from typing import Dict, List
+from pprint import pprint  # noqa
+import logging
+
+# Logger of the index provisioning
+logger = logging.getLogger(__name__)
+
+
+class IndexControl(Controller):
+    """Class that declares and provisions the indexes of every collection
+
+    Args:
+        Controller (Controller): Inherits the Controller parent class
+    """
+
+    # Required indexes per collection
+    INDEXES: Dict[str, List[IndexModel]] = {
+        "users": [
+            IndexModel([("email", ASCENDING)], name="email", unique=True),
+        ],
+        "instructionGroups": [
+            IndexModel(
+                [("owner", ASCENDING), ("_id", ASCENDING)], name="owner__id"
+            ),
+        ],
+        "checkpoints": [
+            IndexModel(
+                [("ig_id", ASCENDING), ("user_id", ASCENDING)],
+                name="ig_id_user_id",
+                unique=True,
+            ),
+        ],
+        "jwtBlacklist": [
+            IndexModel(
+                [("jti", ASCENDING)], name="jti", unique=True, sparse=True
+            ),
+            IndexModel(
+                [("expires_at", ASCENDING)],
+                name="expires_at_ttl",
+                expireAfterSeconds=0,
+            ),
+            IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+        ],
+    }
+
+    # Index options that are compared when looking for drift
+    COMPARED_OPTIONS = ["key", "unique", "expireAfterSeconds"]
+
+    @staticmethod
+    def _normalize(spec: dict) -> dict:
+        """Reduce an index specification to the options that matter
+
+        Args:
+            spec (dict): Index specification from a model or from the server
+
+        Returns:
+            dict: Comparable representation of the index
+        """
+
+        # Keep the compared options only and make the key order comparable
+        normal = {
+            k: v for k, v in spec.items() if k in IndexControl.COMPARED_OPTIONS
+        }
+        normal["key"] = [(k, int(v)) for k, v in dict(normal["key"]).items()]
+        normal["unique"] = bool(normal.get("unique", False))
+        return normal
+
+    @staticmethod
+    def _collection_drift(col: Collection, models: List[IndexModel]) -> dict:
+        """Compare the declared indexes of a collection with the live ones
+
+        Args:
+            col (Collection): Collection to inspect
+            models (List[IndexModel]): Declared indexes of the collection
+
+        Returns:
+            dict: Missing, conflicting and undeclared index names
+        """
+
+        # Get the live indexes of the collection
+        live = col.index_information()
+
+        # Compare each declared index with its live counterpart
+        drift = {"missing": [], "conflicting": [], "undeclared": []}
+        for model in models:
+            name = model.document["name"]
+            if name not in live:
+                drift["missing"].append(name)
+            elif IndexControl._normalize(
+                model.document
+            ) != IndexControl._normalize(live[name]):
+                drift["conflicting"].append(name)
+
+        # Report live indexes that are not declared
+        declared = [model.document["name"] for model in models]
+        drift["undeclared"] = [
+            name for name in live if name != "_id_" and name not in declared
+        ]
+
+        # Return the drift of the collection
+        return drift
+
+    @staticmethod
+    def is_unique(live: dict, name: str) -> bool:
+        """Check that a live index exists and is unique
+
+        Args:
+            live (dict): Live indexes of a collection
+            name (str): Name of the index
+
+        Returns:
+            bool: True if the index exists and is unique
+        """
+        return bool(live.get(name, {}).get("unique", False))
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def get_duplicate_emails() -> DictObj:
+        """Find the users whose emails only differ in case, which keep the
+        unique email index from being built and must be merged or removed
+        before it is applied
+
+        Returns:
+            DictObj: Lower-cased emails with the IDs of their users
+        """
+
+        # Group the users by their lower-cased email
+        duplicates = Controller.USER_COL.aggregate(
+            [
+                {
+                    "$group": {
+                        "_id": {"$toLower": "$email"},
+                        "users": {"$push": "$_id"},
+                        "count": {"$sum": 1},
+                    }
+                },
+                {"$match": {"count": {"$gt": 1}}},
+            ]
+        )
+
+        # Return the emails with the IDs of their users
+        return Controller.success(
+            {doc["_id"]: doc["users"] for doc in duplicates}
+        )
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def get_index_drift() -> DictObj:
+        """Report the differences between declared and live indexes
+
+        Returns:
+            DictObj: Drift of every collection
+        """
+
+        # Check every declared collection
+        drift = {
+            name: IndexControl._collection_drift(Controller.DB[name], models)
+            for name, models in IndexControl.INDEXES.items()
+        }
+
+        # Return the drift
+        return Controller.success(drift)
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def ensure_indexes() -> DictObj:
+        """Create every missing declared index
+
+        Creating an index that already exists with the same options is a
+        no-op, so this can be run at every startup. Conflicting indexes are
+        reported rather than dropped.
+
+        Returns:
+            DictObj: Created indexes, failures and the remaining drift
+        """
+
+        # Create the missing indexes of every collection
+        created, failed = {}, {}
+        for name, models in IndexControl.INDEXES.items():
+            col = Controller.DB[name]
+            drift = IndexControl._collection_drift(col, models)
+            missing = [
+                m for m in models if m.document["name"] in drift["missing"]
+            ]
+            if not missing:
+                continue
+            try:
+                created[name] = col.create_indexes(missing)
+            except OperationFailure as e:
+                failed[name] = str(e)
+
+        # Return the result along with the drift that is left
+        drift = IndexControl.get_index_drift().message
+        status = Controller.error if failed else Controller.success
+        return status(
+            "Indexes failed to apply" if failed else "Indexes applied",
+            created=created,
+            failed=failed,
+            drift=drift,
+        )
+
+    @staticmethod
+    def provision() -> None:
+        """Apply the declared indexes when an application starts and check
+        the unique email index that registration relies on. Provisioning
+        is skipped if the database cannot be reached.
+
+        Raises:
+            RuntimeError: If the unique email index is missing, as the
+                application must not serve without it
+        """
+
+        # Apply the indexes and read back those of the users
+        try:
+            result = IndexControl.ensure_indexes()
+            if result.status != "success":
+                logger.warning(
+                    "Index provisioning incomplete", extra={"result": result}
+                )
+            live = Controller.USER_COL.index_information()
+        except PyMongoError as e:
+            logger.warning(f"Index provisioning skipped: {e}")
+            return
+
+        # Refuse to serve without the unique email index, as registration
+        # relies on it to reject known emails
+        Controller.UNIQUE_EMAIL = IndexControl.is_unique(live, "email")
+        if not Controller.UNIQUE_EMAIL:
+            raise RuntimeError(
+                "The unique email index is missing, remove the duplicates "
+                + "listed by `flask --app main.py duplicate-emails` first"
+            )
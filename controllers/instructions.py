@@ -1,15 +1,103 @@
 # Imports
 from models.instruction_group import InstructionGroup
+from util.pagination import CursorPage, decode_cursor, clamp_page_size
 from util.dict_obj import DictObj
+from util.hash import content_hash
 from ._base import Controller
-from typing import Any
+from pymongo.errors import BulkWriteError
+from typing import Any, List, Optional, Tuple
 from pprint import pprint  # noqa
+import logging
+import pymongo
 import uuid
+import re
+
+# Logger of the instruction controllers
+logger = logging.getLogger(__name__)
 
 
 class InstructionControl(Controller):
     """Class that demonstrates the control logic of Instruction(s) model(s)"""
 
+    # Format of the instruction group IDs
+    GROUP_ID = re.compile(r"^[0-9a-f]{32}$")
+
+    @staticmethod
+    def is_step(step: Any) -> bool:
+        """Check that a step has the structure of the instruction group's
+        steps
+
+        Args:
+            step (Any): Step to check
+
+        Returns:
+            bool: True if the step has a name and a description
+        """
+        return (
+            isinstance(step, dict) and "name" in step and "description" in step
+        )
+
+    # Fields of a checkpoint that are read back
+    CHECKPOINT_PROJECTION = {"_id": 0, "position": 1}
+
+    @staticmethod
+    def _new_group(name: str, _id: str) -> dict:
+        """Make the document of a new instruction group
+
+        Args:
+            name (str): Name of the new instruction group
+            _id (str): ID of the owner of the new instruction group
+
+        Returns:
+            dict: Document to insert
+        """
+        return {
+            "_id": uuid.uuid4().hex,
+            "name": name,
+            "owner": _id,
+            "steps": [
+                {
+                    "name": f"{name} Step #1",
+                    "description": "Lorem Ipsum Dolor Sit Amet",
+                }
+            ],
+            "version": 0,
+        }
+
+    @staticmethod
+    def _group_result(
+        group: Optional[dict], projection: Optional[dict]
+    ) -> dict:
+        """Make the result of a read of an instruction group
+
+        Args:
+            group (Optional[dict]): Document that was read, if any
+            projection (Optional[dict]): Projection of the read, None for
+                the full view
+
+        Returns:
+            dict: An InstructionGroup for the full view or the projected
+                document otherwise, or an empty object if nothing was found
+        """
+        if not group:
+            return Controller.success({})
+        if projection is not None:
+            return Controller.success(group)
+        return Controller.success(InstructionGroup(**group))
+
+    @staticmethod
+    def _checkpoint_query(id: str, _id: str) -> dict:
+        """Make the filter of a user's checkpoint
+
+        Args:
+            id (str): ID of the instruction group
+            _id (str): ID of the user
+
+        Returns:
+            dict: Filter of the checkpoint
+        """
+        return {"ig_id": id, "user_id": _id}
+
     @staticmethod
     @Controller.return_dict_obj
     def create_instruction_group(name: str, _id: str) -> DictObj:
@@ -24,62 +112,341 @@ class InstructionControl(Controller):
         """
 
         # Prep data to be inserted
-        insert = {}
-        insert["_id"] = str(uuid.uuid4().hex)
-        insert["name"] = name
-        insert["owner"] = _id
-        insert["steps"] = [
-            {
-                "name": f"{name} Step #1",
-                "description": "Lorem Ipsum Dolor Sit Amet",
-            }
-        ]
-        print(insert)
+        insert = InstructionControl._new_group(name, _id)
 
-        # Insert into the collection
+        # Insert into the collection and drop the cached amount of groups
         Controller.INSTRUCTION_GROUP_COL.insert_one(insert)
+        Controller.COUNT_CACHE.delete(_id)
+        logger.debug(
+            "Instruction group created",
+            extra={"group_id": insert["_id"], "owner": _id},
+        )
 
         # Return a statement
         return Controller.success("Instruction group created")
 
     @staticmethod
     @Controller.return_dict_obj
-    def get_instruction_group(id: str) -> DictObj:
+    def import_instruction_groups(_id: str, groups: List[dict]) -> DictObj:
+        """Insert a batch of instruction groups owned by the user in a single
+        unordered insert
+
+        Args:
+            _id (str): ID of the owner of the instruction groups
+            groups (List[dict]): Validated groups with a name, steps and
+                optionally an ID. Imported groups start at version 0
+
+        Returns:
+            DictObj: Amount of inserted groups and the index and message of
+                every group that failed
+        """
+
+        # Prep data to be inserted, every group is owned by the user
+        docs = [
+            {
+                "_id": group.get("_id") or uuid.uuid4().hex,
+                "name": group["name"],
+                "owner": _id,
+                "steps": group["steps"],
+                "version": 0,
+            }
+            for group in groups
+        ]
+
+        # Insert every group, the failures of some do not stop the others
+        errors = []
+        try:
+            Controller.INSTRUCTION_GROUP_COL.insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            if e.details.get("writeConcernErrors"):
+                raise
+            errors = [
+                {
+                    "index": error["index"],
+                    "message": "Instruction group already exists"
+                    if error["code"] == 11000
+                    else str(error["errmsg"]),
+                }
+                for error in e.details.get("writeErrors", [])
+            ]
+        Controller.COUNT_CACHE.delete(_id)
+
+        # Return the amount of inserted groups and the failures
+        return Controller.success(
+            "Instruction groups imported",
+            inserted=len(docs) - len(errors),
+            errors=errors,
+        )
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def get_instruction_group(
+        id: str, view: str = "full", fields: List[str] = []
+    ) -> DictObj:
         """Controller to handle the search of an instruction group
 
         Args:
             id (str): ID of the instruction group to return
+            view (str, optional): Name of the view to return. Defaults to
+                "full".
+            fields (List[str], optional): Fields to return instead of a view.
+                Defaults to [].
 
         Returns:
-            DictObj: Result of the search
+            DictObj: Result of the search, an InstructionGroup for the full
+                view or the projected document otherwise
         """
 
-        # Get the instruction group information
-        group = Controller.INSTRUCTION_GROUP_COL.find_one({"_id": id})
+        # Get the projection of the requested view
+        try:
+            projection = InstructionGroup.projection(view, fields)
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Read the full instruction group through the cache
+        cached = projection is None and Controller.CONFIG.group_cache.enabled
+        group, generation = (
+            Controller.GROUP_CACHE.get(id) if cached else (None, None)
+        )
+        if group is None:
+            group = Controller.INSTRUCTION_GROUP_COL.find_one(
+                {"_id": id}, projection
+            )
+            if group and cached:
+                Controller.GROUP_CACHE.set(id, group, generation)
 
         # Return the instruction group
-        if not group:
-            return Controller.success({})
-        return Controller.success(InstructionGroup(**group))
+        return InstructionControl._group_result(group, projection)
+
+    @staticmethod
+    def _page_query(
+        _id: str, page_size: int, cursor: str, stream: bool
+    ) -> Tuple[dict, int]:
+        """Build the query and page size of a page of a user's instruction
+        groups
+
+        Args:
+            _id (str): ID of the owner of the instruction groups
+            page_size (int): Requested page size, 0 for the default
+            cursor (str): Continuation token of the previous page
+            stream (bool): Is the page streamed? Streamed pages are never
+                held in memory and may be larger
+
+        Raises:
+            ValueError: If the cursor is malformed
+
+        Returns:
+            Tuple[dict, int]: Query of the page and the page size to use
+        """
+
+        # Get the page size and where to continue from
+        page_size = clamp_page_size(
+            page_size,
+            Controller.CONFIG.pagination.default_page_size,
+            Controller.CONFIG.pagination.max_stream_page_size
+            if stream
+            else Controller.CONFIG.pagination.max_page_size,
+        )
+        after = decode_cursor(cursor)
+
+        # Continue after the last group of the previous page
+        query = {"owner": _id}
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        return query, page_size
 
     @staticmethod
     @Controller.return_dict_obj
-    def get_users_instruction_groups(_id: str) -> DictObj:
-        """Controller to get the user's instruction groups
+    def get_users_instruction_groups(
+        _id: str,
+        page_size: int = 0,
+        cursor: str = "",
+        include_total: bool = False,
+        view: str = "full",
+        fields: List[str] = [],
+        stream: bool = False,
+    ) -> DictObj:
+        """Controller to get a page of the user's instruction groups
 
         Args:
             _id (str): ID of the owner requesting their instruction groups
+            page_size (int, optional): Page size of result, 0 for the
+                default. Defaults to 0.
+            cursor (str, optional): Continuation token of the previous page,
+                empty for the first page. Defaults to "".
+            include_total (bool, optional): Should the amount of the user's
+                instruction groups be returned? Defaults to False.
+            view (str, optional): Name of the view to return. Defaults to
+                "full".
+            fields (List[str], optional): Fields to return instead of a view.
+                Defaults to [].
+            stream (bool, optional): Should the page be returned as a lazy
+                CursorPage to be streamed, which sets its next page's token
+                once consumed? Defaults to False.
 
         Returns:
-            DictObj: Result of the query
+            DictObj: Result of the query along with the next page's token,
+                InstructionGroups for the full view or the projected
+                documents otherwise
+        """
+
+        # Get the projection of the requested view
+        try:
+            projection = InstructionGroup.projection(view, fields)
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Get the query and size of the page
+        try:
+            query, page_size = InstructionControl._page_query(
+                _id, page_size, cursor, stream
+            )
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Count only if requested
+        extra = {}
+        if include_total:
+            extra["total"] = InstructionControl._owner_count(_id)
+
+        # Get one more group than requested to know if there is a next page
+        page = CursorPage(
+            Controller.INSTRUCTION_GROUP_COL.find(query, projection)
+            .sort("_id", pymongo.ASCENDING)
+            .limit(page_size + 1),
+            page_size,
+            None if projection else lambda item: InstructionGroup(**item),
+        )
+
+        # Leave the page to be consumed by the caller when streaming
+        if stream:
+            return Controller.success(page, **extra)
+
+        # Return list of owned instruction groups and the next page's token
+        groups = list(page)
+        return Controller.success(
+            groups, next_cursor=page.next_cursor, **extra
+        )
+
+    @staticmethod
+    def _owner_count(_id: str) -> int:
+        """Get the amount of a user's instruction groups through the count
+        cache. It is dropped whenever the user creates,
+        imports or deletes groups, and other workers of an in-process cache
+        may lag behind for up to group_cache.max_stale seconds.
+
+        Args:
+            _id (str): ID of the owner
+
+        Returns:
+            int: Amount of the user's instruction groups
         """
 
-        # Get the user's instruction groups
-        groups = Controller.INSTRUCTION_GROUP_COL.find({"owner": _id})
-        groups = [InstructionGroup(**item) for item in groups]
+        # Count with the owner index on a miss
+        cached = Controller.CONFIG.group_cache.enabled
+        total, generation = (
+            Controller.COUNT_CACHE.get(_id) if cached else (None, None)
+        )
+        if total is None:
+            total = Controller.INSTRUCTION_GROUP_COL.count_documents(
+                {"owner": _id}
+            )
+            if cached:
+                Controller.COUNT_CACHE.set(_id, total, generation)
 
-        # Return list of owned instruction groups
-        return Controller.success(groups)
+        # Return the amount
+        return total
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def get_users_instruction_groups_etag(
+        _id: str,
+        page_size: int = 0,
+        cursor: str = "",
+        include_total: bool = False,
+        view: str = "full",
+        fields: List[str] = [],
+        stream: bool = False,
+    ) -> DictObj:
+        """Get the entity tag of a page of the user's instruction groups
+        from the IDs and versions of its groups only, without loading them
+
+        Args:
+            _id (str): ID of the owner requesting their instruction groups
+            page_size (int, optional): Page size of result, 0 for the
+                default. Defaults to 0.
+            cursor (str, optional): Continuation token of the previous page,
+                empty for the first page. Defaults to "".
+            include_total (bool, optional): Is the amount of the user's
+                instruction groups returned? Defaults to False.
+            view (str, optional): Name of the view to return. Defaults to
+                "full".
+            fields (List[str], optional): Fields to return instead of a view.
+                Defaults to [].
+            stream (bool, optional): Is the page streamed? Defaults to False.
+
+        Returns:
+            DictObj: Entity tag of the page
+        """
+
+        # Check the view and get the query and size of the page
+        try:
+            InstructionGroup.projection(view, fields)
+            query, page_size = InstructionControl._page_query(
+                _id, page_size, cursor, stream
+            )
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Every write bumps the version of a group, so the IDs and versions
+        # of the page identify its content
+        versions = [
+            [item["_id"], item.get("version")]
+            for item in Controller.INSTRUCTION_GROUP_COL.find(
+                query, {"version": 1}
+            )
+            .sort("_id", pymongo.ASCENDING)
+            .limit(page_size + 1)
+        ]
+
+        # Hash the versions along with what shapes the response
+        parts = [versions, view, sorted(fields)]
+        if include_total:
+            parts.append(InstructionControl._owner_count(_id))
+        return Controller.success(content_hash(parts))
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def export_instruction_groups(
+        _id: str, view: str = "full", fields: List[str] = []
+    ) -> DictObj:
+        """Get every instruction group of a user as a cursor to be streamed,
+        read from the database in batches
+
+        Args:
+            _id (str): ID of the owner of the instruction groups
+            view (str, optional): Name of the view to return. Defaults to
+                "full".
+            fields (List[str], optional): Fields to return instead of a view.
+                Defaults to [].
+
+        Returns:
+            DictObj: Cursor over the projected documents ordered by ID
+        """
+
+        # Get the projection of the requested view
+        try:
+            projection = InstructionGroup.projection(view, fields)
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Leave the cursor to be consumed by the caller
+        cursor = (
+            Controller.INSTRUCTION_GROUP_COL.find({"owner": _id}, projection)
+            .sort("_id", pymongo.ASCENDING)
+            .batch_size(Controller.CONFIG.bulk.batch_size)
+        )
+        return Controller.success(cursor)
 
     @staticmethod
     @Controller.return_dict_obj
@@ -94,8 +461,14 @@ class InstructionControl(Controller):
             DictObj: Indexed positioning of the user's checkpoint
         """
 
-        # Get the user's checkpoint information
-        pos = Controller.CHECKPOINT_COL.find_one({"ig_id": id, "user_id": _id})
+        # Get the user's checkpoint information, reading through the
+        # write-behind buffer first
+        pos = Controller.CHECKPOINT_BUFFER.get((id, _id))
+        if pos is None:
+            pos = Controller.CHECKPOINT_COL.find_one(
+                InstructionControl._checkpoint_query(id, _id),
+                InstructionControl.CHECKPOINT_PROJECTION,
+            )
 
         # Return the result
         if pos is None:
@@ -103,48 +476,294 @@ class InstructionControl(Controller):
         else:
             return Controller.success(pos["position"])
 
+    @staticmethod
+    def _write_failure(id: str, _id: str, version: Optional[int]) -> dict:
+        """Explain why a versioned write to an instruction group matched
+        nothing. Only called after a failed write, so successful writes
+        stay a single round trip.
+
+        Args:
+            id (str): ID of the instruction group
+            _id (str): ID of the user requesting the write
+            version (Optional[int]): Version the write was based on
+
+        Returns:
+            dict: Error message of the failure
+        """
+
+        # Get the ownership and version of the instruction group
+        res = Controller.INSTRUCTION_GROUP_COL.find_one(
+            {"_id": id}, {"owner": 1, "version": 1}
+        )
+        if not res or res["owner"] != _id:
+            return Controller.error("You cannot edit this instruction group")
+
+        # Report a conflict if the instruction group was changed meanwhile
+        current = res.get("version", 0)
+        if version is not None and version != current:
+            return Controller.error(
+                "The instruction group was modified by someone else",
+                conflict=True,
+                version=current,
+            )
+
+        # Otherwise a step index was out of range
+        return Controller.error("Step index out of range")
+
+    @staticmethod
+    def _version_filter(id: str, _id: str, version: Optional[int]) -> dict:
+        """Returns the filter of a write to an owned instruction group
+
+        Args:
+            id (str): ID of the instruction group
+            _id (str): ID of the user requesting the write
+            version (Optional[int]): Version the write is based on, None to
+                skip the version check
+
+        Returns:
+            dict: Filter of the write
+        """
+
+        # Match the owned instruction group
+        query = {"_id": id, "owner": _id}
+
+        # Groups created before versioning have no version field
+        if version == 0:
+            query["version"] = {"$in": [0, None]}
+        elif version is not None:
+            query["version"] = version
+
+        # Return the filter
+        return query
+
     @staticmethod
     @Controller.return_dict_obj
-    def update_instruction_group(id: str, _id: str, **kwargs: Any) -> DictObj:
+    def update_instruction_group(
+        id: str, _id: str, version: Optional[int] = None, **kwargs: Any
+    ) -> DictObj:
         """Controller to update an instruction group
 
         Args:
             id (str): ID of the instruction group to update
             _id (str): ID of the user requesting the update
+            version (Optional[int], optional): Version the update is based
+                on, None to skip the version check. Defaults to None.
 
         Returns:
-            DictObj: Result of the operation
+            DictObj: Result of the operation along with the new version
         """
 
-        # Check if the update request is possible with the given id and user id
-        res = Controller.INSTRUCTION_GROUP_COL.find_one(
-            {"_id": id, "owner": _id}
+        # Build the update of the given fields
+        try:
+            update = InstructionControl._group_update(kwargs)
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Update the instruction group if the user owns it and it is still
+        # at the given version
+        res = Controller.INSTRUCTION_GROUP_COL.find_one_and_update(
+            InstructionControl._version_filter(id, _id, version),
+            update,
+            projection={"version": 1},
+            return_document=pymongo.ReturnDocument.AFTER,
         )
-        if not res:
-            return Controller.error("You cannot edit this instruction group")
+        if res is None:
+            return InstructionControl._write_failure(id, _id, version)
+        Controller.GROUP_CACHE.delete(id)
+
+        # Return result
+        return Controller.success(
+            "Update is a success", version=res["version"]
+        )
+
+    @staticmethod
+    def _group_update(kwargs: dict) -> dict:
+        """Build the update of an instruction group's fields, which also
+        bumps its version
+
+        Args:
+            kwargs (dict): Fields to update, empty ones are left as they are
+
+        Raises:
+            ValueError: If a step does not have the proper structure
+
+        Returns:
+            dict: Update document
+        """
 
         # Ensure that any empty kwargs are not sent for updating
-        copy = kwargs.copy()
-        for i in copy:
-            if not kwargs[i]:
-                del kwargs[i]
+        fields = {k: v for k, v in kwargs.items() if v}
 
-        # If steps is in the remaining kwargs, ensure that it has the proper
+        # If steps is in the remaining fields, ensure that it has the proper
         # structure
-        if "steps" in kwargs:
-            for i in kwargs["steps"]:
-                if "name" not in i or "description" not in i:
-                    return Controller.error(
+        if "steps" in fields:
+            for i in fields["steps"]:
+                if not InstructionControl.is_step(i):
+                    raise ValueError(
                         "Improper update of the instruction group"
                     )
 
-        # If all else is good, update the instruction group
-        Controller.INSTRUCTION_GROUP_COL.update_one(
-            {"_id": id}, {"$set": kwargs}
+        # Return the update
+        update = {"$inc": {"version": 1}}
+        if fields:
+            update["$set"] = fields
+        return update
+
+    @staticmethod
+    def _patch(
+        id: str, _id: str, version: int, operations: List[dict]
+    ) -> Tuple[dict, List[dict]]:
+        """Build the filter and update pipeline of a step patch, which also
+        bumps the version of the instruction group
+
+        Args:
+            id (str): ID of the instruction group to patch
+            _id (str): ID of the user requesting the patch
+            version (int): Version the patch is based on
+            operations (List[dict]): Operations to apply in order
+
+        Raises:
+            ValueError: If there are no operations or one is malformed
+
+        Returns:
+            Tuple[dict, List[dict]]: Filter and pipeline of the update
+        """
+
+        # Translate the operations into pipeline stages
+        if not operations:
+            raise ValueError("No patch operations given")
+        stages, min_len = InstructionControl._step_pipeline(operations)
+
+        # Require every index of the operations to exist
+        query = InstructionControl._version_filter(id, _id, version)
+        if min_len > 0:
+            query[f"steps.{min_len - 1}"] = {"$exists": True}
+
+        # Apply the operations and bump the version
+        stages.append(
+            {"$set": {"version": {"$add": [{"$ifNull": ["$version", 0]}, 1]}}}
+        )
+        return query, stages
+
+    @staticmethod
+    def _step_pipeline(operations: List[dict]) -> Tuple[List[dict], int]:
+        """Translate step patch operations into update pipeline stages
+
+        Args:
+            operations (List[dict]): Operations to translate, each with an
+                op of insert, replace, move or delete, an index, a step for
+                insert and replace, and a destination index for move
+
+        Raises:
+            ValueError: If an operation is malformed
+
+        Returns:
+            Tuple[List[dict], int]: Pipeline stages and the minimum amount of
+                steps the instruction group needs for every index to exist
+        """
+
+        def head(i: int) -> dict:
+            """Steps before the index"""
+            return {"$slice": ["$steps", i]}
+
+        def tail(i: int) -> dict:
+            """Steps from the index onwards"""
+            return {
+                "$slice": ["$steps", i, {"$max": [{"$size": "$steps"}, 1]}]
+            }
+
+        def splice(i: int, skip: int, items: List[Any]) -> dict:
+            """Steps with the given amount removed and items put at the
+            index"""
+            return {"$concatArrays": [head(i), items, tail(i + skip)]}
+
+        # Translate every operation, tracking the change in length so the
+        # indexes can be checked against the original amount of steps
+        stages, min_len, delta = [], 0, 0
+        for op in operations:
+            kind, index = op.get("op"), op.get("index")
+            if not isinstance(index, int) or index < 0:
+                raise ValueError("Invalid step index")
+
+            # Check the step of insertions and replacements
+            if kind in ["insert", "replace"]:
+                step = op.get("step")
+                if not InstructionControl.is_step(step):
+                    raise ValueError("Improper step in patch operation")
+                step = {"$literal": step}
+
+            # Build the stage of the operation
+            if kind == "insert":
+                min_len = max(min_len, index - delta)
+                stages.append({"$set": {"steps": splice(index, 0, [step])}})
+                delta += 1
+            elif kind == "replace":
+                min_len = max(min_len, index + 1 - delta)
+                stages.append({"$set": {"steps": splice(index, 1, [step])}})
+            elif kind == "delete":
+                min_len = max(min_len, index + 1 - delta)
+                stages.append({"$set": {"steps": splice(index, 1, [])}})
+                delta -= 1
+            elif kind == "move":
+                to = op.get("to")
+                if not isinstance(to, int) or to < 0:
+                    raise ValueError("Invalid step index")
+                min_len = max(min_len, max(index, to) + 1 - delta)
+                stages.append(
+                    {
+                        "$set": {
+                            "_moved": {"$arrayElemAt": ["$steps", index]},
+                            "steps": splice(index, 1, []),
+                        }
+                    }
+                )
+                stages.append({"$set": {"steps": splice(to, 0, ["$_moved"])}})
+                stages.append({"$unset": "_moved"})
+            else:
+                raise ValueError(f"Unknown patch operation {kind}")
+
+        # Return the stages and the minimum amount of steps
+        return stages, min_len
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def patch_instruction_group(
+        id: str, _id: str, version: int, operations: List[dict]
+    ) -> DictObj:
+        """Controller to apply step-level patch operations to an instruction
+        group in a single round trip
+
+        Args:
+            id (str): ID of the instruction group to patch
+            _id (str): ID of the user requesting the patch
+            version (int): Version the patch is based on
+            operations (List[dict]): Operations to apply in order
+
+        Returns:
+            DictObj: Result of the operation along with the new version
+        """
+
+        # Build the filter and pipeline of the operations
+        try:
+            query, stages = InstructionControl._patch(
+                id, _id, version, operations
+            )
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Apply the operations if the user owns the group at that version
+        res = Controller.INSTRUCTION_GROUP_COL.find_one_and_update(
+            query,
+            stages,
+            projection={"version": 1},
+            return_document=pymongo.ReturnDocument.AFTER,
         )
+        if res is None:
+            return InstructionControl._write_failure(id, _id, version)
+        Controller.GROUP_CACHE.delete(id)
 
         # Return result
-        return Controller.success("Update is a success")
+        return Controller.success("Patch is a success", version=res["version"])
 
     @staticmethod
     @Controller.return_dict_obj
@@ -160,12 +779,15 @@ class InstructionControl(Controller):
             DictObj: Status of the update
         """
 
+        # Buffer the checkpoint to be written behind if enabled
+        query = InstructionControl._checkpoint_query(id, _id)
+        checkpoint = {**query, "position": pos}
+        if Controller.CONFIG.checkpoint_buffer.enabled:
+            Controller.CHECKPOINT_BUFFER.put((id, _id), query, checkpoint)
+            return Controller.success("Checkpoint saved")
+
         # Replace one and upsert to save checkpoint
-        Controller.CHECKPOINT_COL.replace_one(
-            {"ig_id": id, "user_id": _id},
-            {"ig_id": id, "user_id": _id, "position": pos},
-            upsert=True,
-        )
+        Controller.CHECKPOINT_COL.replace_one(query, checkpoint, upsert=True)
 
         # Send updated status
         return Controller.success("Checkpoint saved")
@@ -194,6 +816,8 @@ class InstructionControl(Controller):
 
         # If so, delete the instruction group
         Controller.INSTRUCTION_GROUP_COL.delete_one({"_id": id, "owner": _id})
+        Controller.GROUP_CACHE.delete(id)
+        Controller.COUNT_CACHE.delete(_id)
 
         # Return success message
         return Controller.success("Deletion complete")
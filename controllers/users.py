@@ -1,14 +1,27 @@
 # Imports
-from flask_jwt_extended import decode_token
+from util.jwt_cache import decode_verified
 from typing import List, Any, Union
 from util.dict_obj import DictObj
 from ._base import Controller
+from .indexes import IndexControl
+from util.revocation_cache import (
+    legacy_revocations,
+    only_duplicates,
+    revocation,
+    revocation_writes,
+    revoked_query,
+)
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 from models.user import User
-from util.hash import sha256
+from util.pagination import CursorPage, decode_cursor, clamp_page_size
 from pprint import pprint  # noqa
 import datetime
+import logging
+import pymongo
 import uuid
-import math
+
+# Logger of the user controllers
+logger = logging.getLogger(__name__)
 
 
 class UserControl(Controller):
@@ -18,6 +31,25 @@ class UserControl(Controller):
         Controller (Controller): Inherits the Controller parent class
     """
 
+    @staticmethod
+    def _unique_email() -> bool:
+        """Check that the unique email index exists. Once it is seen, it is
+        not looked up again.
+
+        Returns:
+            bool: True if the database rejects duplicate emails
+        """
+        if not Controller.UNIQUE_EMAIL:
+            Controller.UNIQUE_EMAIL = IndexControl.is_unique(
+                Controller.USER_COL.index_information(), "email"
+            )
+            if not Controller.UNIQUE_EMAIL:
+                logger.warning(
+                    "The unique email index is missing, registrations "
+                    + "check for the email first"
+                )
+        return Controller.UNIQUE_EMAIL
+
     @staticmethod
     @Controller.return_dict_obj
     def register_user(
@@ -39,29 +71,33 @@ class UserControl(Controller):
             DictObj: User object
         """
 
-        # Add user to the list and return success if the given
-        # information is not the system
-        query = {"email": email}
-        if Controller.USER_COL.find_one(query) is None:
-            # Prep data to be inserted
-            data = locals()
-            data["_id"] = uuid.uuid4().hex
-            data["email"] = data["email"].lower()
-            del data["query"]
-
-            # Hash and save the given password
-            password = sha256(password, Controller.DB_SPECS.spicer)
-            data["password"] = password
-
-            # Insert user into the database and return success
-            Controller.USER_COL.insert_one(data)
-            return Controller.success("Registration successful!")
+        # Prep data to be inserted
+        data = {
+            "_id": uuid.uuid4().hex,
+            "first_name": first_name,
+            "last_name": last_name,
+            "email": email.lower(),
+            "password": Controller.PASSWORD_HASHER.hash(password),
+        }
+
+        # Without the unique email index, check for the email first rather
+        # than let a duplicate in
+        if not UserControl._unique_email() and Controller.USER_COL.find_one(
+            {"email": data["email"]}, {"_id": 1}
+        ):
+            return Controller.error(
+                "You have registered or is already authorized"
+            )
 
-        # Return false if the given information exists
-        else:
+        # Insert user into the database and return success, the unique
+        # email index rejects the given information if it is in the system
+        try:
+            Controller.USER_COL.insert_one(data)
+        except DuplicateKeyError:
             return Controller.error(
                 "You have registered or is already authorized"
             )
+        return Controller.success("Registration successful!")
 
     @staticmethod
     @Controller.return_dict_obj
@@ -77,22 +113,30 @@ class UserControl(Controller):
                 error message if not
         """
 
-        # Hash and save the given password to kwargs
-        password = sha256(password, Controller.DB_SPECS.spicer)
-
-        # Get the user's information based on the given credentials
-        query = {"email": email, "password": password}
-        user = Controller.USER_COL.find_one(query)
+        # Get the fields of the user model based on the given email
+        user = Controller.USER_COL.find_one(
+            {"email": email.lower()}, User.PROJECTION
+        )
 
-        # Return with an error if no id was found
+        # Check the password attempt against the stored hash
         if user is None:
             return Controller.error("Incorrect email or password")
+        valid, rehashed = Controller.PASSWORD_HASHER.verify(
+            password, user["password"]
+        )
+        if not valid:
+            return Controller.error("Incorrect email or password")
 
-        # Get the user's id
-        id = user["_id"]
+        # Migrate outdated hashes while the plain password is known
+        if rehashed is not None:
+            Controller.USER_COL.update_one(
+                {"_id": user["_id"], "password": user["password"]},
+                {"$set": {"password": rehashed}},
+            )
+            user["password"] = rehashed
 
         # Return user content
-        return UserControl.get_user(id)
+        return Controller.success(User(**user))
 
     @staticmethod
     @Controller.return_dict_obj
@@ -141,46 +185,68 @@ class UserControl(Controller):
 
     @staticmethod
     @Controller.return_dict_obj
-    def get_all_users(page_size: int, page_index: int) -> DictObj:
-        """Get a list of users based on the page size and the index
+    def get_all_users(
+        page_size: int = 0,
+        cursor: str = "",
+        include_total: bool = False,
+        stream: bool = False,
+    ) -> DictObj:
+        """Get a page of users ordered by ID
 
         Args:
-            page_size (int): Page size of result
-            page_index (int): Index of the page
+            page_size (int, optional): Page size of result, 0 for the
+                default. Defaults to 0.
+            cursor (str, optional): Continuation token of the previous page,
+                empty for the first page. Defaults to "".
+            include_total (bool, optional): Should the estimated amount of
+                users be returned? Defaults to False.
+            stream (bool, optional): Should the page be returned as a lazy
+                CursorPage to be streamed, which sets its next page's token
+                once consumed? Defaults to False.
 
         Returns:
-            DictObj: Result of the search
+            DictObj: Result of the search along with the next page's token
         """
 
-        # Check if the page_size or page_index is negative
-        if page_size <= 0 or page_index < 0:
-            return Controller.error("Invalid pagination size or index")
-
-        # Get the total amount of pages based on pagination size
-        pages = math.ceil(
-            Controller.USER_COL.count_documents()
-            / page_size
+        # Get the page size and where to continue from, streamed pages are
+        # never held in memory and may be larger
+        page_size = clamp_page_size(
+            page_size,
+            Controller.CONFIG.pagination.default_page_size,
+            Controller.CONFIG.pagination.max_stream_page_size
+            if stream
+            else Controller.CONFIG.pagination.max_page_size,
         )
-
-        # Check if the page_index is outside the page range
-        if page_index >= pages:
-            return Controller.error("Pagination index out of bounds")
-
-        # Calculate skip value
-        skips = page_size * (page_index)
-
-        # Get the list of users based on the given page size and index
-        results = (
-            Controller.USER_COL.find()
-            .skip(skips)
-            .limit(page_size)
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            return Controller.error(str(e))
+
+        # Get the total from the collection's metadata if requested
+        extra = {}
+        if include_total:
+            extra["total"] = Controller.USER_COL.estimated_document_count()
+
+        # Get one more user than requested to know if there is a next page
+        # and turn each document into a User object
+        query = {} if after is None else {"_id": {"$gt": after}}
+        page = CursorPage(
+            Controller.USER_COL.find(query)
+            .sort("_id", pymongo.ASCENDING)
+            .limit(page_size + 1),
+            page_size,
+            lambda item: User(**item),
         )
 
-        # Turn each document into a Unit object
-        results = [User(**item) for item in list(results)]
+        # Leave the page to be consumed by the caller when streaming
+        if stream:
+            return Controller.success(page, **extra)
 
-        # Return the results and the page size
-        return Controller.success(results, pages=pages)
+        # Return the results and the next page's token
+        results = list(page)
+        return Controller.success(
+            results, next_cursor=page.next_cursor, **extra
+        )
 
     @staticmethod
     @Controller.return_dict_obj
@@ -223,23 +289,19 @@ class UserControl(Controller):
         if "id" in kwargs:
             del kwargs["id"]
 
-        # Check if the unit based on its id does exist
-        user = Controller.USER_COL.find_one({"_id": id})
+        # Update the fields and the full name computed from the stored and
+        # given names at once, with the given values taken literally
+        fields = {k: {"$literal": v} for k, v in kwargs.items()}
+        user = Controller.USER_COL.find_one_and_update(
+            {"_id": id},
+            ([{"$set": fields}] if fields else [])
+            + [{"$set": {"full_name": User.FULL_NAME}}],
+            {"_id": 1},
+        )
+
+        # Return an error if the user does not exist, success if else
         if user is None:
             return Controller.error("User does not exist")
-        user = User(**user)
-
-        # Update full_name if any of the names is different
-        if "first_name" in kwargs:
-            user.info.first_name = kwargs["first_name"]
-        if "middle_initial" in kwargs:
-            user.info.middle_initial = kwargs["middle_initial"]
-        if "last_name" in kwargs:
-            user.info.last_name = kwargs["last_name"]
-        kwargs["full_name"] = user.get_fullname()
-
-        # Update the document and return a success message
-        Controller.USER_COL.update_one({"_id": id}, {"$set": kwargs})
         return Controller.success("User updated")
 
     @staticmethod
@@ -256,7 +318,7 @@ class UserControl(Controller):
         """
 
         # Hash password
-        password = sha256(password, Controller.DB_SPECS.spicer)
+        password = Controller.PASSWORD_HASHER.hash(password)
 
         # Update the user
         Controller.USER_COL.update_one(
@@ -270,6 +332,29 @@ class UserControl(Controller):
         # Return message
         return Controller.success("Password updated")
 
+    @staticmethod
+    def is_token_revoked(*jtis: str) -> bool:
+        """Check if any of the given JTIs is in the blacklist
+
+        Args:
+            *jtis (str): JTIs of the tokens to check
+
+        Returns:
+            bool: True if a token is blacklisted, False if not
+        """
+
+        # Answer from the per-worker revocation cache if it is enabled
+        if Controller.CONFIG.revocation_cache.enabled:
+            return Controller.REVOCATION_CACHE.is_revoked(*jtis)
+
+        # Check every token in a single lookup
+        query = Controller.BLACKLIST_COL.find_one(
+            revoked_query(jtis), {"_id": 1}
+        )
+
+        # Return true if one is, false if not
+        return query is not None
+
     @staticmethod
     @Controller.return_dict_obj
     def handle_jwt_blacklisting(refresh: str, access: str) -> DictObj:
@@ -283,19 +368,64 @@ class UserControl(Controller):
             DictObj: Result of the blacklist
         """
 
-        # Get the JTI from the tokens
-        refresh_jti = decode_token(refresh)["jti"]
-        access_jti = decode_token(access)["jti"]
+        # Keep only the JTI, type and expiry of each token
+        entries = [
+            revocation(decode_verified(token, Controller.CLAIMS_CACHE))
+            for token in [refresh, access]
+        ]
+
+        # Place tokens to blacklist collection, where they expire along
+        # with the tokens. Tokens that were already revoked are skipped
+        try:
+            Controller.BLACKLIST_COL.bulk_write(
+                revocation_writes(entries), ordered=False
+            )
+        except BulkWriteError as e:
+            if not only_duplicates(e):
+                raise
 
-        # Place tokens to blacklist collection
-        Controller.BLACKLIST_COL.insert_one(
-            {
-                "refresh": refresh,
-                "access": access,
-                "refresh_jti": refresh_jti,
-                "access_jti": access_jti,
-            }
-        )
+        # Revoke the tokens in this worker without waiting for the next poll
+        for entry in entries:
+            Controller.REVOCATION_CACHE.add(entry["jti"], entry["expires_at"])
 
         # Return message
         return Controller.success("Signed out")
+
+    @staticmethod
+    @Controller.return_dict_obj
+    def migrate_revocations() -> DictObj:
+        """Convert the legacy blacklist documents, which held both raw
+        tokens of a signout, to one compact entry per token
+
+        Returns:
+            DictObj: Amount of converted documents and added entries
+        """
+
+        # Get the legacy documents along with their tokens
+        legacy = list(
+            Controller.BLACKLIST_COL.find({"refresh_jti": {"$exists": True}})
+        )
+        entries = [
+            entry for doc in legacy for entry in legacy_revocations(doc)
+        ]
+
+        # Add the entries of the tokens that could still validate
+        if entries:
+            try:
+                Controller.BLACKLIST_COL.bulk_write(
+                    revocation_writes(entries), ordered=False
+                )
+            except BulkWriteError as e:
+                if not only_duplicates(e):
+                    raise
+
+        # Remove the legacy documents
+        if legacy:
+            Controller.BLACKLIST_COL.delete_many(
+                {"_id": {"$in": [doc["_id"] for doc in legacy]}}
+            )
+
+        # Return message
+        return Controller.success(
+            "Revocations migrated", converted=len(legacy), added=len(entries)
+        )
@@ -18,7 +18,20 @@ create_instruction_group = Blueprint("create_instruction_group", __name__)
 get_instruction_group = Blueprint("get_instructions", __name__)
 get_users_instruction_groups = Blueprint("get_instruction_groups", __name__)
 update_instruction_group = Blueprint("update_instructions", __name__)
+patch_instruction_group = Blueprint("patch_instructions", __name__)
 get_checkpoint = Blueprint("get_checkpoint", __name__)
 save_checkpoint = Blueprint("save_checkpoint", __name__)
 delete_instruction_group = Blueprint("delete_instruction_group", __name__)
+export_instruction_groups = Blueprint("export_instruction_groups", __name__)
+import_instruction_groups = Blueprint("import_instruction_groups", __name__)
+# endregion
+
+# */batch/
+# region
+batch = Blueprint("batch", __name__)
+# endregion
+
+# */metrics
+# region
+metrics = Blueprint("metrics", __name__)
 # endregion
@@ -0,0 +1,249 @@
+# Imports
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
+from controllers.async_users import AsyncUserControl
+from starlette.responses import JSONResponse
+from typing import Awaitable, Callable, Any, List
+from flask_jwt_extended.exceptions import JWTExtendedException
+from controllers._async_base import AsyncController
+from util.jwt_cache import decode_verified
+from ._base import (
+    compile_params,
+    validate_params,
+    client_error,
+    server_error,
+    unavailable,
+)
+from starlette.requests import Request
+from util.password import PasswordHasherBusy
+from util.write_behind import WriteBehindFull
+from starlette.routing import Route
+from functools import wraps
+import logging
+
+# Logger of the endpoints
+logger = logging.getLogger(__name__)
+
+
+def endpoint(routes: List[Route], path: str) -> Callable:
+    """Register an async endpoint returning (content, status) as a route
+
+    Args:
+        routes (List[Route]): Route list of the endpoint module
+        path (str): Path of the endpoint relative to its mount point
+
+    Returns:
+        Callable: Decorator registering the endpoint
+    """
+
+    def decorator(func: Callable) -> Callable:
+        """Decorator definition"""
+
+        @wraps(func)
+        async def handler(request: Request) -> JSONResponse:
+            """Starlette handler that renders the endpoint's result"""
+
+            # Render the content and status code of the endpoint
+            content, status = await func(request)
+            return JSONResponse(content, status_code=status)
+
+        # Save the route and return the original function
+        routes.append(Route(path, handler, methods=["POST"]))
+        return func
+
+    # Return the decorator
+    return decorator
+
+
+def param_check(func: Callable) -> Callable:
+    """
+    Decorator to require specified JSON fields in an async route
+
+    Args:
+        func (Callable): The async route function to be wrapped
+
+    Returns:
+        Callable: The wrapped function
+    """
+
+    # Compile the parameter checks once at decoration time
+    fields = compile_params(func)
+
+    @wraps(func)
+    async def decorated_function(request: Request, **kwargs: Any) -> Any:
+        """Wrapping definition
+
+        Returns:
+            Any: The response from the route or an error message with a
+                status code
+        """
+
+        # Get the request information
+        try:
+            json_data = await request.json() if await request.body() else {}
+        except ValueError:
+            return client_error("Invalid JSON body")
+        json_data = json_data or {}
+        if "_id" in json_data:
+            del json_data["_id"]
+
+        # Return every invalid field at once
+        errors = validate_params(fields, json_data)
+        if errors:
+            return client_error(errors[0]["message"], errors=errors)
+
+        # Execute the wrapped function
+        return await func(**kwargs, **json_data)
+
+    # Return the wrapper
+    return decorated_function
+
+
+def error_handler(func: Callable[..., Awaitable]) -> Callable:
+    """Wrap the entire async endpoint with a try and except block
+
+    Args:
+        func (Callable[..., Awaitable]): Function to wrap with a try and
+            except block
+
+    Returns:
+        Callable: Result of the function or an error message
+    """
+
+    @wraps(func)
+    async def decorated_function(*args: Any, **kwargs: Any) -> Any:
+        """Wrapping definition
+
+        Returns:
+            Any: Result of the function being wrapped or an error message
+        """
+
+        # Try to execute the function
+        try:
+            return await func(*args, **kwargs)
+
+        # Ask the client to retry instead of queueing more password hashes
+        # or buffering more checkpoints while their writes fail
+        except (PasswordHasherBusy, WriteBehindFull):
+            return unavailable("The server is busy, try again later")
+
+        # If the exception occurs, log it along with its traceback and
+        # return a server error response
+        except Exception:
+            logger.exception(
+                "Unhandled exception", extra={"function": func.__name__}
+            )
+            return server_error("A server error occurred")
+
+    # Return the wrapper
+    return decorated_function
+
+
+async def verify_token(request: Request, refresh: bool = False) -> Any:
+    """Verify the bearer JWT of a request
+
+    Needs to be awaited within a Flask application context so that the token
+    is decoded with the application's JWT settings.
+
+    Args:
+        request (Request): Incoming request
+        refresh (bool, optional): Require a refresh token instead of an
+            access token. Defaults to False.
+
+    Returns:
+        Any: Decoded claims of the token or an error response
+    """
+
+    # Extract the JWT token from the Authorization header
+    auth_header = request.headers.get("Authorization")
+    if auth_header:
+        try:
+            token_type, token = auth_header.split()
+            if token_type.lower() != "bearer":
+                raise ValueError("Invalid token type")
+        except ValueError:
+            return {"error": "Invalid token format"}, 401
+    else:
+        return {"error": "Authorization header is missing"}, 401
+
+    # Decode the token and check its type
+    try:
+        claims = decode_verified(token, AsyncController.CLAIMS_CACHE)
+    except ExpiredSignatureError:
+        return {
+            "status": "expired",
+            "message": "Your access is expired",
+        }, 401
+    except (PyJWTError, JWTExtendedException):
+        return {"error": "Invalid token"}, 422
+    expected = "refresh" if refresh else "access"
+    if claims["type"] != expected:
+        return {"error": f"Only {expected} tokens are allowed"}, 422
+
+    # Check if the token is blacklisted
+    if await AsyncUserControl.is_token_revoked(claims["jti"]):
+        return {"msg": "Token has been revoked"}, 401
+
+    # Return the claims of the token
+    return claims
+
+
+def token_required(func: Callable) -> Callable:
+    """Decorator to check if async endpoint has the proper access JWT
+
+    Args:
+        func (Callable): Endpoint to wrap
+
+    Returns:
+        Callable: Result of the endpoint or an error message
+    """
+
+    @wraps(func)
+    async def decorated_function(request: Request, **kwargs: Any) -> Any:
+        """Wrapping definition
+
+        Returns:
+            Any: Result of the function being wrapped or an error message
+        """
+
+        # Return the error response if the token is not valid
+        claims = await verify_token(request)
+        if isinstance(claims, tuple):
+            return claims
+
+        # Add the user ID to kwargs and call the original function
+        kwargs["_id"] = claims["sub"]["_id"]
+        return await func(request, **kwargs)
+
+    # Return the wrapper
+    return decorated_function
+
+
+def refresh_token_required(func: Callable) -> Callable:
+    """Decorator to check if async endpoint has the proper refresh JWT
+
+    Args:
+        func (Callable): Endpoint to wrap
+
+    Returns:
+        Callable: Result of the endpoint or an error message
+    """
+
+    @wraps(func)
+    async def decorated_function(request: Request, **kwargs: Any) -> Any:
+        """Wrapping definition
+
+        Returns:
+            Any: Result of the function being wrapped or an error message
+        """
+
+        # Return the error response if the token is not valid
+        claims = await verify_token(request, refresh=True)
+        if isinstance(claims, tuple):
+            return claims
+
+        # Add the identity to kwargs and call the original function
+        kwargs["identity"] = claims["sub"]
+        return await func(request, **kwargs)
+
+    # Return the wrapper
+    return decorated_function
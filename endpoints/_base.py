@@ -1,11 +1,20 @@
 # Imports
-from flask_jwt_extended import jwt_required, decode_token
+from flask_jwt_extended.exceptions import JWTExtendedException
+from jwt.exceptions import ExpiredSignatureError, PyJWTError
+from controllers._base import Controller
+from controllers.users import UserControl
+from util.jwt_cache import decode_verified
 from inspect import signature, Parameter
-from typing import Callable, Any, Tuple
-from util.typing import is_valid_type
+from flask import request, has_request_context
+from typing import Callable, Any, List, Tuple
+from util.typing import compile_validator
+from util.write_behind import WriteBehindFull
+from werkzeug.http import quote_etag
 from functools import wraps
-from flask import request
-import traceback
+import logging
+
+# Logger of the endpoints
+logger = logging.getLogger(__name__)
 
 
 def success(message: str, **kwargs: Any) -> dict:
@@ -61,6 +70,144 @@ def server_error(message: str, **kwargs: Any) -> dict:
     return message, 500
 
 
+def unavailable(message: str, **kwargs: Any) -> dict:
+    """Return a message asking the client to try again later
+
+    Args:
+        message (str): Message of error
+
+    Returns:
+        dict: Message and return code
+    """
+    # Prep the message
+    message = {"status": "error", "message": message}
+    message.update(kwargs)
+
+    # Return response
+    return message, 503
+
+
+def status_code(res: dict) -> int:
+    """Returns the status code of a write's result
+
+    Args:
+        res (dict): Result of the write
+
+    Returns:
+        int: 409 on a version conflict, 400 on other errors and 200 if else
+    """
+    if res.status == "error":
+        return 409 if res.get("conflict") else 400
+    return 200
+
+
+def not_modified(etag: str) -> bool:
+    """Check if the client already has the representation of an entity tag
+
+    Args:
+        etag (str): Entity tag of the current representation
+
+    Returns:
+        bool: True if the request's If-None-Match holds the tag, False if
+            not or if there is no request, e.g. inside a batch
+    """
+    return has_request_context() and request.if_none_match.contains_weak(
+        etag
+    )
+
+
+def with_etag(res: Any, code: int, etag: str) -> Tuple[Any, int, dict]:
+    """Attach a weak entity tag to a response, or replace the response with
+    an empty 304 if the client already has it
+
+    Args:
+        res (Any): Response body
+        code (int): Status code of the response
+        etag (str): Entity tag of the response body
+
+    Returns:
+        Tuple[Any, int, dict]: Response body, status code and headers
+    """
+    headers = {"ETag": quote_etag(etag, weak=True)}
+    if code == 200 and not_modified(etag):
+        return "", 304, headers
+    return res, code, headers
+
+
+def compile_params(
+    func: Callable, user_id: bool = True
+) -> List[Tuple[str, bool, Any, Any]]:
+    """Compile the parameters of a Flask route into flat field checks
+
+    Args:
+        func (Callable): The Flask route function to compile
+        user_id (bool, optional): Is _id the ID of the user, which is taken
+            from the token rather than the body? Defaults to True.
+
+    Returns:
+        List[Tuple[str, bool, Any, Any]]: Name, required flag, type checker
+            and annotation of every JSON field of the route
+    """
+
+    # Build the checks once from the wrapped function's parameters
+    fields = []
+    for param in signature(func).parameters.values():
+        # Skip if the current parameter is a kwargs
+        if param.name == "_id" and user_id:
+            continue
+
+        # Compile the type check only if the parameter is annotated
+        checker = None
+        if param.annotation != Parameter.empty:
+            checker = compile_validator(param.annotation)
+
+        # Save the field information
+        required = param.default == Parameter.empty
+        fields.append((param.name, required, checker, param.annotation))
+
+    # Return the compiled fields
+    return fields
+
+
+def validate_params(
+    fields: List[Tuple[str, bool, Any, Any]], json_data: dict
+) -> List[dict]:
+    """Validate a JSON body against compiled field checks
+
+    Args:
+        fields (List[Tuple[str, bool, Any, Any]]): Compiled fields from
+            compile_params
+        json_data (dict): JSON body of the request
+
+    Returns:
+        List[dict]: Per-field errors, empty if the body is valid
+    """
+
+    # Check every field of the route
+    errors = []
+    for name, required, checker, annotation in fields:
+        # Fields with default values may be left out
+        if name not in json_data:
+            if required:
+                errors.append(
+                    {"field": name, "message": f"Missing {name} value"}
+                )
+            continue
+
+        # Check type only if the parameter is annotated
+        if checker is not None and not checker(json_data[name]):
+            errors.append(
+                {
+                    "field": name,
+                    "message": f"Invalid type for {name}, "
+                    + f"expected {annotation}",
+                }
+            )
+
+    # Return the errors
+    return errors
+
+
 def param_check(func: Callable) -> Callable:
     """
     Decorator to require specified JSON fields in a Flask route
@@ -72,6 +219,9 @@ def param_check(func: Callable) -> Callable:
         Callable: The wrapped function
     """
 
+    # Compile the parameter checks once at decoration time
+    fields = compile_params(func)
+
     @wraps(func)
     def decorated_function(*args: Any, **kwargs: Any) -> Tuple[Any, int]:
         """
@@ -89,35 +239,48 @@ def param_check(func: Callable) -> Callable:
         if "_id" in json_data:
             del json_data["_id"]
 
-        # Iterate through the wrapped function's parameters
-        sig = signature(func)
-        for param in sig.parameters.values():
-            # Skip if the current parameter is a kwargs
-            if param.name == "_id":
-                continue
-
-            # Skip parameters with default values if they are not in json_data
-            if (
-                param.name not in json_data
-                and param.default == Parameter.empty
-            ):
-                return client_error(f"Missing {param.name} value")
-
-            # Check type only if the parameter is in json_data
-            if param.name in json_data and param.annotation != Parameter.empty:
-                if not is_valid_type(json_data[param.name], param.annotation):
-                    return client_error(
-                        f"Invalid type for {param.name}, "
-                        + f"expected {param.annotation}"
-                    )
+        # Return every invalid field at once
+        errors = validate_params(fields, json_data)
+        if errors:
+            return client_error(errors[0]["message"], errors=errors)
 
         # Execute the wrapped function
         return func(*args, **kwargs, **json_data)
 
+    # Expose the compiled checks so the route can be called without a
+    # request, e.g. as part of a batch
+    decorated_function.param_fields = fields
+    decorated_function.param_func = func
+
     # Execute the wrapped function
     return decorated_function
 
 
+def call_with_params(
+    endpoint: Callable, json_data: dict, **kwargs: Any
+) -> Tuple[Any, int]:
+    """Call a param_check route with the given JSON body instead of the
+    request's body
+
+    Args:
+        endpoint (Callable): Route decorated with param_check
+        json_data (dict): JSON body to validate and call the route with
+
+    Returns:
+        Tuple[Any, int]: The response from the route or an error message
+            with a status code
+    """
+
+    # Validate the body the same way param_check does
+    json_data = {k: v for k, v in json_data.items() if k != "_id"}
+    errors = validate_params(endpoint.param_fields, json_data)
+    if errors:
+        return client_error(errors[0]["message"], errors=errors)
+
+    # Execute the undecorated route
+    return endpoint.param_func(**kwargs, **json_data)
+
+
 def error_handler(func: Callable) -> Callable:
     """Wrap the entire endpoint with a try and except block
 
@@ -140,19 +303,71 @@ def error_handler(func: Callable) -> Callable:
         try:
             return func(*args, **kwargs)
 
-        # If the exception occurs, print the error to the console and
+        # Ask the client to retry while failed writes fill the buffer
+        except WriteBehindFull:
+            return unavailable("The server is busy, try again later")
+
+        # If the exception occurs, log it along with its traceback and
         # return a server error response
         except Exception:
-            print(f"Caught an exception in {func.__name__}():")
-            traceback.print_exc()
+            logger.exception(
+                "Unhandled exception", extra={"function": func.__name__}
+            )
             return server_error("A server error occurred")
 
     # Return the wrapper
     return decorated_function
 
 
+def verify_token(refresh: bool = False) -> Any:
+    """Verify the bearer JWT of the current request, decoding it once and
+    reusing the verified claims of tokens seen before
+
+    Args:
+        refresh (bool, optional): Require a refresh token instead of an
+            access token. Defaults to False.
+
+    Returns:
+        Any: Decoded claims of the token or an error response
+    """
+
+    # Extract the JWT token from the Authorization header
+    auth_header = request.headers.get("Authorization")
+    if auth_header:
+        try:
+            token_type, token = auth_header.split()
+            if token_type.lower() != "bearer":
+                raise ValueError("Invalid token type")
+        except ValueError:
+            return {"error": "Invalid token format"}, 401
+    else:
+        return {"error": "Authorization header is missing"}, 401
+
+    # Decode the token and check its type
+    try:
+        claims = decode_verified(token, Controller.CLAIMS_CACHE)
+    except ExpiredSignatureError:
+        return {
+            "status": "expired",
+            "message": "Your access is expired",
+        }, 401
+    except (PyJWTError, JWTExtendedException):
+        return {"error": "Invalid token"}, 422
+    expected = "refresh" if refresh else "access"
+    if claims["type"] != expected:
+        return {"error": f"Only {expected} tokens are allowed"}, 422
+
+    # Check if the token is blacklisted
+    if UserControl.is_token_revoked(claims["jti"]):
+        return {"msg": "Token has been revoked"}, 401
+
+    # Return the claims of the token
+    return claims
+
+
 def token_required(func: Callable) -> Callable:
-    """Decorator to check if endpoint has the proper JWT passed through
+    """Decorator to check if endpoint has the proper access JWT passed
+    through
 
     Args:
         func (Callable): Endpoint to wrap
@@ -162,7 +377,6 @@ def token_required(func: Callable) -> Callable:
     """
 
     @wraps(func)
-    @jwt_required()
     def decorated_function(*args, **kwargs):
         """Wrapping definition
 
@@ -170,20 +384,45 @@ def token_required(func: Callable) -> Callable:
             Any: Result of the function being wrapped or an error message
         """
 
-        # Extract the access JWT token from the Authorization header
-        auth_header = request.headers.get("Authorization")
-        if auth_header:
-            try:
-                token_type, token = auth_header.split()
-                if token_type.lower() != "bearer":
-                    raise ValueError("Invalid token type")
-            except ValueError:
-                return {"error": "Invalid token format"}, 401
-        else:
-            return {"error": "Authorization header is missing"}, 401
-
-        # Add token to kwargs and call the original function
-        kwargs["_id"] = decode_token(token)["sub"]["_id"]
+        # Return the error response if the token is not valid
+        claims = verify_token()
+        if isinstance(claims, tuple):
+            return claims
+
+        # Add the user ID to kwargs and call the original function
+        kwargs["_id"] = claims["sub"]["_id"]
+        return func(*args, **kwargs)
+
+    # Return the wrapper
+    return decorated_function
+
+
+def refresh_token_required(func: Callable) -> Callable:
+    """Decorator to check if endpoint has the proper refresh JWT passed
+    through
+
+    Args:
+        func (Callable): Endpoint to wrap
+
+    Returns:
+        Callable: Result of the endpoint or an error message
+    """
+
+    @wraps(func)
+    def decorated_function(*args, **kwargs):
+        """Wrapping definition
+
+        Returns:
+            Any: Result of the function being wrapped or an error message
+        """
+
+        # Return the error response if the token is not valid
+        claims = verify_token(refresh=True)
+        if isinstance(claims, tuple):
+            return claims
+
+        # Add the identity of the token to kwargs and call the function
+        kwargs["identity"] = claims["sub"]
         return func(*args, **kwargs)
 
     # Return the wrapper
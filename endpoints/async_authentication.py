@@ -0,0 +1,180 @@
+# Starlette related libraries
+from flask_jwt_extended import create_access_token, create_refresh_token
+from starlette.requests import Request
+from starlette.routing import Route
+
+# Grab base MVC related modules for endpoints
+from controllers.async_users import AsyncUserControl
+from ._async_base import (
+    endpoint,
+    token_required,
+    refresh_token_required,
+    param_check,
+    error_handler,
+)
+
+# Miscellaneous imports
+from typing import List, Tuple
+from pprint import pprint  # noqa
+
+# Routes mounted under */authentication/
+routes: List[Route] = []
+
+#
+#   CREATE OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/register/")
+@error_handler
+@param_check
+async def register_endpoint(
+    first_name: str, last_name: str, email: str, password: str
+) -> Tuple[dict, int]:
+    """Endpoint to handle registering users
+
+    Args:
+        first_name (str): First name of the user
+        last_name (str): Last name of the user
+        email (str): Email of the new user
+        password (str): Password of the new user
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get the user's instance based on the given information
+    result = await AsyncUserControl.register_user(**locals())
+
+    # Return response data
+    return result, (200 if result.status == "success" else 400)
+
+
+@endpoint(routes, "/refresh/")
+@refresh_token_required
+@error_handler
+async def refresh_endpoint(
+    request: Request, identity: dict
+) -> Tuple[dict, int]:
+    """Endpoint to handle the refresh of users' authentication
+
+    Args:
+        request (Request): UNUSED - Incoming request
+        identity (dict): Identity of the refresh token
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Create a new access token
+    new_token = create_access_token(identity=identity)
+
+    # Return the new token
+    return {"access_token": new_token}, 200
+
+
+@endpoint(routes, "/login/")
+@error_handler
+@param_check
+async def login_endpoint(email: str, password: str) -> Tuple[dict, int]:
+    """Endpoint to handle the login of users into the application
+
+    Args:
+        email (str): Email of the user trying to login
+        password (str): Password attempt
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get the user's instance based on the given information
+    result = await AsyncUserControl.login(**locals())
+
+    # If the response data results in an error, return 400
+    # and error message
+    if result.status != "success":
+        return result, 400
+
+    # Create refresh and access token
+    identity = {
+        "email": result.message.info.email,
+        "_id": result.message.info._id,
+    }
+    access_token = create_access_token(identity=identity)
+    refresh_token = create_refresh_token(identity=identity)
+
+    # Return access and refresh tokens
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+    }, 200
+
+
+#   endregion
+
+#
+#   READ OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/who_am_i/")
+@token_required
+@error_handler
+@param_check
+async def who_am_i_endpoint(_id: str) -> Tuple[dict, int]:
+    """Endpoint to get the user's credentials
+
+    Args:
+        _id (str): User ID of the caller
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get the user based on the ID
+    result = await AsyncUserControl.get_user(_id)
+    if result.status != "success":
+        return result, 400
+
+    # Return the results of the database query
+    return result.message.get_generic_info(), 200
+
+
+#   endregion
+
+#
+#   DELETE OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/signout/")
+@token_required
+@error_handler
+@param_check
+async def signout_endpoint(
+    access_token: str, refresh_token: str, _id: str
+) -> Tuple[dict, int]:
+    """Sign Out Handling
+
+    Args:
+        access_token (str): Access token to trash
+        refresh_token (str): Refresh token to trash
+        _id (str): User ID of the caller
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get the user's instance based on the given information
+    result = await AsyncUserControl.handle_jwt_blacklisting(
+        refresh_token, access_token
+    )
+
+    # Return response data
+    return result, (200 if result.status == "success" else 400)
+
+
+#   endregion
@@ -0,0 +1,273 @@
+# Starlette related libraries
+from starlette.routing import Route
+
+# Grab base MVC related modules for endpoints
+from controllers.async_instructions import AsyncInstructionControl
+from models.instruction_group import InstructionGroup
+from ._async_base import (
+    endpoint,
+    token_required,
+    param_check,
+    error_handler,
+)
+from ._base import status_code
+
+# Miscellaneous imports
+from typing import Tuple, List, Optional
+from pprint import pprint  # noqa
+
+# Routes mounted under */instructions/
+routes: List[Route] = []
+
+#
+#   CREATE OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/create_instruction_group/")
+@token_required
+@error_handler
+@param_check
+async def create_instruction_group_endpoint(
+    name: str, _id: str
+) -> Tuple[dict, int]:
+    """Endpoint to handle the creation of a new instruction group
+
+    Args:
+        name (str): Name of the instruction group
+        _id (str): ID of the user
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+    # Create a new instruction group
+    res = await AsyncInstructionControl.create_instruction_group(**locals())
+
+    # Return the result of the new creation of an instruction group
+    return res, 400 if res.status == "error" else 200
+
+
+#   endregion
+
+#
+#   READ OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/get_instruction_group/")
+@error_handler
+@param_check
+async def get_instruction_group_endpoint(
+    id: str, view: str = "full", fields: List[str] = []
+) -> Tuple[dict, int]:
+    """Endpoint to handle the read of an instruction group
+
+    Args:
+        id (str): ID of the instruction group
+        view (str): Name of the view to return, "full" or "summary"
+        fields (List[str]): Fields to return instead of a view
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get instructions from instruction group
+    res = await AsyncInstructionControl.get_instruction_group(**locals())
+    if isinstance(res.message, InstructionGroup):
+        res.message = res.message.info
+
+    # Return the result
+    return res, 400 if res.status == "error" else 200
+
+
+@endpoint(routes, "/get_users_instruction_groups/")
+@token_required
+@error_handler
+@param_check
+async def get_users_instruction_groups_endpoint(
+    _id: str,
+    page_size: int = 0,
+    cursor: str = "",
+    include_total: bool = False,
+    view: str = "full",
+    fields: List[str] = [],
+) -> Tuple[dict, int]:
+    """Endpoint to handle the retrieval of a page of a user's instruction
+    groups
+
+    Args:
+        _id (str): ID of the user
+        page_size (int): Page size of result, 0 for the default
+        cursor (str): Continuation token of the previous page
+        include_total (bool): Should the amount of groups be returned?
+        view (str): Name of the view to return, "full" or "summary"
+        fields (List[str]): Fields to return instead of a view
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get user's instruction groups
+    res = await AsyncInstructionControl.get_users_instruction_groups(
+        **locals()
+    )
+    if res.status == "success":
+        res.message = [
+            item.info if isinstance(item, InstructionGroup) else item
+            for item in res.message
+        ]
+
+    # Return the result
+    return res, 400 if res.status == "error" else 200
+
+
+@endpoint(routes, "/get_checkpoint/")
+@token_required
+@error_handler
+@param_check
+async def get_checkpoint_endpoint(id: str, _id: str) -> Tuple[dict, int]:
+    """Get the position where the user was last of
+
+    Args:
+        id (str): Instruction group's ID
+        _id (str): User's ID
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get instructions from instruction group
+    res = await AsyncInstructionControl.get_checkpoint(**locals())
+
+    # Return the result
+    return res, 400 if res.status == "error" else 200
+
+
+#   endregion
+
+#
+#   UPDATE OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/update_instruction_group/")
+@token_required
+@error_handler
+@param_check
+async def update_instruction_group_endpoint(
+    id: str,
+    _id: str,
+    name: str = "",
+    steps: List[dict] = [],
+    version: Optional[int] = None,
+) -> Tuple[dict, int]:
+    """Endpoint to handle the updating of an instruction group
+
+    Args:
+        id (str): ID of the instruction group to update
+        _id (str): ID of the user updating the instruction group
+        name (str): Updated name of the instruction
+        steps (List[dict]): Updated list of steps for the instruction group
+        version (Optional[int]): Version the update is based on, if given
+            the update is rejected when the group was modified meanwhile
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Update the instruction group
+    res = await AsyncInstructionControl.update_instruction_group(**locals())
+
+    # Return the result
+    return res, status_code(res)
+
+
+@endpoint(routes, "/patch_instruction_group/")
+@token_required
+@error_handler
+@param_check
+async def patch_instruction_group_endpoint(
+    id: str, _id: str, version: int, operations: List[dict]
+) -> Tuple[dict, int]:
+    """Endpoint to handle step-level patches of an instruction group
+
+    Args:
+        id (str): ID of the instruction group to patch
+        _id (str): ID of the user patching the instruction group
+        version (int): Version the patch is based on
+        operations (List[dict]): Operations to apply in order, each with an
+            op of insert, replace, move or delete, an index, a step for
+            insert and replace, and a destination index "to" for move
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Patch the instruction group
+    res = await AsyncInstructionControl.patch_instruction_group(**locals())
+
+    # Return the result
+    return res, status_code(res)
+
+
+@endpoint(routes, "/save_checkpoint/")
+@token_required
+@error_handler
+@param_check
+async def save_checkpoint_endpoint(
+    id: str, _id: str, pos: int
+) -> Tuple[dict, int]:
+    """Endpoint to save a checkpoint
+
+    Args:
+        id (str): ID of the instruction group to save the check point
+        _id (str): ID of the user for the check point
+        pos (int): Position of the user saving a check point
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Save the user's checkpoint
+    res = await AsyncInstructionControl.save_checkpoint(**locals())
+
+    # Return the result
+    return res, 400 if res.status == "error" else 200
+
+
+#   endregion
+
+#
+#   DELETE OPERATIONS
+#   region
+#
+
+
+@endpoint(routes, "/delete_instruction_group/")
+@token_required
+@error_handler
+@param_check
+async def delete_instruction_group_endpoint(
+    id: str, _id: str
+) -> Tuple[dict, int]:
+    """Endpoint to handle the deletion of an instruction group
+
+    Args:
+        id (str): ID of the instruction group to delete
+        _id (str): ID of the user requesting the deletion
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Get instructions from instruction group
+    res = await AsyncInstructionControl.delete_instruction_group(**locals())
+
+    # Return the result
+    return res, 400 if res.status == "error" else 200
+
+
+#   endregion
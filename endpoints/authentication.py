@@ -3,13 +3,12 @@ from . import register, refresh, login, who_am_i, signout
 from flask_jwt_extended import (
     create_access_token,
     create_refresh_token,
-    get_jwt_identity,
-    jwt_required,
 )
 
 # Grab base MVC related modules for endpoints
 from controllers.users import UserControl
 from ._base import (
+    refresh_token_required,
     token_required,
     param_check,
     error_handler,
@@ -52,21 +51,20 @@ def register_endpoint(
 
 
 @refresh.route("/refresh/", methods=["POST"])
-@jwt_required(refresh=True)
+@refresh_token_required
 @error_handler
-@param_check
-def refresh_endpoint() -> Tuple[dict, int]:
+def refresh_endpoint(identity: dict) -> Tuple[dict, int]:
     """Endpoint to handle the refresh of users' authentication
 
     Args:
-        refresh_token (str): Refresh token for JWT refresh
+        identity (dict): Identity of the caller's refresh token
 
     Returns:
         Tuple[dict, int]: Return the response of the endpoint
     """
 
     # Create a new access token
-    new_token = create_access_token(identity=get_jwt_identity())
+    new_token = create_access_token(identity=identity)
 
     # Return the new token
     return {"access_token": new_token}, 200
@@ -176,7 +174,7 @@ def signout_endpoint(
     """
 
     # Get the user's instance based on the given information
-    result = UserControl.handle_jwt_blacklisting(access_token, refresh_token)
+    result = UserControl.handle_jwt_blacklisting(refresh_token, access_token)
 
     # Return response data
     return result, (200 if result.status == "success" else 400)
@@ -0,0 +1,162 @@
+# Flask related libraries and  blueprints(s)
+from . import batch
+
+# Grab base MVC related modules for endpoints
+from config.config import config
+from .authentication import who_am_i_endpoint
+from .instructions import (
+    get_instruction_group_endpoint,
+    get_users_instruction_groups_endpoint,
+    get_checkpoint_endpoint,
+    update_instruction_group_endpoint,
+    patch_instruction_group_endpoint,
+    save_checkpoint_endpoint,
+    delete_instruction_group_endpoint,
+)
+from ._base import (
+    token_required,
+    param_check,
+    error_handler,
+    call_with_params,
+    client_error,
+    success,
+)
+
+# Miscellaneous imports
+from concurrent.futures import ThreadPoolExecutor
+from inspect import signature
+from typing import Any, Callable, Dict, List, Tuple
+from pprint import pprint  # noqa
+import contextvars
+
+# Endpoints that can be part of a batch along with whether they only read
+BATCHABLE: Dict[str, Tuple[Callable, bool]] = {
+    "/authentication/who_am_i/": (who_am_i_endpoint, True),
+    "/instructions/get_instruction_group/": (
+        get_instruction_group_endpoint,
+        True,
+    ),
+    "/instructions/get_users_instruction_groups/": (
+        get_users_instruction_groups_endpoint,
+        True,
+    ),
+    "/instructions/get_checkpoint/": (get_checkpoint_endpoint, True),
+    "/instructions/update_instruction_group/": (
+        update_instruction_group_endpoint,
+        False,
+    ),
+    "/instructions/patch_instruction_group/": (
+        patch_instruction_group_endpoint,
+        False,
+    ),
+    "/instructions/save_checkpoint/": (save_checkpoint_endpoint, False),
+    "/instructions/delete_instruction_group/": (
+        delete_instruction_group_endpoint,
+        False,
+    ),
+}
+
+# Pool that runs independent reads of a batch concurrently
+executor = ThreadPoolExecutor(max_workers=config.batch.max_workers)
+
+
+@error_handler
+def run_operation(operation: dict, _id: str) -> Tuple[Any, int]:
+    """Run a single operation of a batch
+
+    Args:
+        operation (dict): Path and params of the operation
+        _id (str): ID of the user running the batch
+
+    Returns:
+        Tuple[Any, int]: Response of the operation's endpoint
+    """
+
+    # Get the endpoint of the operation
+    endpoint, _ = BATCHABLE[operation["path"]]
+
+    # Pass the user's ID only to endpoints that take it
+    kwargs = {}
+    if "_id" in signature(endpoint.param_func).parameters:
+        kwargs["_id"] = _id
+
+    # Run the endpoint with the operation's params, batched results are
+    # always embedded rather than streamed
+    params = dict(operation.get("params", {}))
+    params.pop("stream", None)
+    return call_with_params(endpoint, params, **kwargs)
+
+
+#
+#   BATCH OPERATIONS
+#   region
+#
+
+
+@batch.route("/batch/", methods=["POST"])
+@token_required
+@error_handler
+@param_check
+def batch_endpoint(operations: List[dict], _id: str) -> Tuple[dict, int]:
+    """Endpoint to run several operations with a single request
+
+    Consecutive read operations are independent of each other and may run
+    concurrently, while write operations run in the given order.
+
+    Args:
+        operations (List[dict]): Operations to run, each with the path of
+            the endpoint and its params
+        _id (str): ID of the user running the batch
+
+    Returns:
+        Tuple[dict, int]: Return the per-operation responses
+    """
+
+    # Check the size of the batch
+    if len(operations) > config.batch.max_operations:
+        return client_error(
+            f"A batch can have up to {config.batch.max_operations} operations"
+        )
+
+    # Check that every operation names a batchable endpoint
+    for index, operation in enumerate(operations):
+        if operation.get("path") not in BATCHABLE:
+            return client_error(f"Invalid path for operation {index}")
+        if not isinstance(operation.get("params", {}), dict):
+            return client_error(f"Invalid params for operation {index}")
+
+    # Run the operations, grouping consecutive reads together
+    results, reads = [], []
+    for operation in operations + [None]:
+        # Queue the operation if it is a read that can run concurrently
+        if (
+            operation is not None
+            and config.batch.concurrent_reads
+            and BATCHABLE[operation["path"]][1]
+        ):
+            reads.append(operation)
+            continue
+
+        # Run the queued reads before the next operation, each within a
+        # copy of the request's context so that their logs keep the
+        # request ID, route and method
+        futures = [
+            executor.submit(
+                contextvars.copy_context().run, run_operation, op, _id
+            )
+            for op in reads
+        ]
+        results += [future.result() for future in futures]
+        reads = []
+
+        # Run the operation itself
+        if operation is not None:
+            results.append(run_operation(operation, _id))
+
+    # Return the per-operation responses without their headers
+    return success(
+        [{"status_code": code, "body": body} for body, code, *_ in results]
+    )
+
+
+#   endregion
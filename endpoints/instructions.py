@@ -4,23 +4,38 @@ from . import (
     get_instruction_group,
     get_users_instruction_groups,
     update_instruction_group,
+    patch_instruction_group,
     get_checkpoint,
     save_checkpoint,
     delete_instruction_group,
+    export_instruction_groups,
+    import_instruction_groups,
 )
 
 # Grab base MVC related modules for endpoints
+from config.config import config
+from util.json_provider import ndjson_response, read_lines, stream_response
+from util.hash import content_hash
 from controllers.instructions import InstructionControl
+from models.instruction_group import InstructionGroup
 from ._base import (
     token_required,
     param_check,
     error_handler,
+    status_code,
+    not_modified,
+    with_etag,
+    compile_params,
+    validate_params,
+    success,
 )
 
 
 # Miscellaneous imports
-from typing import Tuple, List
+from typing import Tuple, List, Optional, Union
+from flask import Response, current_app, request
 from pprint import pprint  # noqa
+import heapq
 
 
 #
@@ -50,6 +65,123 @@ def create_instruction_group_endpoint(name: str, _id: str) -> Tuple[dict, int]:
     return res, 400 if res.status == "error" else 200
 
 
+def import_line(name: str, steps: List[dict], _id: str = "") -> None:
+    """Fields of a line of import_instruction_groups. Any version of the
+    line is ignored, as imported groups start at version 0
+
+    Args:
+        name (str): Name of the instruction group
+        steps (List[dict]): Steps of the instruction group
+        _id (str): ID of the instruction group, made on insert if empty
+    """
+
+
+# Compiled checks of the lines of import_instruction_groups
+IMPORT_FIELDS = compile_params(import_line, user_id=False)
+
+
+def import_problem(group: dict) -> Optional[str]:
+    """Check a line of import_instruction_groups
+
+    Args:
+        group (dict): Parsed line
+
+    Returns:
+        Optional[str]: Message of the first problem or None if it is valid
+    """
+
+    # Check the fields, then the ID format and the structure of each step
+    problems = validate_params(IMPORT_FIELDS, group)
+    if problems:
+        return problems[0]["message"]
+    if group.get("_id") and not InstructionControl.GROUP_ID.match(
+        group["_id"]
+    ):
+        return "Invalid instruction group ID"
+    if not all(InstructionControl.is_step(step) for step in group["steps"]):
+        return "Improper step of the instruction group"
+    return None
+
+
+@import_instruction_groups.route(
+    "/import_instruction_groups/", methods=["POST"]
+)
+@token_required
+@error_handler
+def import_instruction_groups_endpoint(_id: str) -> Tuple[dict, int]:
+    """Endpoint to import instruction groups from a newline-delimited JSON
+    body, one group per line, inserted in batches as the body is read
+
+    Args:
+        _id (str): ID of the user, who owns every imported group
+
+    Returns:
+        Tuple[dict, int]: Amount of imported and failed groups along with
+            the line and message of the first failures
+    """
+
+    # Counters and the first failures by line, kept in a heap with the
+    # last of them on top as insert failures are only known once their
+    # batch is flushed
+    inserted, failed, errors = 0, 0, []
+    batch, numbers = [], []
+
+    def report(number: int, message: str) -> None:
+        """Count a failed line and keep it if it is among the first"""
+        nonlocal failed
+        failed += 1
+        heapq.heappush(errors, (-number, message))
+        if len(errors) > config.bulk.max_errors:
+            heapq.heappop(errors)
+
+    def flush() -> None:
+        """Insert the pending groups and report the failed ones"""
+        nonlocal inserted
+        if batch:
+            res = InstructionControl.import_instruction_groups(_id, batch)
+            inserted += res.inserted
+            for error in res.errors:
+                report(numbers[error["index"]], error["message"])
+            batch.clear()
+            numbers.clear()
+
+    # Parse and check every line, inserting full batches as they come
+    for number, line in read_lines(request.stream, config.bulk.max_line_bytes):
+        if line is None:
+            report(number, "Line is too long")
+            continue
+        if not line.strip():
+            continue
+        try:
+            group = current_app.json.loads(line)
+        except ValueError:
+            report(number, "Invalid JSON")
+            continue
+        if not isinstance(group, dict):
+            report(number, "Expected an instruction group object")
+            continue
+        problem = import_problem(group)
+        if problem is not None:
+            report(number, problem)
+            continue
+        batch.append(group)
+        numbers.append(number)
+        if len(batch) >= config.bulk.batch_size:
+            flush()
+    flush()
+
+    # Return the amounts along with the first failures in line order
+    return success(
+        "Instruction groups imported",
+        inserted=inserted,
+        failed=failed,
+        errors=[
+            {"line": -number, "message": message}
+            for number, message in sorted(errors, reverse=True)
+        ],
+    )
+
+
 #   endregion
 
 #
@@ -61,19 +193,23 @@ def create_instruction_group_endpoint(name: str, _id: str) -> Tuple[dict, int]:
 @get_instruction_group.route("/get_instruction_group/", methods=["POST"])
 @error_handler
 @param_check
-def get_instruction_group_endpoint(id: str) -> Tuple[dict, int]:
+def get_instruction_group_endpoint(
+    id: str, view: str = "full", fields: List[str] = []
+) -> Tuple[dict, int]:
     """Endpoint to handle the read of an instruction group
 
     Args:
         id (str): ID of the instruction group
+        view (str): Name of the view to return, "full" or "summary"
+        fields (List[str]): Fields to return instead of a view
 
     Returns:
         Tuple[dict, int]: Return the response of the endpoint
     """
 
     # Get instructions from instruction group
-    res = InstructionControl.get_instruction_group(id)
-    if res.message:
+    res = InstructionControl.get_instruction_group(**locals())
+    if isinstance(res.message, InstructionGroup):
         res.message = res.message.info
 
     # Return the result
@@ -86,30 +222,104 @@ def get_instruction_group_endpoint(id: str) -> Tuple[dict, int]:
 @token_required
 @error_handler
 @param_check
-def get_users_instruction_groups_endpoint(_id: str) -> Tuple[dict, int]:
-    """Endpoint to handle the retrieval of a user's instruction groups
+def get_users_instruction_groups_endpoint(
+    _id: str,
+    page_size: int = 0,
+    cursor: str = "",
+    include_total: bool = False,
+    view: str = "full",
+    fields: List[str] = [],
+    stream: bool = False,
+) -> Union[Tuple[dict, int, dict], Response]:
+    """Endpoint to handle the retrieval of a page of a user's instruction
+    groups
 
     Args:
         _id (str): ID of the user
+        page_size (int): Page size of result, 0 for the default
+        cursor (str): Continuation token of the previous page
+        include_total (bool): Should the amount of groups be returned?
+        view (str): Name of the view to return, "full" or "summary"
+        fields (List[str]): Fields to return instead of a view
+        stream (bool): Should the page be streamed from the database cursor
+            as a chunked response?
 
     Returns:
-        Tuple[dict, int]: Return the response of the endpoint
+        Union[Tuple[dict, int, dict], Response]: Return the response of the
+            endpoint along with its entity tag
     """
 
+    # Answer from the versions of the page if the client has it already
+    params = locals()
+    tag = InstructionControl.get_users_instruction_groups_etag(**params)
+    if tag.status == "error":
+        return tag, 400
+    if not_modified(tag.message):
+        return with_etag("", 200, tag.message)
+
     # Get user's instruction groups
-    res = InstructionControl.get_users_instruction_groups(**locals())
-    if res.message:
-        res.message = [item.info for item in res.message]
+    res = InstructionControl.get_users_instruction_groups(**params)
+
+    # Stream the groups as they are read, the next page's token comes last
+    if stream and res.status == "success":
+        page = res.pop("message")
+        response = stream_response(
+            res,
+            "message",
+            (
+                item.info if isinstance(item, InstructionGroup) else item
+                for item in page
+            ),
+            lambda: {"next_cursor": page.next_cursor},
+            current_app.json.encoder,
+        )
+        response.headers.update(with_etag("", 200, tag.message)[2])
+        return response
+    if res.status == "success":
+        res.message = [
+            item.info if isinstance(item, InstructionGroup) else item
+            for item in res.message
+        ]
 
     # Return the result
-    return res, 400 if res.status == "error" else 200
+    return with_etag(res, 400 if res.status == "error" else 200, tag.message)
+
+
+@export_instruction_groups.route(
+    "/export_instruction_groups/", methods=["POST"]
+)
+@token_required
+@error_handler
+@param_check
+def export_instruction_groups_endpoint(
+    _id: str, view: str = "full", fields: List[str] = []
+) -> Union[Tuple[dict, int], Response]:
+    """Endpoint to stream every instruction group of a user as
+    newline-delimited JSON, one group per line, as it is read
+
+    Args:
+        _id (str): ID of the user
+        view (str): Name of the view to return, "full" or "summary"
+        fields (List[str]): Fields to return instead of a view
+
+    Returns:
+        Union[Tuple[dict, int], Response]: Streamed groups or an error
+    """
+
+    # Get the cursor over the user's instruction groups
+    res = InstructionControl.export_instruction_groups(**locals())
+    if res.status == "error":
+        return res, 400
+
+    # Stream the groups as they are read
+    return ndjson_response(res.pop("message"), current_app.json.encoder)
 
 
 @get_checkpoint.route("/get_checkpoint/", methods=["POST"])
 @token_required
 @error_handler
 @param_check
-def get_checkpoint_endpoint(id: str, _id: str) -> Tuple[dict, int]:
+def get_checkpoint_endpoint(id: str, _id: str) -> Tuple[dict, int, dict]:
     """Get the position where the user was last of
 
     Args:
@@ -117,14 +327,16 @@ def get_checkpoint_endpoint(id: str, _id: str) -> Tuple[dict, int]:
         _id (str): User's ID
 
     Returns:
-        Tuple[dict, int]: Return the response of the endpoint
+        Tuple[dict, int, dict]: Return the response of the endpoint along
+            with its entity tag
     """
 
     # Get instructions from instruction group
     res = InstructionControl.get_checkpoint(**locals())
 
-    # Return the result
-    return res, 400 if res.status == "error" else 200
+    # Return the result, or nothing if the client has it already
+    code = 400 if res.status == "error" else 200
+    return with_etag(res, code, content_hash(res.message))
 
 
 #   endregion
@@ -140,7 +352,11 @@ def get_checkpoint_endpoint(id: str, _id: str) -> Tuple[dict, int]:
 @error_handler
 @param_check
 def update_instruction_group_endpoint(
-    id: str, _id: str, name: str = "", steps: List[dict] = []
+    id: str,
+    _id: str,
+    name: str = "",
+    steps: List[dict] = [],
+    version: Optional[int] = None,
 ) -> Tuple[dict, int]:
     """Endpoint to handle the updating of an instruction group
 
@@ -149,6 +365,8 @@ def update_instruction_group_endpoint(
         _id (str): ID of the user updating the instruction group
         name (str): Updated name of the instruction
         steps (List[dict]): Updated list of steps for the instruction group
+        version (Optional[int]): Version the update is based on, if given
+            the update is rejected when the group was modified meanwhile
 
     Returns:
         Tuple[dict, int]: Return the response of the endpoint
@@ -158,7 +376,35 @@ def update_instruction_group_endpoint(
     res = InstructionControl.update_instruction_group(**locals())
 
     # Return the result
-    return res, 400 if res.status == "error" else 200
+    return res, status_code(res)
+
+
+@patch_instruction_group.route("/patch_instruction_group/", methods=["POST"])
+@token_required
+@error_handler
+@param_check
+def patch_instruction_group_endpoint(
+    id: str, _id: str, version: int, operations: List[dict]
+) -> Tuple[dict, int]:
+    """Endpoint to handle step-level patches of an instruction group
+
+    Args:
+        id (str): ID of the instruction group to patch
+        _id (str): ID of the user patching the instruction group
+        version (int): Version the patch is based on
+        operations (List[dict]): Operations to apply in order, each with an
+            op of insert, replace, move or delete, an index, a step for
+            insert and replace, and a destination index "to" for move
+
+    Returns:
+        Tuple[dict, int]: Return the response of the endpoint
+    """
+
+    # Patch the instruction group
+    res = InstructionControl.patch_instruction_group(**locals())
+
+    # Return the result
+    return res, status_code(res)
 
 
 @save_checkpoint.route("/save_checkpoint/", methods=["POST"])
@@ -0,0 +1,33 @@
+# Flask related libraries and  blueprints(s)
+from . import metrics
+
+# Grab base MVC related modules for endpoints
+from controllers._base import Controller
+from config.config import config
+
+# Miscellaneous imports
+from flask import Response, request
+import hmac
+
+
+@metrics.route("/metrics", methods=["GET"])
+def metrics_endpoint() -> Response:
+    """Endpoint to scrape the request and database metrics of every worker
+    in the Prometheus text format
+
+    Returns:
+        Response: Metrics, or 401 without the configured bearer token
+    """
+
+    # Require the scrape token, there is no anonymous access
+    token = config.metrics.token
+    if not token or not hmac.compare_digest(
+        request.headers.get("Authorization", ""), f"Bearer {token}"
+    ):
+        return Response("Unauthorized\n", 401, mimetype="text/plain")
+
+    # Return the merged metrics
+    return Response(
+        Controller.METRICS.render(),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -0,0 +1,64 @@
+# Imports, the settings are renamed as gunicorn reads a config variable
+from config.config import config as settings
+import multiprocessing
+import tempfile
+import glob
+import os
+
+# Pick the server profile, GUNICORN_PROFILE overrides the configured one
+profile_name = os.environ.get("GUNICORN_PROFILE") or settings.gunicorn.profile
+if profile_name not in settings.gunicorn.profiles:
+    raise ValueError(f"Unknown gunicorn profile {profile_name}")
+profile = settings.gunicorn.profiles[profile_name]
+
+# Shared settings
+bind = os.environ.get("GUNICORN_BIND", settings.gunicorn.bind)
+timeout = settings.gunicorn.timeout
+keepalive = settings.gunicorn.keepalive
+
+# Worker model of the profile. Blocking workers need more processes than
+# threaded or cooperative ones, which wait on MongoDB concurrently
+worker_class = profile.worker_class
+if os.environ.get("GUNICORN_WORKERS"):
+    workers = int(os.environ["GUNICORN_WORKERS"])
+elif profile.get("workers"):
+    workers = profile.workers
+elif worker_class == "sync":
+    workers = multiprocessing.cpu_count() * 2 + 1
+else:
+    workers = multiprocessing.cpu_count()
+threads = profile.get("threads", 1)
+worker_connections = profile.get("worker_connections", 1000)
+
+# The cooperative workers must patch the standard library before the app
+# makes any lock or thread, so they never preload it
+preload_app = profile.preload_app and worker_class != "gevent"
+
+
+def post_fork(server, worker):
+    """Patch a cooperative worker before it loads the app. The driver is
+    imported in between, as its DNS resolver pulls in optional async
+    backends that look up select.epoll on import, which patching select
+    removes. The worker patches select itself right after this hook"""
+    if worker_class == "gevent":
+        from gevent import monkey
+
+        monkey.patch_all(select=False)
+        import pymongo  # noqa: F401
+
+
+# Directory the workers share their metrics through, a fresh one unless
+# configured. The workers inherit it from the environment
+metrics_dir = (
+    os.environ.get("METRICS_DIR")
+    or settings.metrics.dir
+    or tempfile.mkdtemp(prefix="metrics-")
+)
+os.environ["METRICS_DIR"] = metrics_dir
+
+
+def on_starting(server):
+    """Drop the metrics of a previous run before the workers start"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, "metrics-*.json*")):
+        os.remove(path)
@@ -1,15 +1,23 @@
 # Flask Imports
-from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from flask import Flask
 
 # Controller Import
+from controllers.indexes import IndexControl
 from controllers._base import Controller
+from controllers.users import UserControl
 
 # Miscellaneous Imports
 from config.config import config
-from datetime import timedelta
+from util.json_provider import FastJSONProvider
+from util.compression import Compressor
+from util.log import StructuredLogging
+from util.profiling import RequestProfiler, HEADER, sign
+from util.jwt_cache import init_jwt
 from typing import Any, Tuple
+from pprint import pprint  # noqa
+import logging
+import click
 import os
 
 # Endpoint imports
@@ -27,57 +35,78 @@ from endpoints.instructions import (
     get_instruction_group,
     get_users_instruction_groups,
     update_instruction_group,
+    patch_instruction_group,
     get_checkpoint,
     save_checkpoint,
     delete_instruction_group,
+    export_instruction_groups,
+    import_instruction_groups,
 )
 
+from endpoints.batch import batch
+
+from endpoints.metrics import metrics
+
 # endregion
 
+# Logger of the application
+logger = logging.getLogger(__name__)
+
 #
 #   FLASK APP CONFIGURATION
 #   region
 #
 
+# Write JSON logs from a background thread
+structured_logging = (
+    StructuredLogging(config.logging) if config.logging.enabled else None
+)
+
 # Make app instance
 app = Flask(__name__)
 
-# Set CORS for the application
-CORS(app, methods=["POST", "GET"])
+# Serialize responses with the fastest installed JSON encoder
+app.json = FastJSONProvider(app, config.json.encoder)
 
-# Initialize JWT functionalities
-app.config["JWT_SECRET_KEY"] = config.JWT.secret
-app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(
-    hours=config.JWT.access_expiry
+# Compress large responses with the content coding the client accepts
+compressor = Compressor(
+    config.compression.codecs,
+    config.compression.min_size,
+    config.compression.level,
+    config.compression.mimetypes,
 )
-app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(
-    hours=config.JWT.refresh_expiry
+if config.compression.enabled:
+    compressor.init_app(app)
+
+# Give every request an ID and log it
+if structured_logging is not None:
+    structured_logging.init_app(app)
+
+# Measure the requests of every route and the log queue
+if config.metrics.enabled:
+    Controller.METRICS.init_app(app)
+    if structured_logging is not None:
+        structured_logging.init_metrics(Controller.METRICS)
+
+# Profile the requests chosen by a signed header or sampling
+profiler = RequestProfiler(
+    config.profiling.dir,
+    config.profiling.secret,
+    config.profiling.sample_rate,
+    config.profiling.max_age,
+    config.profiling.max_profiles,
+    config.profiling.allocations,
+    config.profiling.top,
+    config.profiling.frames,
 )
-jwt = JWTManager(app)
-
-
-# Define the blacklist checker for JWT
-@jwt.token_in_blocklist_loader
-def check_if_token_in_blacklist(jwt_header, jwt_payload):
-    """Function override to check if the user's jwt information is part of
-    a blacklist
+if config.profiling.enabled:
+    profiler.init_app(app)
 
-    Args:
-        jwt_header (dict): UNUSED - JWT header information
-        jwt_payload (dict): JWT payload content
-
-    Returns:
-        bool: True if the user's JWT is in the blacklist, false if else
-    """
-
-    # Get the JWT token information
-    jti = jwt_payload["jti"]
-
-    # Check if the token is blacklisted
-    query = Controller.BLACKLIST_COL.find_one({"refresh_jti": jti})
+# Set CORS for the application
+CORS(app, methods=["POST", "GET"])
 
-    # Return true if it is, false if not
-    return query is not None
+# Initialize JWT functionalities
+jwt = init_jwt(app, config.JWT)
 
 
 # Customize expired token message
@@ -144,14 +173,86 @@ app.register_blueprint(
     get_users_instruction_groups, url_prefix="/instructions/"
 )
 app.register_blueprint(update_instruction_group, url_prefix="/instructions/")
+app.register_blueprint(patch_instruction_group, url_prefix="/instructions/")
 app.register_blueprint(get_checkpoint, url_prefix="/instructions/")
 app.register_blueprint(save_checkpoint, url_prefix="/instructions/")
 app.register_blueprint(delete_instruction_group, url_prefix="/instructions/")
+app.register_blueprint(export_instruction_groups, url_prefix="/instructions/")
+app.register_blueprint(import_instruction_groups, url_prefix="/instructions/")
+# endregion
+
+# */batch/
+# region
+app.register_blueprint(batch, url_prefix="/")
+# endregion
+
+# */metrics
+# region
+if config.metrics.enabled and config.metrics.token:
+    app.register_blueprint(metrics)
+elif config.metrics.enabled:
+    logger.warning("/metrics is not served as metrics.token is not set")
 # endregion
 
 #   endregion
 
 
+#
+#   DATABASE HANDLING
+#   region
+#
+
+
+@app.cli.command("ensure-indexes")
+@click.option("--check", is_flag=True, help="Only report index drift")
+def ensure_indexes_command(check: bool) -> None:
+    """Apply the declared indexes of every collection and report drift
+
+    Args:
+        check (bool): Only report the drift without creating any index
+    """
+
+    # Report the drift or apply the indexes
+    if check:
+        pprint(IndexControl.get_index_drift())
+    else:
+        pprint(IndexControl.ensure_indexes())
+
+
+@app.cli.command("duplicate-emails")
+def duplicate_emails_command() -> None:
+    """List the users whose emails keep the unique email index from being
+    built"""
+
+    # Report the users of every duplicated email
+    pprint(IndexControl.get_duplicate_emails())
+
+
+@app.cli.command("migrate-revocations")
+def migrate_revocations_command() -> None:
+    """Convert the legacy blacklist documents to one entry per token"""
+
+    # Convert the documents and report the amounts
+    pprint(UserControl.migrate_revocations())
+
+
+@app.cli.command("profile-header")
+def profile_header_command() -> None:
+    """Print a signed header that profiles the requests sending it"""
+
+    # Sign the current time with the profiling secret
+    if not config.profiling.secret:
+        raise click.ClickException("profiling.secret is not set")
+    click.echo(f"{HEADER}: {sign(config.profiling.secret)}")
+
+
+# Apply the declared indexes on startup if requested
+if config.indexes.ensure_on_startup:
+    IndexControl.provision()
+
+#   endregion
+
+
 #
 #   APP RUNTIME HANDLING
 #   region
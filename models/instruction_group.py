@@ -1,17 +1,35 @@
 # Imports
-from util.dict_obj import DictObj
-from typing import List
+from util.dict_obj import LazyDictObject
+from typing import List, Optional
 
 
 class InstructionGroup:
     """Instruction Group class model"""
 
+    # Fields that can be selected when reading instruction groups, along with
+    # how to project them
+    FIELDS = {
+        "_id": 1,
+        "name": 1,
+        "owner": 1,
+        "steps": 1,
+        "version": 1,
+        "step_count": {"$size": {"$ifNull": ["$steps", []]}},
+    }
+
+    # Named views of instruction groups
+    VIEWS = {
+        "full": None,
+        "summary": ["_id", "name", "step_count", "version"],
+    }
+
     def __init__(
         self: "InstructionGroup",
         _id: str,
         name: str,
         owner: str,
         steps: List[dict],
+        version: int = 0,
     ) -> None:
         """Constructor for the Instruction Group class
 
@@ -21,8 +39,46 @@ class InstructionGroup:
             name (str): Name of the instruction group
             owner (str): ID of the owner of the instruction group
             steps (List[dict]): List of steps of the instruction group
+            version (int, optional): Version counter of the instruction group,
+                incremented on every update. Defaults to 0.
         """
 
         # Save info
-        self.info = DictObj({k: v for k, v in locals().items() if k != "self"})
+        self.info = LazyDictObject(
+            {k: v for k, v in locals().items() if k != "self"}
+        )
         self.info.update(self.info.pop("kwargs", {}))
+
+    @staticmethod
+    def projection(
+        view: str = "full", fields: List[str] = []
+    ) -> Optional[dict]:
+        """Returns the MongoDB projection of a view or of selected fields
+
+        Args:
+            view (str, optional): Name of the view. Defaults to "full".
+            fields (List[str], optional): Fields to select instead of a view.
+                Defaults to [].
+
+        Raises:
+            ValueError: If the view or one of the fields is unknown
+
+        Returns:
+            Optional[dict]: Projection or None for the full document
+        """
+
+        # Get the fields of the view if no fields were selected
+        if not fields:
+            if view not in InstructionGroup.VIEWS:
+                raise ValueError(f"Unknown view {view}")
+            fields = InstructionGroup.VIEWS[view]
+            if fields is None:
+                return None
+
+        # Check the selected fields
+        unknown = [f for f in fields if f not in InstructionGroup.FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields {', '.join(unknown)}")
+
+        # Always project the ID of the instruction group
+        return {f: InstructionGroup.FIELDS[f] for f in ["_id", *fields]}
@@ -1,11 +1,37 @@
 # Imports
-from util.dict_obj import DictObj
+from util.dict_obj import DictObj, LazyDictObject
 from typing import List
 
 
 class User:
     """User class model"""
 
+    # Fields of the stored document the model is made from
+    PROJECTION = {
+        "_id": 1,
+        "first_name": 1,
+        "last_name": 1,
+        "email": 1,
+        "password": 1,
+    }
+
+    # Aggregation expression of get_fullname with the last name first, so
+    # that the database can compute it while updating the names
+    FULL_NAME = {
+        "$concat": [
+            "$last_name",
+            ", ",
+            "$first_name",
+            {
+                "$cond": [
+                    {"$eq": [{"$type": "$middle_initial"}, "missing"]},
+                    "",
+                    {"$concat": [" ", "$middle_initial"]},
+                ]
+            },
+        ]
+    }
+
     def __init__(
         self: "User",
         _id: str,
@@ -26,7 +52,9 @@ class User:
         """
 
         # Save info
-        self.info = DictObj({k: v for k, v in locals().items() if k != "self"})
+        self.info = LazyDictObject(
+            {k: v for k, v in locals().items() if k != "self"}
+        )
         self.info.update(self.info.pop("kwargs", {}))
 
         # Calculate user's full name
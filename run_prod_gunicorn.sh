@@ -1,6 +1,8 @@
 export RUN_MODE=1
-gunicorn --bind "0.0.0.0:5000" wsgi:app
+export GUNICORN_PROFILE=${1:-$GUNICORN_PROFILE}
+gunicorn -c gunicorn.conf.py wsgi:app
 echo
 echo "Unsetting RUN_MODE"
 echo "Exiting..."
-unset RUN_MODE
\ No newline at end of file
+unset RUN_MODE
+unset GUNICORN_PROFILE
\ No newline at end of file
@@ -0,0 +1,6 @@
+export RUN_MODE=1
+uvicorn --factory --host "0.0.0.0" --port 5000 asgi:create_app
+echo
+echo "Unsetting RUN_MODE"
+echo "Exiting..."
+unset RUN_MODE
\ No newline at end of file
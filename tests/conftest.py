@@ -0,0 +1,29 @@
+# Imports
+from typing import Callable
+import pytest
+import os
+
+# Run with the development configuration against the in-memory stand-in of
+# MongoDB, which counts every simulated round trip
+os.environ.setdefault("RUN_MODE", "0")
+from benchmarks import stand_in  # noqa: E402
+
+stand_in.install(0)
+
+
+@pytest.fixture
+def round_trips() -> Callable[..., int]:
+    """Count the round trips of a call
+
+    Returns:
+        Callable[..., int]: Function running an operation with its
+            arguments and returning the round trips it took
+    """
+
+    def count(func: Callable, *args: str, **kwargs: str) -> int:
+        """Run the operation and count its round trips"""
+        start = stand_in.ROUND_TRIPS
+        func(*args, **kwargs)
+        return stand_in.ROUND_TRIPS - start
+
+    return count
@@ -0,0 +1,78 @@
+# Imports
+from typing import Callable, Iterator
+from controllers._base import Controller
+from controllers.indexes import IndexControl
+from controllers.users import UserControl
+import pytest
+import uuid
+
+# Names of every registered test user
+NAME = {"first_name": "Ada", "last_name": "Lovelace"}
+
+
+@pytest.fixture
+def email() -> Iterator[str]:
+    """Email of a user of the test, removed along with the user"""
+    email = f"{uuid.uuid4().hex}@example.com"
+    yield email
+    Controller.USER_COL.delete_many({"email": email})
+
+
+@pytest.fixture
+def unique_email() -> Iterator[None]:
+    """Declare the unique email index and let registration find it"""
+    IndexControl.ensure_indexes()
+    UserControl._unique_email()
+    yield
+    Controller.UNIQUE_EMAIL = False
+
+
+def test_register_is_one_round_trip(
+    round_trips: Callable[..., int], email: str, unique_email: None
+) -> None:
+    """Registration relies on the unique email index instead of checking"""
+    assert (
+        round_trips(
+            UserControl.register_user, **NAME, email=email, password="pw"
+        )
+        == 1
+    )
+
+
+def test_duplicate_register_is_one_round_trip(
+    round_trips: Callable[..., int], email: str, unique_email: None
+) -> None:
+    """Known emails are rejected by the insert itself, whatever their case"""
+    UserControl.register_user(**NAME, email=email, password="pw")
+    res = None
+
+    def register() -> None:
+        """Register the email again in upper case"""
+        nonlocal res
+        res = UserControl.register_user(
+            **NAME, email=email.upper(), password="pw"
+        )
+
+    assert round_trips(register) == 1
+    assert res.status == "error"
+
+
+def test_login_is_one_round_trip(
+    round_trips: Callable[..., int], email: str, unique_email: None
+) -> None:
+    """Login fetches the hash along with the fields of the user model"""
+    UserControl.register_user(**NAME, email=email, password="pw")
+    assert round_trips(UserControl.login, email, "pw") == 1
+
+
+def test_update_user_is_one_round_trip(
+    round_trips: Callable[..., int], email: str, unique_email: None
+) -> None:
+    """Updates compute full_name in the database with a find-and-modify"""
+    UserControl.register_user(**NAME, email=email, password="pw")
+    id = Controller.USER_COL.find_one({"email": email})["_id"]
+    assert (
+        round_trips(UserControl.update_user, id, first_name="Augusta") == 1
+    )
+    user = Controller.USER_COL.find_one({"_id": id})
+    assert user["full_name"] == "Lovelace, Augusta"
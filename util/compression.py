@@ -0,0 +1,295 @@
+# Imports
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+from flask import Flask, Request, Response, request
+import threading
+import time
+import zlib
+
+
+class Codec(ABC):
+    """Content coding that compresses a body incrementally. Subclasses set
+    the coding name used in Accept-Encoding and Content-Encoding and make
+    the compressor
+
+    Args:
+        ABC (ABC): Abstract base class
+    """
+
+    # Name of the content coding
+    name = ""
+
+    def __init__(self: "Codec", level: int = 6) -> None:
+        """Constructor for the Codec class
+
+        Args:
+            self (Codec): Current class type
+            level (int, optional): Compression level. Defaults to 6.
+        """
+        self.level = level
+
+    @abstractmethod
+    def compressor(self: "Codec") -> Any:
+        """Make a compressor with compress(data) and flush() methods
+
+        Args:
+            self (Codec): Current class type
+
+        Returns:
+            Any: Compressor of a single body
+        """
+
+
+class GzipCodec(Codec):
+    """Gzip content coding from the standard library
+
+    Args:
+        Codec (Codec): Codec base type
+    """
+
+    name = "gzip"
+
+    def compressor(self: "GzipCodec") -> Any:
+        """Make a gzip compressor
+
+        Args:
+            self (GzipCodec): Current class type
+
+        Returns:
+            Any: Compressor of a single body
+        """
+        return zlib.compressobj(self.level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+
+class DeflateCodec(Codec):
+    """Deflate content coding from the standard library
+
+    Args:
+        Codec (Codec): Codec base type
+    """
+
+    name = "deflate"
+
+    def compressor(self: "DeflateCodec") -> Any:
+        """Make a zlib-wrapped deflate compressor
+
+        Args:
+            self (DeflateCodec): Current class type
+
+        Returns:
+            Any: Compressor of a single body
+        """
+        return zlib.compressobj(self.level, zlib.DEFLATED, zlib.MAX_WBITS)
+
+
+# Codecs by content coding name
+CODECS: Dict[str, type] = {"gzip": GzipCodec, "deflate": DeflateCodec}
+
+
+def register_codec(codec: type) -> None:
+    """Make a codec available to the Compressor
+
+    Args:
+        codec (type): Subclass of Codec
+    """
+    CODECS[codec.name] = codec
+
+
+class Compressor:
+    """Compresses responses with the best content coding the client
+    accepts, above a size threshold and only for compressible types"""
+
+    def __init__(
+        self: "Compressor",
+        codecs: List[str],
+        min_size: int = 1024,
+        level: int = 6,
+        mimetypes: Iterable[str] = ("application/json",),
+    ) -> None:
+        """Constructor for the Compressor class
+
+        Args:
+            self (Compressor): Current class type
+            codecs (List[str]): Names of the codecs to offer by preference,
+                names that are not registered are ignored
+            min_size (int, optional): Smallest body in bytes to compress.
+                Defaults to 1024.
+            level (int, optional): Compression level. Defaults to 6.
+            mimetypes (Iterable[str], optional): Compressible mimetypes.
+                Defaults to ("application/json",).
+        """
+
+        # Save settings
+        self.codecs = {
+            name: CODECS[name](level) for name in codecs if name in CODECS
+        }
+        self.min_size = min_size
+        self.mimetypes = set(mimetypes)
+
+        # Counters
+        self._lock = threading.Lock()
+        self.compressed = 0
+        self.skipped_small = 0
+        self.skipped_encoded = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def init_app(self: "Compressor", app: Flask) -> None:
+        """Compress the responses of a Flask application
+
+        Args:
+            self (Compressor): Current class type
+            app (Flask): Application to compress the responses of
+        """
+        app.after_request(self.after_request)
+
+    def negotiate(self: "Compressor", req: Request) -> Optional[Codec]:
+        """Pick the codec the client prefers among the offered ones
+
+        Args:
+            self (Compressor): Current class type
+            req (Request): Request with the Accept-Encoding header
+
+        Returns:
+            Optional[Codec]: Codec to use, None for the identity coding
+        """
+        name = req.accept_encodings.best_match(list(self.codecs))
+        return self.codecs.get(name)
+
+    def _count(self: "Compressor", **amounts: float) -> None:
+        """Add to the counters
+
+        Args:
+            self (Compressor): Current class type
+        """
+        with self._lock:
+            for name, amount in amounts.items():
+                setattr(self, name, getattr(self, name) + amount)
+
+    def _compress(
+        self: "Compressor", codec: Codec, chunks: Iterable[bytes]
+    ) -> Iterator[bytes]:
+        """Compress a body chunk by chunk as it is consumed
+
+        Args:
+            self (Compressor): Current class type
+            codec (Codec): Codec to compress with
+            chunks (Iterable[bytes]): Chunks of the body
+
+        Yields:
+            Iterator[bytes]: Compressed chunks
+        """
+
+        # Compress every chunk, only keeping non-empty output
+        compressor = codec.compressor()
+        size_in = size_out = 0
+        cpu = 0.0
+        try:
+            for chunk in chunks:
+                if isinstance(chunk, str):
+                    chunk = chunk.encode()
+                start = time.thread_time()
+                out = compressor.compress(chunk)
+                cpu += time.thread_time() - start
+                size_in += len(chunk)
+                size_out += len(out)
+                if out:
+                    yield out
+
+            # Write the end of the compressed stream
+            start = time.thread_time()
+            out = compressor.flush()
+            cpu += time.thread_time() - start
+            size_out += len(out)
+            yield out
+
+        # Count what was compressed, even if the client went away
+        finally:
+            self._count(
+                compressed=1,
+                bytes_in=size_in,
+                bytes_out=size_out,
+                cpu_seconds=cpu,
+            )
+
+    def after_request(self: "Compressor", response: Response) -> Response:
+        """Compress a response if the client accepts it and it is worth it
+
+        Args:
+            self (Compressor): Current class type
+            response (Response): Response to compress
+
+        Returns:
+            Response: Compressed or untouched response
+        """
+
+        # Skip bodies that are empty, passed through or not compressible
+        if (
+            response.status_code < 200
+            or response.status_code in (204, 304)
+            or response.direct_passthrough
+            or response.mimetype not in self.mimetypes
+        ):
+            return response
+        response.vary.add("Accept-Encoding")
+
+        # Skip bodies that already have a content coding
+        if "Content-Encoding" in response.headers:
+            self._count(skipped_encoded=1)
+            return response
+
+        # Skip buffered bodies below the threshold, streamed bodies have no
+        # known size and are always compressed
+        if (
+            not response.is_streamed
+            and response.calculate_content_length() < self.min_size
+        ):
+            self._count(skipped_small=1)
+            return response
+
+        # Skip if the client accepts none of the codecs
+        codec = self.negotiate(request)
+        if codec is None:
+            return response
+
+        # Compress buffered bodies at once to keep their length, and
+        # streamed bodies as they are produced
+        if response.is_streamed:
+            response.response = self._compress(codec, response.response)
+            response.headers.pop("Content-Length", None)
+        else:
+            response.set_data(
+                b"".join(self._compress(codec, [response.get_data()]))
+            )
+        response.headers["Content-Encoding"] = codec.name
+
+        # Compressed bodies differ byte for byte from the identity ones
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self: "Compressor") -> dict:
+        """Get the counters of the compressor
+
+        Args:
+            self (Compressor): Current class type
+
+        Returns:
+            dict: Counters and the ratio of compressed to original bytes
+        """
+        with self._lock:
+            return {
+                "codecs": list(self.codecs),
+                "min_size": self.min_size,
+                "compressed": self.compressed,
+                "skipped_small": self.skipped_small,
+                "skipped_encoded": self.skipped_encoded,
+                "bytes_in": self.bytes_in,
+                "bytes_out": self.bytes_out,
+                "ratio": self.bytes_out / self.bytes_in
+                if self.bytes_in
+                else None,
+                "cpu_seconds": self.cpu_seconds,
+            }
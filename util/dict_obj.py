@@ -52,6 +52,36 @@ class DictObject(dict):
         del self[name]
 
 
+class LazyDictObject(DictObject):
+    """Dictionary object representation that only wraps nested dictionaries
+    when they are accessed as attributes, instead of rebuilding the whole
+    structure up front
+
+    Args:
+        DictObject (DictObject): Base type
+    """
+
+    def __getattr__(self: "LazyDictObject", name: str) -> Any:
+        """Get the value of the reference key, wrapping nested dictionaries
+        on first access
+
+        Args:
+            self (LazyDictObject): LazyDictObject type
+            name (str): Reference key
+
+        Returns:
+            Any: The value of the referenced key
+        """
+
+        # Wrap plain nested dictionaries once and keep the wrapped version so
+        # that attribute updates land in the result
+        value = self[name]
+        if type(value) is dict:
+            value = LazyDictObject(value)
+            self[name] = value
+        return value
+
+
 def DictObj(config: dict) -> DictObject:
     """Dictionary object wrapper
 
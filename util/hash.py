@@ -1,5 +1,7 @@
 # Imports
+from typing import Any
 import hashlib
+import json
 
 
 def sha256(string: str, seed: str) -> str:
@@ -13,3 +15,16 @@ def sha256(string: str, seed: str) -> str:
         str: Hashed string
     """
     return hashlib.sha256((string+seed).encode()).hexdigest()
+
+
+def content_hash(data: Any) -> str:
+    """Stable hash of JSON-like data, used as an entity tag
+
+    Args:
+        data (Any): Data to hash, key order does not matter
+
+    Returns:
+        str: Hashed data
+    """
+    raw = json.dumps(data, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
@@ -0,0 +1,294 @@
+# Imports
+from flask.json.provider import DefaultJSONProvider, _default
+from typing import IO, Any, Callable, Iterable, Iterator, Optional, Tuple
+from flask import Flask, Response, stream_with_context
+import logging
+import json
+
+# Logger of the streamed responses
+logger = logging.getLogger(__name__)
+
+# Error marker that ends a streamed response which failed midway, as its
+# status was already sent
+STREAM_ERROR = {"error": "The response could not be completed"}
+
+# Use orjson when it is installed
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def get_encoder(name: str = "auto") -> str:
+    """Resolve the name of the JSON encoder to use
+
+    Args:
+        name (str, optional): Requested encoder, auto, orjson or stdlib.
+            Defaults to "auto".
+
+    Raises:
+        ValueError: If the requested encoder is unknown or not installed
+
+    Returns:
+        str: Name of the encoder, orjson or stdlib
+    """
+
+    # Pick the fastest installed encoder for auto
+    if name == "auto":
+        return "orjson" if orjson is not None else "stdlib"
+
+    # Check the requested encoder
+    if name == "orjson" and orjson is None:
+        raise ValueError("The orjson encoder is not installed")
+    if name not in ["orjson", "stdlib"]:
+        raise ValueError(f"Unknown JSON encoder {name}")
+    return name
+
+
+def dumps_bytes(
+    obj: Any,
+    encoder: str = "auto",
+    default: Callable[[Any], Any] = _default,
+    sort_keys: bool = False,
+) -> bytes:
+    """Serialize an object into compact JSON bytes
+
+    Args:
+        obj (Any): Object to serialize
+        encoder (str, optional): Encoder to use. Defaults to "auto".
+        default (Callable[[Any], Any], optional): Conversion of types the
+            encoder does not support. Defaults to Flask's conversion.
+        sort_keys (bool, optional): Should keys be sorted? Defaults to False.
+
+    Returns:
+        bytes: JSON document
+    """
+
+    # Serialize with orjson, which writes bytes directly. Dates are left to
+    # the default conversion so that they are written the same way as with
+    # the standard library, as HTTP dates
+    if get_encoder(encoder) == "orjson":
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return orjson.dumps(obj, default=default, option=option)
+
+    # Fall back to the standard library
+    return json.dumps(
+        obj, default=default, sort_keys=sort_keys, separators=(",", ":")
+    ).encode()
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that uses the fastest installed encoder and falls
+    back to the standard library
+
+    Args:
+        DefaultJSONProvider (DefaultJSONProvider): Flask's default provider
+    """
+
+    def __init__(self: "FastJSONProvider", app: Flask, encoder: str = "auto"):
+        """Constructor for the FastJSONProvider class
+
+        Args:
+            self (FastJSONProvider): Current class type
+            app (Flask): Application of the provider
+            encoder (str, optional): Encoder to use. Defaults to "auto".
+        """
+        super().__init__(app)
+        self.encoder = get_encoder(encoder)
+
+    def dumps(self: "FastJSONProvider", obj: Any, **kwargs: Any) -> str:
+        """Serialize data as JSON
+
+        Args:
+            self (FastJSONProvider): Current class type
+            obj (Any): Data to serialize
+
+        Returns:
+            str: JSON document
+        """
+
+        # Only the standard library supports the formatting arguments
+        if self.encoder == "stdlib" or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_bytes(
+            obj, self.encoder, self.default, self.sort_keys
+        ).decode()
+
+    def loads(self: "FastJSONProvider", s: Any, **kwargs: Any) -> Any:
+        """Deserialize data as JSON
+
+        Args:
+            self (FastJSONProvider): Current class type
+            s (Any): Text or UTF-8 bytes
+
+        Returns:
+            Any: Deserialized data
+        """
+
+        # Only the standard library supports the parsing arguments
+        if self.encoder == "stdlib" or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self: "FastJSONProvider", *args: Any, **kwargs: Any):
+        """Serialize the given arguments as JSON and return a response
+
+        Args:
+            self (FastJSONProvider): Current class type
+
+        Returns:
+            Response: Response with the JSON document as its body
+        """
+
+        # Let the standard library handle indented debug responses
+        if self.encoder == "stdlib" or (
+            (self.compact is None and self._app.debug) or self.compact is False
+        ):
+            return super().response(*args, **kwargs)
+
+        # Take the data as jsonify does, either arguments or keywords
+        if args and kwargs:
+            raise TypeError("Either positional or keyword arguments")
+        obj = args[0] if len(args) == 1 else (args or kwargs or None)
+
+        # Write the encoded bytes as the body without decoding them
+        body = dumps_bytes(obj, self.encoder, self.default, self.sort_keys)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
+
+
+def stream_array(
+    envelope: dict,
+    key: str,
+    items: Iterable[Any],
+    trailer: Optional[Callable[[], dict]] = None,
+    encoder: str = "auto",
+) -> Iterator[bytes]:
+    """Stream a JSON object whose key holds an array, one item at a time
+
+    Args:
+        envelope (dict): Fields written before the array
+        key (str): Key of the array
+        items (Iterable[Any]): Items of the array, consumed lazily
+        trailer (Optional[Callable[[], dict]], optional): Returns fields
+            written after the array, called once the items are consumed.
+            Defaults to None.
+        encoder (str, optional): Encoder to use. Defaults to "auto".
+
+    Yields:
+        Iterator[bytes]: Chunks of the JSON document
+    """
+
+    # Write the fields before the array and open it
+    head = dumps_bytes(envelope, encoder)[:-1]
+    yield head + (b"," if len(envelope) else b"") + dumps_bytes(key, encoder)
+    yield b":["
+
+    # Write the items as they come, then the trailing fields. A failure
+    # ends the document with the error marker instead
+    try:
+        for index, item in enumerate(items):
+            yield (b"," if index else b"") + dumps_bytes(item, encoder)
+        tail = dumps_bytes(trailer() if trailer else {}, encoder)
+    except Exception:
+        logger.exception("Streaming the response failed")
+        tail = dumps_bytes(STREAM_ERROR, encoder)
+
+    # Close the array, write the trailing fields and close the object
+    yield b"]" + (b"," + tail[1:] if len(tail) > 2 else b"}") + b"\n"
+
+
+def stream_response(
+    envelope: dict,
+    key: str,
+    items: Iterable[Any],
+    trailer: Optional[Callable[[], dict]] = None,
+    encoder: str = "auto",
+) -> Response:
+    """Make a chunked response that streams a JSON object with an array
+
+    Args:
+        envelope (dict): Fields written before the array
+        key (str): Key of the array
+        items (Iterable[Any]): Items of the array, consumed lazily
+        trailer (Optional[Callable[[], dict]], optional): Returns fields
+            written after the array. Defaults to None.
+        encoder (str, optional): Encoder to use. Defaults to "auto".
+
+    Returns:
+        Response: Streamed response, generated within the request's context
+    """
+    return Response(
+        stream_with_context(
+            stream_array(envelope, key, items, trailer, encoder)
+        ),
+        mimetype="application/json",
+    )
+
+
+def stream_lines(
+    items: Iterable[Any], encoder: str = "auto"
+) -> Iterator[bytes]:
+    """Stream items as newline-delimited JSON, one line per item
+
+    Args:
+        items (Iterable[Any]): Items to write, consumed lazily
+        encoder (str, optional): Encoder to use. Defaults to "auto".
+
+    Yields:
+        Iterator[bytes]: JSON line of every item, followed by a line with
+            the error marker if the items failed midway
+    """
+    try:
+        for item in items:
+            yield dumps_bytes(item, encoder) + b"\n"
+    except Exception:
+        logger.exception("Streaming the response failed")
+        yield dumps_bytes(STREAM_ERROR, encoder) + b"\n"
+
+
+def ndjson_response(items: Iterable[Any], encoder: str = "auto") -> Response:
+    """Make a chunked response that streams items as newline-delimited JSON
+
+    Args:
+        items (Iterable[Any]): Items to write, consumed lazily
+        encoder (str, optional): Encoder to use. Defaults to "auto".
+
+    Returns:
+        Response: Streamed response, generated within the request's context
+    """
+    return Response(
+        stream_with_context(stream_lines(items, encoder)),
+        mimetype="application/x-ndjson",
+    )
+
+
+def read_lines(
+    stream: IO[bytes], max_bytes: int
+) -> Iterator[Tuple[int, Optional[bytes]]]:
+    """Read a stream line by line without holding more than a line
+
+    Args:
+        stream (IO[bytes]): Stream to read, such as a request body
+        max_bytes (int): Maximum length of a line
+
+    Yields:
+        Iterator[Tuple[int, Optional[bytes]]]: Number of every line, from 1,
+            along with the line or None if it was too long
+    """
+    number = 0
+    while True:
+        # Read up to the end of the line or one byte past the limit
+        line = stream.readline(max_bytes + 1)
+        if not line:
+            return
+        number += 1
+
+        # Skip the rest of a line that is too long
+        if len(line) > max_bytes and not line.endswith(b"\n"):
+            while line and not line.endswith(b"\n"):
+                line = stream.readline(max_bytes + 1)
+            yield number, None
+        else:
+            yield number, line
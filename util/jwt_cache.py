@@ -0,0 +1,161 @@
+# Imports
+from flask_jwt_extended import JWTManager, decode_token
+from typing import Any, Optional, Tuple
+from collections import OrderedDict
+from datetime import timedelta
+from flask import Flask
+import threading
+import hashlib
+import time
+
+
+def init_jwt(app: Flask, settings: Any) -> JWTManager:
+    """Give a Flask application the JWT settings of the API, which both the
+    WSGI and the ASGI applications verify and issue tokens with
+
+    Args:
+        app (Flask): Application to configure
+        settings (Any): Settings with the secret and the access and refresh
+            expiries in hours
+
+    Returns:
+        JWTManager: JWT manager of the application
+    """
+    app.config["JWT_SECRET_KEY"] = settings.secret
+    app.config["JWT_ACCESS_TOKEN_EXPIRES"] = timedelta(
+        hours=settings.access_expiry
+    )
+    app.config["JWT_REFRESH_TOKEN_EXPIRES"] = timedelta(
+        hours=settings.refresh_expiry
+    )
+    return JWTManager(app)
+
+
+class ClaimsCache:
+    """Bounded cache of verified JWT claims keyed by the digest of the
+    token, so that a token seen again is not verified again
+
+    Entries are only kept until the token expires, and least recently used
+    entries are evicted first. Revocation is not cached, it must still be
+    checked on every request.
+    """
+
+    def __init__(self: "ClaimsCache", max_size: int = 4096) -> None:
+        """Constructor for the ClaimsCache class
+
+        Args:
+            self (ClaimsCache): Current class type
+            max_size (int, optional): Maximum amount of tokens, 0 to disable
+                the cache. Defaults to 4096.
+        """
+
+        # Save settings
+        self.max_size = max_size
+
+        # Claims and expiry by token digest, least recently used first
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self: "ClaimsCache", token: str) -> Optional[dict]:
+        """Get the verified claims of a token that has not expired
+
+        Args:
+            self (ClaimsCache): Current class type
+            token (str): Encoded token
+
+        Returns:
+            Optional[dict]: Claims of the token or None
+        """
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self: "ClaimsCache", token: str, claims: dict) -> None:
+        """Cache the verified claims of a token until it expires
+
+        Args:
+            self (ClaimsCache): Current class type
+            token (str): Encoded token
+            claims (dict): Verified claims of the token
+        """
+
+        # Only cache tokens that are valid now and expire
+        now = time.time()
+        if (
+            not self.max_size
+            or "exp" not in claims
+            or claims.get("nbf", 0) > now
+        ):
+            return
+
+        # Add the entry, evicting the least recently used ones if full
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            self._entries[key] = (claims["exp"], claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self: "ClaimsCache") -> dict:
+        """Get the counters of the cache
+
+        Args:
+            self (ClaimsCache): Current class type
+
+        Returns:
+            dict: Counters of the cache along with its hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+            }
+
+
+def decode_verified(token: str, cache: Optional[ClaimsCache] = None) -> dict:
+    """Verify and decode a token once, answering from the cache when the
+    same token was verified before
+
+    Needs a Flask application context so that the token is verified with
+    the application's JWT settings. The returned claims are shared and must
+    not be modified.
+
+    Args:
+        token (str): Encoded token
+        cache (Optional[ClaimsCache], optional): Cache of verified claims.
+            Defaults to None.
+
+    Raises:
+        jwt.exceptions.PyJWTError: If the token is invalid or expired
+
+    Returns:
+        dict: Verified claims of the token
+    """
+    claims = cache.get(token) if cache is not None else None
+    if claims is None:
+        claims = decode_token(token)
+        if cache is not None:
+            cache.set(token, claims)
+    return claims
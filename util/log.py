@@ -0,0 +1,405 @@
+# Imports
+from flask import Flask, Response, g, has_request_context, request
+from logging.handlers import QueueHandler, QueueListener
+from util.metrics import Metrics
+from typing import Any, Optional
+import importlib
+import threading
+import datetime
+import atexit
+import copy
+import logging
+import random
+import json
+import time
+import uuid
+import sys
+import re
+import os
+
+# Attributes every log record has, the others were given through extra
+STANDARD_ATTRS = set(
+    logging.LogRecord("", 0, "", 0, "", None, None).__dict__
+) | {"message", "asctime", "request_id", "route", "method"}
+
+# Request IDs taken from the X-Request-ID header of the client
+REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+
+class JsonFormatter(logging.Formatter):
+    """Formats records as single-line JSON objects with the request context
+    and every field given through extra
+
+    Args:
+        logging.Formatter (logging.Formatter): Base formatter
+    """
+
+    def format(self: "JsonFormatter", record: logging.LogRecord) -> str:
+        """Format a record
+
+        Args:
+            self (JsonFormatter): Current class type
+            record (logging.LogRecord): Record to format
+
+        Returns:
+            str: JSON line of the record
+        """
+
+        # Base fields along with the request context if there was one
+        entry = {
+            "time": datetime.datetime.fromtimestamp(
+                record.created, datetime.timezone.utc
+            ).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "pid": record.process,
+        }
+        for name in ["request_id", "route", "method"]:
+            if getattr(record, name, None) is not None:
+                entry[name] = getattr(record, name)
+
+        # Fields given through extra and the traceback
+        for name, value in record.__dict__.items():
+            if name not in STANDARD_ATTRS and not name.startswith("_"):
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class RequestContextFilter(logging.Filter):
+    """Adds the request ID, route and method to the records of a request,
+    and samples the records below a level once per request
+
+    Runs in the thread that logs, before the record is queued, so that the
+    request context is still available
+
+    Args:
+        logging.Filter (logging.Filter): Base filter
+    """
+
+    def __init__(
+        self: "RequestContextFilter",
+        sample_rate: float = 1.0,
+        always_level: int = logging.WARNING,
+    ) -> None:
+        """Constructor for the RequestContextFilter class
+
+        Args:
+            self (RequestContextFilter): Current class type
+            sample_rate (float, optional): Share of the requests, or of the
+                records outside requests, whose records below always_level
+                are kept. Defaults to 1.0.
+            always_level (int, optional): Level from which records are
+                always kept. Defaults to logging.WARNING.
+        """
+        super().__init__()
+        self.sample_rate = sample_rate
+        self.always_level = always_level
+
+    def sampled(self: "RequestContextFilter") -> bool:
+        """Check if the records below always_level of the current request,
+        or the current record outside requests, are kept
+
+        Args:
+            self (RequestContextFilter): Current class type
+
+        Returns:
+            bool: True if they are kept
+        """
+        if self.sample_rate >= 1:
+            return True
+        if not has_request_context():
+            return random.random() < self.sample_rate
+        if "_log_sampled" not in g:
+            g._log_sampled = random.random() < self.sample_rate
+        return g._log_sampled
+
+    def filter(
+        self: "RequestContextFilter", record: logging.LogRecord
+    ) -> bool:
+        """Sample a record and add the request context to it
+
+        Args:
+            self (RequestContextFilter): Current class type
+            record (logging.LogRecord): Record to filter
+
+        Returns:
+            bool: True if the record is kept
+        """
+        if record.levelno < self.always_level and not self.sampled():
+            return False
+        if has_request_context():
+            record.request_id = g.get("request_id")
+            record.route = (
+                request.url_rule.rule if request.url_rule else request.path
+            )
+            record.method = request.method
+        return True
+
+
+def native(module: str, name: str) -> Any:
+    """Get an object of the standard library as it was before gevent
+    patched it, or as it is if gevent is not used
+
+    Args:
+        module (str): Name of the module
+        name (str): Name of the object
+
+    Returns:
+        Any: Unpatched object
+    """
+    try:
+        from gevent import monkey
+    except ImportError:
+        return getattr(importlib.import_module(module), name)
+    return monkey.get_original(module, name)
+
+
+class WriterListener(QueueListener):
+    """Queue listener whose writer runs on an OS thread even when gevent
+    patched threads into greenlets, so that writing to the sink never
+    waits on the worker's event loop
+
+    Args:
+        QueueListener (QueueListener): Base queue listener
+    """
+
+    def start(self: "WriterListener") -> None:
+        """Start the writer thread
+
+        Args:
+            self (WriterListener): Current class type
+        """
+        self._done = native("_thread", "allocate_lock")()
+        self._done.acquire()
+        native("_thread", "start_new_thread")(self._run, ())
+
+    def _run(self: "WriterListener") -> None:
+        """Write the queued records until stopped"""
+        try:
+            self._monitor()
+        finally:
+            self._done.release()
+
+    def stop(self: "WriterListener") -> None:
+        """Write the queued records and wait for the writer thread
+
+        Args:
+            self (WriterListener): Current class type
+        """
+        self.enqueue_sentinel()
+        self._done.acquire()
+
+
+class NonBlockingHandler(QueueHandler):
+    """Queue handler that never waits on the sink. Records are dropped and
+    counted when the queue is full, and the writer thread is started in
+    the process that logs, so that forked workers get their own
+
+    Args:
+        QueueHandler (QueueHandler): Base queue handler
+    """
+
+    def __init__(
+        self: "NonBlockingHandler",
+        sink: logging.Handler,
+        queue_size: int = 10000,
+    ) -> None:
+        """Constructor for the NonBlockingHandler class
+
+        Args:
+            self (NonBlockingHandler): Current class type
+            sink (logging.Handler): Handler the writer thread emits to
+            queue_size (int, optional): Maximum amount of queued records.
+                Defaults to 10000.
+        """
+        super().__init__(native("queue", "SimpleQueue")())
+        self.sink = sink
+        self.queue_size = queue_size
+        self.dropped = 0
+        self._listener: Optional[QueueListener] = None
+        self._pid: Optional[int] = None
+        self._start_lock = threading.Lock()
+
+    def _ensure_listener(self: "NonBlockingHandler") -> None:
+        """Start the writer thread for the current process
+
+        Args:
+            self (NonBlockingHandler): Current class type
+        """
+
+        # Skip if the writer already runs in this process
+        if self._pid == os.getpid():
+            return
+
+        with self._start_lock:
+            if self._pid == os.getpid():
+                return
+
+            # Use a fresh queue, the one of a parent may be mid-operation.
+            # It is made from unpatched primitives, as the writer thread
+            # blocks on it
+            self.queue = native("queue", "SimpleQueue")()
+            self._listener = WriterListener(
+                self.queue, self.sink, respect_handler_level=True
+            )
+            self._listener.start()
+            atexit.register(self.stop)
+            self._pid = os.getpid()
+
+    def prepare(
+        self: "NonBlockingHandler", record: logging.LogRecord
+    ) -> logging.LogRecord:
+        """Render the message and traceback of a record so that it can be
+        formatted by the writer thread, keeping the other fields as is
+
+        Args:
+            self (NonBlockingHandler): Current class type
+            record (logging.LogRecord): Record to prepare
+
+        Returns:
+            logging.LogRecord: Copy of the record without arguments
+        """
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(
+                record.exc_info
+            )
+            record.exc_info = None
+        return record
+
+    def enqueue(
+        self: "NonBlockingHandler", record: logging.LogRecord
+    ) -> None:
+        """Queue a record without waiting, dropping it if the queue is full
+
+        Args:
+            self (NonBlockingHandler): Current class type
+            record (logging.LogRecord): Prepared record
+        """
+        self._ensure_listener()
+        if self.queue.qsize() >= self.queue_size:
+            self.dropped += 1
+        else:
+            self.queue.put_nowait(record)
+
+    def stop(self: "NonBlockingHandler") -> None:
+        """Write the queued records and stop the writer thread
+
+        Args:
+            self (NonBlockingHandler): Current class type
+        """
+        if self._listener is not None and self._pid == os.getpid():
+            self._listener.stop()
+            self._listener, self._pid = None, None
+
+
+class StructuredLogging:
+    """Structured JSON logging of the application, written to its sink by
+    a background thread, along with request IDs and an access log"""
+
+    def __init__(self: "StructuredLogging", settings: Any) -> None:
+        """Constructor for the StructuredLogging class, which configures
+        the root logger
+
+        Args:
+            self (StructuredLogging): Current class type
+            settings (Any): Settings with the level, the levels of other
+                loggers, sample_rate, always_level, access_log, queue_size
+                and sink, either stdout, stderr or a file path
+        """
+
+        # Save settings
+        self.access_log = settings.access_log
+        self.logger = logging.getLogger("access")
+
+        # Write JSON lines to the sink from a background thread
+        if settings.sink in ["stdout", "stderr"]:
+            sink = logging.StreamHandler(getattr(sys, settings.sink))
+        else:
+            sink = logging.FileHandler(settings.sink)
+        sink.setFormatter(JsonFormatter())
+        self.handler = NonBlockingHandler(sink, settings.queue_size)
+        self.handler.addFilter(
+            RequestContextFilter(
+                settings.sample_rate,
+                logging.getLevelName(settings.always_level),
+            )
+        )
+
+        # Route every logger through the queue
+        root = logging.getLogger()
+        root.handlers = [self.handler]
+        root.setLevel(settings.level)
+        for name, level in settings.levels.items():
+            logging.getLogger(name).setLevel(level)
+
+    def init_app(self: "StructuredLogging", app: Flask) -> None:
+        """Give every request of a Flask application an ID and log it
+
+        Args:
+            self (StructuredLogging): Current class type
+            app (Flask): Application to log the requests of
+        """
+        app.logger.handlers = []
+        app.logger.propagate = True
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+
+    def _before_request(self: "StructuredLogging") -> None:
+        """Take the request ID of the client or make one"""
+        request_id = request.headers.get("X-Request-ID", "")
+        g.request_id = (
+            request_id if REQUEST_ID.match(request_id) else uuid.uuid4().hex
+        )
+        g._log_start = time.perf_counter()
+
+    def _after_request(
+        self: "StructuredLogging", response: Response
+    ) -> Response:
+        """Return the request ID and log the request"""
+        if "request_id" not in g:
+            return response
+        response.headers["X-Request-ID"] = g.request_id
+        if self.access_log:
+            self.logger.info(
+                "Request handled",
+                extra={
+                    "status": response.status_code,
+                    "duration_ms": round(
+                        (time.perf_counter() - g._log_start) * 1000, 3
+                    ),
+                },
+            )
+        return response
+
+    def init_metrics(self: "StructuredLogging", metrics: Metrics) -> None:
+        """Export the queued and dropped records along with the metrics
+
+        Args:
+            self (StructuredLogging): Current class type
+            metrics (Metrics): Metrics of the worker
+        """
+        stats = self.stats
+        metrics.track("log_records_queued", lambda: stats()["queued"])
+        metrics.track("log_records_dropped_total", lambda: stats()["dropped"])
+
+    def stats(self: "StructuredLogging") -> dict:
+        """Get the state of the queue
+
+        Args:
+            self (StructuredLogging): Current class type
+
+        Returns:
+            dict: Queued and dropped records
+        """
+        return {
+            "queued": self.handler.queue.qsize(),
+            "dropped": self.handler.dropped,
+        }
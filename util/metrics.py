@@ -0,0 +1,475 @@
+# Imports
+from apscheduler.schedulers.background import BackgroundScheduler
+from pymongo.monitoring import CommandListener
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+from flask import Flask, Response, g, request
+import threading
+import atexit
+import json
+import glob
+import time
+import os
+
+# Labels of a sample as sorted name and value pairs
+Labels = Tuple[Tuple[str, str], ...]
+
+# Type and help text of every metric
+METRICS: Dict[str, Tuple[str, str]] = {
+    "http_requests_total": ("counter", "Requests by route, method and status"),
+    "http_request_errors_total": (
+        "counter",
+        "Requests answered with a 4xx or 5xx status by route and method",
+    ),
+    "http_request_duration_seconds": (
+        "histogram",
+        "Seconds until the route returned its response",
+    ),
+    "http_requests_in_flight": ("gauge", "Requests being handled by route"),
+    "mongo_command_duration_seconds": (
+        "histogram",
+        "Seconds of MongoDB commands by collection and command",
+    ),
+    "mongo_command_failures_total": (
+        "counter",
+        "Failed MongoDB commands by collection and command",
+    ),
+    "log_records_queued": (
+        "gauge",
+        "Log records waiting for the writer thread",
+    ),
+    "log_records_dropped_total": (
+        "counter",
+        "Log records dropped because the log queue was full",
+    ),
+}
+
+
+def _labels(**labels: Any) -> Labels:
+    """Make the labels of a sample"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    """Escape a label value for the text exposition format"""
+    return (
+        value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    )
+
+
+def _format(name: str, labels: Iterable[Tuple[str, str]], value: Any) -> str:
+    """Format a sample in the text exposition format"""
+    pairs = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{pairs}}} {value}" if pairs else f"{name} {value}"
+
+
+class Metrics:
+    """Per-worker registry of request and database metrics
+
+    Every worker keeps its own counters, gauges and histograms. When a
+    directory is set, every worker also writes a snapshot of them there on
+    an interval, and a scrape served by any worker merges the snapshots of
+    all of them, the way the multiprocess mode of the Prometheus client
+    does. Counters and histograms of exited workers are kept, their gauges
+    are dropped.
+    """
+
+    def __init__(
+        self: "Metrics",
+        buckets: Iterable[float],
+        directory: str = "",
+        flush_interval: float = 5.0,
+    ) -> None:
+        """Constructor for the Metrics class
+
+        Args:
+            self (Metrics): Current class type
+            buckets (Iterable[float]): Upper bounds in seconds of the
+                histogram buckets
+            directory (str, optional): Directory shared by the workers to
+                merge their metrics, empty to only serve the worker's own.
+                Defaults to "".
+            flush_interval (float, optional): Seconds between the snapshots
+                of a worker. Defaults to 5.0.
+        """
+
+        # Save settings
+        self.buckets = sorted(buckets)
+        self.directory = directory
+        self.flush_interval = flush_interval
+
+        # Samples by metric name and labels. Histograms hold the count of
+        # every bucket, then the sum and the count of the observations
+        self._counters: Dict[Tuple[str, Labels], float] = {}
+        self._gauges: Dict[Tuple[str, Labels], float] = {}
+        self._histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        self._lock = threading.Lock()
+
+        # Functions that give the value of a metric kept elsewhere when a
+        # snapshot is taken
+        self._tracked: Dict[str, Callable[[], float]] = {}
+
+        # The snapshot job is started lazily so that it lives in the worker
+        # process and not in a parent that forks before serving
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._pid: Optional[int] = None
+
+    def inc(
+        self: "Metrics", name: str, amount: float = 1, **labels: Any
+    ) -> None:
+        """Add to a counter
+
+        Args:
+            self (Metrics): Current class type
+            name (str): Name of the counter
+            amount (float, optional): Amount to add. Defaults to 1.
+        """
+        key = (name, _labels(**labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def add(self: "Metrics", name: str, amount: float, **labels: Any) -> None:
+        """Add to a gauge, negative amounts lower it
+
+        Args:
+            self (Metrics): Current class type
+            name (str): Name of the gauge
+            amount (float): Amount to add
+        """
+        key = (name, _labels(**labels))
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + amount
+
+    def observe(
+        self: "Metrics", name: str, value: float, **labels: Any
+    ) -> None:
+        """Record an observation in a histogram
+
+        Args:
+            self (Metrics): Current class type
+            name (str): Name of the histogram
+            value (float): Observed value
+        """
+        key = (name, _labels(**labels))
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (
+                    len(self.buckets) + 3
+                )
+            histogram[index] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def track(
+        self: "Metrics", name: str, func: Callable[[], float]
+    ) -> None:
+        """Read a counter or gauge kept elsewhere whenever a snapshot is
+        taken, so that it costs nothing in between
+
+        Args:
+            self (Metrics): Current class type
+            name (str): Name of the counter or gauge
+            func (Callable[[], float]): Function that gives its value
+        """
+        self._tracked[name] = func
+
+    def init_app(self: "Metrics", app: Flask) -> None:
+        """Measure the requests of a Flask application
+
+        Args:
+            self (Metrics): Current class type
+            app (Flask): Application to measure
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _before_request(self: "Metrics") -> None:
+        """Start timing a request and count it as in flight"""
+        self._ensure_scheduler()
+        g._metrics_route = (
+            request.url_rule.rule if request.url_rule else "unmatched"
+        )
+        g._metrics_start = time.perf_counter()
+        self.add("http_requests_in_flight", 1, route=g._metrics_route)
+
+    def _after_request(self: "Metrics", response: Response) -> Response:
+        """Keep the status of the response"""
+        g._metrics_status = response.status_code
+        return response
+
+    def _teardown_request(
+        self: "Metrics", exc: Optional[BaseException]
+    ) -> None:
+        """Count a finished request along with its duration and status,
+        requests that raised count as 500"""
+
+        # Skip requests that were never started, e.g. when another hook
+        # answered first
+        start = g.pop("_metrics_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        route = g.pop("_metrics_route")
+        status = g.pop("_metrics_status", 500)
+
+        # Count the request
+        self.add("http_requests_in_flight", -1, route=route)
+        self.inc(
+            "http_requests_total",
+            route=route,
+            method=request.method,
+            status=status,
+        )
+        if status >= 400:
+            self.inc(
+                "http_request_errors_total", route=route, method=request.method
+            )
+        self.observe(
+            "http_request_duration_seconds",
+            elapsed,
+            route=route,
+            method=request.method,
+        )
+
+    def snapshot(self: "Metrics") -> dict:
+        """Get a JSON serializable copy of the worker's samples
+
+        Args:
+            self (Metrics): Current class type
+
+        Returns:
+            dict: Samples of the worker along with its process ID
+        """
+        tracked = {name: func() for name, func in self._tracked.items()}
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            for name, value in tracked.items():
+                samples = counters if METRICS[name][0] == "counter" else gauges
+                samples[(name, ())] = value
+            return {
+                "pid": os.getpid(),
+                "buckets": self.buckets,
+                "counters": [
+                    [name, labels, value]
+                    for (name, labels), value in counters.items()
+                ],
+                "gauges": [
+                    [name, labels, value]
+                    for (name, labels), value in gauges.items()
+                ],
+                "histograms": [
+                    [name, labels, list(values)]
+                    for (name, labels), values in self._histograms.items()
+                ],
+            }
+
+    def flush(self: "Metrics") -> None:
+        """Write the worker's snapshot to the shared directory
+
+        Args:
+            self (Metrics): Current class type
+        """
+        if not self.directory:
+            return
+        path = os.path.join(self.directory, f"metrics-{os.getpid()}.json")
+        with open(path + ".tmp", "w") as f:
+            json.dump(self.snapshot(), f)
+        os.replace(path + ".tmp", path)
+
+    def _ensure_scheduler(self: "Metrics") -> None:
+        """Start the periodic snapshot job for the current process
+
+        Args:
+            self (Metrics): Current class type
+        """
+
+        # Skip if there is nothing to share or the job already runs
+        if not self.directory or self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            # Write a snapshot on an interval and on exit
+            os.makedirs(self.directory, exist_ok=True)
+            self._scheduler = BackgroundScheduler(daemon=True)
+            self._scheduler.add_job(
+                self.flush,
+                "interval",
+                seconds=self.flush_interval,
+                max_instances=1,
+                coalesce=True,
+            )
+            self._scheduler.start()
+            atexit.register(self.flush)
+            self._pid = os.getpid()
+
+    def collect(self: "Metrics") -> List[dict]:
+        """Get the snapshots of every worker, the current one being fresh
+
+        Args:
+            self (Metrics): Current class type
+
+        Returns:
+            List[dict]: Snapshots of the workers
+        """
+
+        # Only the current worker without a shared directory
+        if not self.directory:
+            return [self.snapshot()]
+
+        # Read the snapshots of the other workers
+        self.flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(self.directory, "metrics-*.json")):
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self: "Metrics") -> str:
+        """Merge the snapshots of every worker in the text exposition format
+
+        Args:
+            self (Metrics): Current class type
+
+        Returns:
+            str: Metrics of every worker
+        """
+
+        # Sum the samples of the workers, gauges only of the live ones
+        counters: Dict[Tuple[str, Labels], float] = {}
+        gauges: Dict[Tuple[str, Labels], float] = {}
+        histograms: Dict[Tuple[str, Labels], List[float]] = {}
+        for snapshot in self.collect():
+            for name, labels, value in snapshot["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            if _alive(snapshot["pid"]):
+                for name, labels, value in snapshot["gauges"]:
+                    key = (name, tuple(map(tuple, labels)))
+                    gauges[key] = gauges.get(key, 0) + value
+            for name, labels, values in snapshot["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                merged = histograms.setdefault(key, [0] * len(values))
+                for i, value in enumerate(values):
+                    merged[i] += value
+
+        # Write every metric with its type and help text
+        lines = []
+        for name, (kind, text) in METRICS.items():
+            samples = {"counter": counters, "gauge": gauges}.get(
+                kind, histograms
+            )
+            keys = sorted(k for k in samples if k[0] == name)
+            if not keys:
+                continue
+            lines.append(f"# HELP {name} {text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key in keys:
+                labels = key[1]
+                if kind != "histogram":
+                    lines.append(_format(name, labels, samples[key]))
+                    continue
+
+                # Buckets are cumulative, the last one holds every value
+                values, total = samples[key], 0
+                bounds = [str(b) for b in self.buckets] + ["+Inf"]
+                for bound, count in zip(bounds, values):
+                    total += count
+                    lines.append(
+                        _format(
+                            f"{name}_bucket", labels + (("le", bound),), total
+                        )
+                    )
+                lines.append(_format(f"{name}_sum", labels, values[-2]))
+                lines.append(_format(f"{name}_count", labels, values[-1]))
+        return "\n".join(lines) + "\n"
+
+
+def _alive(pid: int) -> bool:
+    """Check if a process still runs"""
+    if pid == os.getpid():
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class CommandMetrics(CommandListener):
+    """Command listener that records the duration and failures of MongoDB
+    commands by collection and command name
+
+    Args:
+        CommandListener (CommandListener): pymongo's command listener
+            interface
+    """
+
+    def __init__(self: "CommandMetrics", metrics: Metrics) -> None:
+        """Constructor for the CommandMetrics class
+
+        Args:
+            self (CommandMetrics): Current class type
+            metrics (Metrics): Registry to record into
+        """
+        self.metrics = metrics
+
+        # Collection of every running command, the later events only carry
+        # the command name
+        self._running: Dict[Tuple[Any, int], str] = {}
+        self._lock = threading.Lock()
+
+    def started(self: "CommandMetrics", event: Any) -> None:
+        """Command was sent, remember its collection"""
+        target = event.command.get(event.command_name)
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        with self._lock:
+            self._running[(event.connection_id, event.request_id)] = (
+                target if isinstance(target, str) else ""
+            )
+
+    def _finish(self: "CommandMetrics", event: Any) -> str:
+        """Forget a finished command and get its collection"""
+        with self._lock:
+            return self._running.pop(
+                (event.connection_id, event.request_id), ""
+            )
+
+    def succeeded(self: "CommandMetrics", event: Any) -> None:
+        """Command succeeded, record its duration"""
+        self.metrics.observe(
+            "mongo_command_duration_seconds",
+            event.duration_micros / 1e6,
+            collection=self._finish(event),
+            command=event.command_name,
+        )
+
+    def failed(self: "CommandMetrics", event: Any) -> None:
+        """Command failed, record its duration and count the failure"""
+        collection = self._finish(event)
+        self.metrics.observe(
+            "mongo_command_duration_seconds",
+            event.duration_micros / 1e6,
+            collection=collection,
+            command=event.command_name,
+        )
+        self.metrics.inc(
+            "mongo_command_failures_total",
+            collection=collection,
+            command=event.command_name,
+        )
@@ -0,0 +1,316 @@
+# Imports
+from pymongo.monitoring import ConnectionPoolListener
+from pymongo.collection import Collection
+from pymongo.database import Database
+from typing import Any, Dict, List, Optional
+import threading
+import pymongo
+import os
+
+
+class PoolStats(ConnectionPoolListener):
+    """Connection pool listener that tracks the connections of every server
+    the client talks to
+
+    Args:
+        ConnectionPoolListener (ConnectionPoolListener): pymongo's pool
+            listener interface
+    """
+
+    def __init__(self: "PoolStats") -> None:
+        """Constructor for the PoolStats class
+
+        Args:
+            self (PoolStats): Current class type
+        """
+        self._servers: Dict[str, Dict[str, int]] = {}
+        self._lock = threading.Lock()
+
+    def _add(self: "PoolStats", event: Any, **amounts: int) -> None:
+        """Add to the counters of the event's server
+
+        Args:
+            self (PoolStats): Current class type
+            event (Any): Pool event with the address of the server
+        """
+        address = "%s:%s" % event.address
+        with self._lock:
+            server = self._servers.setdefault(
+                address,
+                {
+                    "open": 0,
+                    "in_use": 0,
+                    "max_in_use": 0,
+                    "waiting": 0,
+                    "checkouts": 0,
+                    "checkout_failures": 0,
+                    "cleared": 0,
+                },
+            )
+            for name, amount in amounts.items():
+                server[name] += amount
+            server["max_in_use"] = max(server["max_in_use"], server["in_use"])
+
+    def pool_created(self: "PoolStats", event: Any) -> None:
+        """Pool of a server was created"""
+        self._add(event)
+
+    def pool_ready(self: "PoolStats", event: Any) -> None:
+        """Pool of a server is ready"""
+
+    def pool_cleared(self: "PoolStats", event: Any) -> None:
+        """Pool of a server was cleared"""
+        self._add(event, cleared=1)
+
+    def pool_closed(self: "PoolStats", event: Any) -> None:
+        """Pool of a server was closed"""
+
+    def connection_created(self: "PoolStats", event: Any) -> None:
+        """Connection was opened"""
+        self._add(event, open=1)
+
+    def connection_ready(self: "PoolStats", event: Any) -> None:
+        """Connection is ready"""
+
+    def connection_closed(self: "PoolStats", event: Any) -> None:
+        """Connection was closed"""
+        self._add(event, open=-1)
+
+    def connection_check_out_started(self: "PoolStats", event: Any) -> None:
+        """Operation started waiting for a connection"""
+        self._add(event, waiting=1)
+
+    def connection_check_out_failed(self: "PoolStats", event: Any) -> None:
+        """Operation gave up waiting for a connection"""
+        self._add(event, waiting=-1, checkout_failures=1)
+
+    def connection_checked_out(self: "PoolStats", event: Any) -> None:
+        """Operation got a connection"""
+        self._add(event, waiting=-1, in_use=1, checkouts=1)
+
+    def connection_checked_in(self: "PoolStats", event: Any) -> None:
+        """Operation gave its connection back"""
+        self._add(event, in_use=-1)
+
+    def servers(self: "PoolStats") -> Dict[str, Dict[str, int]]:
+        """Get a copy of the counters of every server
+
+        Args:
+            self (PoolStats): Current class type
+
+        Returns:
+            Dict[str, Dict[str, int]]: Counters by server address
+        """
+        with self._lock:
+            return {k: dict(v) for k, v in self._servers.items()}
+
+
+class ConnectionManager:
+    """Makes the MongoDB client of the current process on first use, so
+    that a client made before a fork is never used by the forked workers"""
+
+    def __init__(
+        self: "ConnectionManager",
+        uri: str,
+        db: str,
+        options: dict,
+        client_class: type = pymongo.MongoClient,
+        listeners: Optional[List[Any]] = None,
+    ) -> None:
+        """Constructor for the ConnectionManager class
+
+        Args:
+            self (ConnectionManager): Current class type
+            uri (str): MongoDB connection string
+            db (str): Name of the database
+            options (dict): MongoClient options such as maxPoolSize,
+                maxIdleTimeMS, serverSelectionTimeoutMS, socketTimeoutMS,
+                compressors and readPreference. Empty values are left to
+                the driver's defaults
+            client_class (type, optional): Type of the clients, which can be
+                replaced by a stand-in before first use. Defaults to
+                pymongo.MongoClient.
+            listeners (Optional[List[Any]], optional): Event listeners of
+                the clients besides the pool statistics. Defaults to None.
+        """
+
+        # Save settings
+        self.uri = uri
+        self.db_name = db
+        self.client_class = client_class
+        self.listeners = list(listeners or [])
+        self.options = {
+            k: v for k, v in options.items() if v not in [None, "", []]
+        }
+
+        # The client is made lazily for every process
+        self._client: Optional[pymongo.MongoClient] = None
+        self._pool_stats: Optional[PoolStats] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @property
+    def client(self: "ConnectionManager") -> pymongo.MongoClient:
+        """Get the client of the current process, making it if needed
+
+        Args:
+            self (ConnectionManager): Current class type
+
+        Returns:
+            pymongo.MongoClient: Client of the current process
+        """
+
+        # Make a client if there is none yet in this process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool_stats = PoolStats()
+                    self._client = self.client_class(
+                        self.uri,
+                        event_listeners=[self._pool_stats, *self.listeners],
+                        **self.options,
+                    )
+                    self._pid = os.getpid()
+        return self._client
+
+    @property
+    def db(self: "ConnectionManager") -> Database:
+        """Get the database of the current process's client
+
+        Args:
+            self (ConnectionManager): Current class type
+
+        Returns:
+            Database: Database of the application
+        """
+        return self.client[self.db_name]
+
+    def database(self: "ConnectionManager") -> "LazyDatabase":
+        """Get a handle of the database that resolves to the client of the
+        process using it
+
+        Args:
+            self (ConnectionManager): Current class type
+
+        Returns:
+            LazyDatabase: Database handle
+        """
+        return LazyDatabase(self)
+
+    def close(self: "ConnectionManager") -> None:
+        """Close the client of the current process if it has one
+
+        Args:
+            self (ConnectionManager): Current class type
+        """
+        with self._lock:
+            if self._pid == os.getpid() and self._client is not None:
+                self._client.close()
+            self._client, self._pid = None, None
+
+    def stats(self: "ConnectionManager") -> dict:
+        """Get the pool utilization of the current process
+
+        Args:
+            self (ConnectionManager): Current class type
+
+        Returns:
+            dict: Pool settings along with the connection counters and the
+                share of the pool in use for every server
+        """
+
+        # Nothing was opened yet in this process
+        max_pool_size = self.options.get("maxPoolSize", 100)
+        if self._pid != os.getpid():
+            return {"pid": os.getpid(), "max_pool_size": max_pool_size}
+
+        # Add the utilization of every server's pool
+        servers = self._pool_stats.servers()
+        for server in servers.values():
+            server["utilization"] = (
+                server["in_use"] / max_pool_size if max_pool_size else None
+            )
+        return {
+            "pid": os.getpid(),
+            "max_pool_size": max_pool_size,
+            "servers": servers,
+        }
+
+
+class LazyDatabase:
+    """Database handle that resolves to the client of the current process"""
+
+    def __init__(self: "LazyDatabase", manager: ConnectionManager) -> None:
+        """Constructor for the LazyDatabase class
+
+        Args:
+            self (LazyDatabase): Current class type
+            manager (ConnectionManager): Manager of the clients
+        """
+        self._manager = manager
+
+    def __getitem__(self: "LazyDatabase", name: str) -> "LazyCollection":
+        """Get a handle of a collection
+
+        Args:
+            self (LazyDatabase): Current class type
+            name (str): Name of the collection
+
+        Returns:
+            LazyCollection: Collection handle
+        """
+        return LazyCollection(self._manager, name)
+
+    def __getattr__(self: "LazyDatabase", name: str) -> Any:
+        """Forward to the database of the current process
+
+        Args:
+            self (LazyDatabase): Current class type
+            name (str): Attribute of the database
+
+        Returns:
+            Any: Attribute of the database
+        """
+        return getattr(self._manager.db, name)
+
+
+class LazyCollection:
+    """Collection handle that resolves to the client of the current process,
+    so it can be made at import time and shared by long-lived helpers"""
+
+    def __init__(
+        self: "LazyCollection", manager: ConnectionManager, name: str
+    ) -> None:
+        """Constructor for the LazyCollection class
+
+        Args:
+            self (LazyCollection): Current class type
+            manager (ConnectionManager): Manager of the clients
+            name (str): Name of the collection
+        """
+        self._manager = manager
+        self._name = name
+
+    @property
+    def collection(self: "LazyCollection") -> Collection:
+        """Get the collection of the current process
+
+        Args:
+            self (LazyCollection): Current class type
+
+        Returns:
+            Collection: Collection of the current process's client
+        """
+        return self._manager.db[self._name]
+
+    def __getattr__(self: "LazyCollection", name: str) -> Any:
+        """Forward to the collection of the current process
+
+        Args:
+            self (LazyCollection): Current class type
+            name (str): Attribute of the collection
+
+        Returns:
+            Any: Attribute of the collection
+        """
+        return getattr(self.collection, name)
@@ -0,0 +1,107 @@
+# Imports
+from typing import Any, Callable, Iterable, Iterator, Optional
+import base64
+import json
+
+
+def encode_cursor(last_key: Any) -> str:
+    """Encode the sort key of the last returned document into an opaque
+    continuation token
+
+    Args:
+        last_key (Any): Sort key of the last document of the page
+
+    Returns:
+        str: Continuation token
+    """
+    raw = json.dumps({"after": last_key}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> Optional[Any]:
+    """Decode a continuation token into the sort key to continue after
+
+    Args:
+        token (str): Continuation token, may be empty for the first page
+
+    Raises:
+        ValueError: If the token is malformed
+
+    Returns:
+        Optional[Any]: Sort key to continue after or None for the first page
+    """
+
+    # The first page has no token
+    if not token:
+        return None
+
+    # Decode the token back into its sort key
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return json.loads(raw)["after"]
+    except (ValueError, KeyError, TypeError):
+        raise ValueError("Invalid pagination cursor")
+
+
+def clamp_page_size(page_size: int, default: int, maximum: int) -> int:
+    """Bring a requested page size within the allowed range
+
+    Args:
+        page_size (int): Requested page size, 0 or less for the default
+        default (int): Default page size
+        maximum (int): Maximum page size
+
+    Returns:
+        int: Page size to use
+    """
+    return min(page_size, maximum) if page_size > 0 else default
+
+
+class CursorPage:
+    """Lazy page of a database cursor that was limited to one document more
+    than the page size, so that it can be consumed while it is streamed and
+    still tell whether there is a next page"""
+
+    def __init__(
+        self: "CursorPage",
+        cursor: Iterable[dict],
+        page_size: int,
+        transform: Optional[Callable[[dict], Any]] = None,
+        key: str = "_id",
+    ) -> None:
+        """Constructor for the CursorPage class
+
+        Args:
+            self (CursorPage): Current class type
+            cursor (Iterable[dict]): Cursor limited to page_size + 1
+            page_size (int): Amount of documents of the page
+            transform (Optional[Callable[[dict], Any]], optional): Conversion
+                of each document. Defaults to None.
+            key (str, optional): Sort key of the documents. Defaults to
+                "_id".
+        """
+        self.cursor = cursor
+        self.page_size = page_size
+        self.transform = transform
+        self.key = key
+        self.next_cursor: Optional[str] = None
+
+    def __iter__(self: "CursorPage") -> Iterator[Any]:
+        """Yield the documents of the page and set the next page's token
+        once the cursor is exhausted
+
+        Args:
+            self (CursorPage): Current class type
+
+        Yields:
+            Iterator[Any]: Documents of the page
+        """
+
+        # Yield up to the page size and remember the last sort key
+        last, count = None, 0
+        for document in self.cursor:
+            if count == self.page_size:
+                self.next_cursor = encode_cursor(last)
+                break
+            last, count = document[self.key], count + 1
+            yield self.transform(document) if self.transform else document
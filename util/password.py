@@ -0,0 +1,386 @@
+# Imports
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Optional, Tuple
+from util.hash import sha256
+import threading
+import asyncio
+import hashlib
+import base64
+import hmac
+import os
+
+# Memory limit of scrypt, high enough for any configured cost
+MAX_MEM = 0x7FFFFFFF
+
+
+def _b64(data: bytes) -> str:
+    """Encode bytes into unpadded base64
+
+    Args:
+        data (bytes): Bytes to encode
+
+    Returns:
+        str: Encoded bytes
+    """
+    return base64.b64encode(data).decode().rstrip("=")
+
+
+def _unb64(data: str) -> bytes:
+    """Decode unpadded base64 into bytes
+
+    Args:
+        data (str): String to decode
+
+    Returns:
+        bytes: Decoded bytes
+    """
+    return base64.b64decode(data + "=" * (-len(data) % 4))
+
+
+def hash_password(password: str, scheme: str, params: dict) -> str:
+    """Hash a password with a work-factor KDF
+
+    Args:
+        password (str): Password to hash
+        scheme (str): KDF to use, pbkdf2_sha256 or scrypt
+        params (dict): Cost parameters of the KDF
+
+    Raises:
+        ValueError: If the scheme is unknown
+
+    Returns:
+        str: Encoded hash in the $scheme$cost$salt$hash format
+    """
+
+    # Hash the password with a fresh salt
+    salt = os.urandom(16)
+    if scheme == "pbkdf2_sha256":
+        iterations = params["iterations"]
+        digest = hashlib.pbkdf2_hmac(
+            "sha256", password.encode(), salt, iterations
+        )
+        cost = str(iterations)
+    elif scheme == "scrypt":
+        n, r, p = params["scrypt_n"], params["scrypt_r"], params["scrypt_p"]
+        digest = hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p, maxmem=MAX_MEM
+        )
+        cost = f"{n},{r},{p}"
+    else:
+        raise ValueError(f"Unknown password hashing scheme {scheme}")
+
+    # Return the encoded hash
+    return f"${scheme}${cost}${_b64(salt)}${_b64(digest)}"
+
+
+def verify_password(password: str, encoded: str, spicer: str) -> bool:
+    """Check a password against an encoded hash
+
+    Args:
+        password (str): Password attempt
+        encoded (str): Stored hash, either a KDF hash or the legacy
+            sha256 with spicer hex digest
+        spicer (str): Spicer of the legacy hashes
+
+    Returns:
+        bool: True if the password matches, False if not
+    """
+
+    # Legacy hashes are plain hex digests
+    if not encoded.startswith("$"):
+        return hmac.compare_digest(sha256(password, spicer), encoded)
+
+    # Recompute the KDF hash with the stored cost and salt
+    try:
+        _, scheme, cost, salt, digest = encoded.split("$")
+        salt, digest = _unb64(salt), _unb64(digest)
+        if scheme == "pbkdf2_sha256":
+            attempt = hashlib.pbkdf2_hmac(
+                "sha256", password.encode(), salt, int(cost)
+            )
+        elif scheme == "scrypt":
+            n, r, p = (int(i) for i in cost.split(","))
+            attempt = hashlib.scrypt(
+                password.encode(), salt=salt, n=n, r=r, p=p, maxmem=MAX_MEM
+            )
+        else:
+            return False
+    except ValueError:
+        return False
+
+    # Compare in constant time
+    return hmac.compare_digest(attempt, digest)
+
+
+def needs_rehash(encoded: str, scheme: str, params: dict) -> bool:
+    """Check if an encoded hash uses another scheme or cost than configured
+
+    Args:
+        encoded (str): Stored hash
+        scheme (str): Configured KDF
+        params (dict): Configured cost parameters
+
+    Returns:
+        bool: True if the hash should be replaced, False if not
+    """
+
+    # Legacy hashes always need a rehash
+    if not encoded.startswith("$"):
+        return True
+
+    # Compare the scheme and cost of the hash
+    _, current_scheme, cost = encoded.split("$")[:3]
+    if current_scheme != scheme:
+        return True
+    if scheme == "pbkdf2_sha256":
+        return cost != str(params["iterations"])
+    return cost != ",".join(
+        str(params[k]) for k in ["scrypt_n", "scrypt_r", "scrypt_p"]
+    )
+
+
+def verify_and_rehash(
+    password: str, encoded: str, spicer: str, scheme: str, params: dict
+) -> Tuple[bool, Optional[str]]:
+    """Check a password and hash it again if its hash is outdated
+
+    Args:
+        password (str): Password attempt
+        encoded (str): Stored hash
+        spicer (str): Spicer of the legacy hashes
+        scheme (str): Configured KDF
+        params (dict): Configured cost parameters
+
+    Returns:
+        Tuple[bool, Optional[str]]: Whether the password matches and the new
+            hash to store if the stored one is outdated
+    """
+
+    # Nothing is rehashed for a wrong password
+    if not verify_password(password, encoded, spicer):
+        return False, None
+
+    # Rehash outdated hashes while the plain password is known
+    if needs_rehash(encoded, scheme, params):
+        return True, hash_password(password, scheme, params)
+    return True, None
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Raised to asynchronous callers instead of waiting when the pool
+    already has the maximum amount of hashes queued or running"""
+
+
+class PasswordHasher:
+    """Runs password hashing in a bounded process pool so CPU-heavy KDFs do
+    not hold the GIL of the request workers"""
+
+    def __init__(
+        self: "PasswordHasher",
+        scheme: str,
+        params: dict,
+        spicer: str,
+        pool_size: int = 2,
+        max_pending: int = 64,
+    ) -> None:
+        """Constructor for the PasswordHasher class
+
+        Args:
+            self (PasswordHasher): Current class type
+            scheme (str): KDF of new hashes, pbkdf2_sha256 or scrypt
+            params (dict): Cost parameters of the KDF
+            spicer (str): Spicer of the legacy hashes
+            pool_size (int, optional): Amount of hashing processes, 0 to hash
+                on the calling thread. Defaults to 2.
+            max_pending (int, optional): Maximum amount of hashes queued or
+                running at once. Defaults to 64.
+        """
+
+        # Save settings
+        self.scheme = scheme
+        self.params = dict(params)
+        self.spicer = spicer
+        self.pool_size = pool_size
+
+        # The pool is created lazily so that it belongs to the worker process
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._pending = threading.BoundedSemaphore(max_pending)
+
+    def _submit(
+        self: "PasswordHasher",
+        fn: object,
+        *args: object,
+        blocking: bool = True,
+    ) -> Future:
+        """Run a hashing function in the pool of the current process
+
+        Args:
+            self (PasswordHasher): Current class type
+            fn (object): Module-level function to run
+            blocking (bool, optional): Wait for room in the pool instead of
+                raising PasswordHasherBusy. Defaults to True.
+
+        Raises:
+            PasswordHasherBusy: If the pool is full and blocking is False
+
+        Returns:
+            Future: Result of the function
+        """
+
+        # Hash on the calling thread if there is no pool
+        if self.pool_size <= 0:
+            future = Future()
+            future.set_result(fn(*args))
+            return future
+
+        # Make the pool of the current process
+        if self._pid != os.getpid():
+            with self._lock:
+                if self._pid != os.getpid():
+                    self._pool = ProcessPoolExecutor(self.pool_size)
+                    self._pid = os.getpid()
+
+        # Wait for room in the pool and release it once the hash is done
+        if not self._pending.acquire(blocking=blocking):
+            raise PasswordHasherBusy("Too many passwords are being hashed")
+        try:
+            future = self._pool.submit(fn, *args)
+        except Exception:
+            self._pending.release()
+            raise
+        future.add_done_callback(lambda _: self._pending.release())
+        return future
+
+    def submit_hash(self: "PasswordHasher", password: str) -> Future:
+        """Hash a new password
+
+        Args:
+            self (PasswordHasher): Current class type
+            password (str): Password to hash
+
+        Returns:
+            Future: Encoded hash
+        """
+        return self._submit(hash_password, password, self.scheme, self.params)
+
+    def submit_verify(
+        self: "PasswordHasher", password: str, encoded: str
+    ) -> Future:
+        """Check a password and rehash it if its hash is outdated
+
+        Args:
+            self (PasswordHasher): Current class type
+            password (str): Password attempt
+            encoded (str): Stored hash
+
+        Returns:
+            Future: Whether the password matches and the new hash to store
+                if the stored one is outdated
+        """
+        return self._submit(
+            verify_and_rehash,
+            password,
+            encoded,
+            self.spicer,
+            self.scheme,
+            self.params,
+        )
+
+    def hash(self: "PasswordHasher", password: str) -> str:
+        """Hash a new password and wait for the result
+
+        Args:
+            self (PasswordHasher): Current class type
+            password (str): Password to hash
+
+        Returns:
+            str: Encoded hash
+        """
+        return self.submit_hash(password).result()
+
+    def verify(
+        self: "PasswordHasher", password: str, encoded: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Check a password and wait for the result
+
+        Args:
+            self (PasswordHasher): Current class type
+            password (str): Password attempt
+            encoded (str): Stored hash
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password matches and the
+                new hash to store if the stored one is outdated
+        """
+        return self.submit_verify(password, encoded).result()
+
+    async def _run_async(
+        self: "PasswordHasher", fn: object, *args: object
+    ) -> Any:
+        """Run a hashing function without blocking the event loop
+
+        Args:
+            self (PasswordHasher): Current class type
+            fn (object): Module-level function to run
+
+        Raises:
+            PasswordHasherBusy: If the pool is full
+
+        Returns:
+            Any: Result of the function
+        """
+
+        # Hash on the loop's default executor if there is no pool
+        if self.pool_size <= 0:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, fn, *args)
+
+        # Never wait for room in the pool on the event loop
+        return await asyncio.wrap_future(
+            self._submit(fn, *args, blocking=False)
+        )
+
+    async def hash_async(self: "PasswordHasher", password: str) -> str:
+        """Hash a new password from a coroutine
+
+        Args:
+            self (PasswordHasher): Current class type
+            password (str): Password to hash
+
+        Raises:
+            PasswordHasherBusy: If the pool is full
+
+        Returns:
+            str: Encoded hash
+        """
+        return await self._run_async(
+            hash_password, password, self.scheme, self.params
+        )
+
+    async def verify_async(
+        self: "PasswordHasher", password: str, encoded: str
+    ) -> Tuple[bool, Optional[str]]:
+        """Check a password from a coroutine
+
+        Args:
+            self (PasswordHasher): Current class type
+            password (str): Password attempt
+            encoded (str): Stored hash
+
+        Raises:
+            PasswordHasherBusy: If the pool is full
+
+        Returns:
+            Tuple[bool, Optional[str]]: Whether the password matches and the
+                new hash to store if the stored one is outdated
+        """
+        return await self._run_async(
+            verify_and_rehash,
+            password,
+            encoded,
+            self.spicer,
+            self.scheme,
+            self.params,
+        )
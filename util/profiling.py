@@ -0,0 +1,325 @@
+# Imports
+from flask import Flask, Response, g, request
+from typing import Any, List, Optional
+import tracemalloc
+import threading
+import cProfile
+import datetime
+import logging
+import pstats
+import random
+import hmac
+import glob
+import json
+import time
+import uuid
+import io
+import os
+import re
+
+# Logger of the profiler
+logger = logging.getLogger(__name__)
+
+# Header that asks for the profile of a request
+HEADER = "X-Profile"
+
+
+def sign(secret: str, timestamp: Optional[int] = None) -> str:
+    """Make the value of the profiling header
+
+    Args:
+        secret (str): Shared profiling secret
+        timestamp (Optional[int], optional): Unix time of the signature.
+            Defaults to now.
+
+    Returns:
+        str: Timestamp and its HMAC-SHA256 signature
+    """
+    timestamp = int(time.time()) if timestamp is None else timestamp
+    digest = hmac.new(
+        secret.encode(), str(timestamp).encode(), "sha256"
+    ).hexdigest()
+    return f"{timestamp}.{digest}"
+
+
+def verify(secret: str, value: str, max_age: float) -> bool:
+    """Check the value of the profiling header
+
+    Args:
+        secret (str): Shared profiling secret
+        value (str): Value of the header
+        max_age (float): Seconds a signature stays valid
+
+    Returns:
+        bool: True if it is signed with the secret and recent enough
+    """
+    timestamp, _, _ = value.partition(".")
+    if not secret or not timestamp.isdigit():
+        return False
+    if abs(time.time() - int(timestamp)) > max_age:
+        return False
+    return hmac.compare_digest(value, sign(secret, int(timestamp)))
+
+
+class RequestProfiler:
+    """Profiles the CPU time and allocations of single requests, chosen by
+    a signed header or a sampling rate, and keeps the newest profiles in a
+    local directory for offline analysis
+
+    A worker profiles one request at a time, as allocation tracing is
+    global to the process. Requests that would overlap are not profiled.
+    """
+
+    def __init__(
+        self: "RequestProfiler",
+        directory: str,
+        secret: str = "",
+        sample_rate: float = 0.0,
+        max_age: float = 300.0,
+        max_profiles: int = 50,
+        allocations: bool = True,
+        top: int = 25,
+        frames: int = 5,
+    ) -> None:
+        """Constructor for the RequestProfiler class
+
+        Args:
+            self (RequestProfiler): Current class type
+            directory (str): Directory of the profiles
+            secret (str, optional): Secret of the signed header, empty to
+                only sample. Defaults to "".
+            sample_rate (float, optional): Share of the requests profiled
+                without the header. Defaults to 0.0.
+            max_age (float, optional): Seconds a header signature stays
+                valid. Defaults to 300.0.
+            max_profiles (int, optional): Amount of profiles kept, the
+                oldest are removed first. Defaults to 50.
+            allocations (bool, optional): Should allocations be traced?
+                Defaults to True.
+            top (int, optional): Amount of functions and allocation sites
+                in the summaries. Defaults to 25.
+            frames (int, optional): Frames kept per traced allocation.
+                Defaults to 5.
+        """
+
+        # Save settings
+        self.directory = directory
+        self.secret = secret
+        self.sample_rate = sample_rate
+        self.max_age = max_age
+        self.max_profiles = max_profiles
+        self.allocations = allocations
+        self.top = top
+        self.frames = frames
+
+        # Only one request of the worker is profiled at a time
+        self._busy = threading.Lock()
+
+        # Counters
+        self.profiled = 0
+        self.skipped_busy = 0
+        self.failed = 0
+
+    def init_app(self: "RequestProfiler", app: Flask) -> None:
+        """Profile the chosen requests of a Flask application
+
+        Args:
+            self (RequestProfiler): Current class type
+            app (Flask): Application to profile
+        """
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+
+    def _wanted(self: "RequestProfiler") -> bool:
+        """Check if the current request should be profiled"""
+        header = request.headers.get(HEADER)
+        if header is not None and verify(self.secret, header, self.max_age):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _before_request(self: "RequestProfiler") -> None:
+        """Start profiling the request if it was chosen"""
+        if not self._wanted():
+            return
+        if not self._busy.acquire(blocking=False):
+            self.skipped_busy += 1
+            return
+
+        # A failing profiler must neither fail the request nor keep the
+        # worker from profiling again
+        g._profile_started_tracing = False
+        try:
+            # Trace allocations from here on, or from a baseline if
+            # something else already traces them
+            g._profile_baseline = None
+            if self.allocations:
+                if tracemalloc.is_tracing():
+                    g._profile_baseline = tracemalloc.take_snapshot()
+                else:
+                    tracemalloc.start(self.frames)
+                    g._profile_started_tracing = True
+
+            # Profile the CPU time of the request
+            g._profile_id = g.get("request_id") or uuid.uuid4().hex
+            g._profile_start = time.perf_counter()
+            profiler = cProfile.Profile()
+            profiler.enable()
+            g._profiler = profiler
+        except Exception:
+            logger.exception("Could not start profiling the request")
+            self.failed += 1
+            self._stop_tracing()
+            self._busy.release()
+
+    def _after_request(
+        self: "RequestProfiler", response: Response
+    ) -> Response:
+        """Tell the client the ID of the profile and keep the status"""
+        if "_profiler" in g:
+            response.headers["X-Profile-Id"] = g._profile_id
+            g._profile_status = response.status_code
+        return response
+
+    def _teardown_request(
+        self: "RequestProfiler", exc: Optional[BaseException]
+    ) -> None:
+        """Stop profiling the request and write its profile"""
+        profiler = g.pop("_profiler", None)
+        if profiler is None:
+            return
+        try:
+            # Stop the profilers
+            profiler.disable()
+            elapsed = time.perf_counter() - g._profile_start
+            snapshot = None
+            if self.allocations:
+                snapshot = tracemalloc.take_snapshot()
+                self._stop_tracing()
+
+            # Write the profile
+            self.write(
+                profiler,
+                snapshot,
+                g._profile_baseline,
+                {
+                    "id": g._profile_id,
+                    "route": (
+                        request.url_rule.rule
+                        if request.url_rule
+                        else request.path
+                    ),
+                    "method": request.method,
+                    "status": g.get("_profile_status", 500),
+                    "duration_ms": round(elapsed * 1000, 3),
+                    "time": datetime.datetime.now(
+                        datetime.timezone.utc
+                    ).isoformat(timespec="seconds"),
+                },
+            )
+            self.profiled += 1
+        except Exception:
+            logger.exception("Could not write the profile of the request")
+            self.failed += 1
+            self._stop_tracing()
+        finally:
+            self._busy.release()
+
+    def _stop_tracing(self: "RequestProfiler") -> None:
+        """Stop tracing allocations if the profiler started it"""
+        started = g.pop("_profile_started_tracing", False)
+        if started and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def write(
+        self: "RequestProfiler",
+        profiler: cProfile.Profile,
+        snapshot: Optional[tracemalloc.Snapshot],
+        baseline: Optional[tracemalloc.Snapshot],
+        info: dict,
+    ) -> str:
+        """Write the profile of a request and remove the oldest profiles
+
+        Writes <name>.prof for pstats or snakeviz, <name>.alloc.txt with the
+        allocation sites, and <name>.json with the request, the hottest
+        functions and the largest allocation sites
+
+        Args:
+            self (RequestProfiler): Current class type
+            profiler (cProfile.Profile): CPU profile of the request
+            snapshot (Optional[tracemalloc.Snapshot]): Allocations at the
+                end of the request
+            baseline (Optional[tracemalloc.Snapshot]): Allocations at the
+                start of the request if tracing was already running
+            info (dict): Request ID, route, method, status, duration and
+                time of the request
+
+        Returns:
+            str: Path of the profile without its extension
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        route = re.sub(r"[^A-Za-z0-9]+", "_", info["route"]).strip("_")
+        stamp = datetime.datetime.now().strftime("%Y%m%dT%H%M%S%f")
+        base = os.path.join(
+            self.directory,
+            f"{stamp}-{route or 'root'}-{round(info['duration_ms'])}ms-"
+            f"{info['id']}",
+        )
+
+        # CPU profile and its hottest functions by cumulative time
+        profiler.dump_stats(base + ".prof")
+        stream = io.StringIO()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats("cumulative").print_stats(self.top)
+        info["functions"] = stream.getvalue().strip().splitlines()
+
+        # Allocation sites of the request, largest first
+        if snapshot is not None:
+            snapshot = snapshot.filter_traces(
+                [
+                    tracemalloc.Filter(False, tracemalloc.__file__),
+                    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+                ]
+            )
+            sites: List[Any] = (
+                snapshot.compare_to(baseline, "traceback")
+                if baseline is not None
+                else snapshot.statistics("traceback")
+            )
+            with open(base + ".alloc.txt", "w") as f:
+                for site in sites:
+                    f.write(f"{site}\n")
+                    for line in site.traceback.format():
+                        f.write(f"{line}\n")
+            info["allocations"] = [str(site) for site in sites[: self.top]]
+
+        # Summary of the request
+        with open(base + ".json", "w") as f:
+            json.dump(info, f, indent=2)
+
+        # Keep only the newest profiles
+        profiles = sorted(glob.glob(os.path.join(self.directory, "*.prof")))
+        for old in profiles[: max(0, len(profiles) - self.max_profiles)]:
+            stem = old[: -len(".prof")]
+            for path in [old, stem + ".alloc.txt", stem + ".json"]:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+        return base
+
+    def stats(self: "RequestProfiler") -> dict:
+        """Get the counters of the profiler
+
+        Args:
+            self (RequestProfiler): Current class type
+
+        Returns:
+            dict: Profiled requests, requests skipped while busy and
+                profiles that failed
+        """
+        return {
+            "profiled": self.profiled,
+            "skipped_busy": self.skipped_busy,
+            "failed": self.failed,
+        }
@@ -0,0 +1,532 @@
+# Imports
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+from collections import OrderedDict
+import threading
+import asyncio
+import json
+import time
+import uuid
+
+
+class CacheBackend(ABC):
+    """Interface of the read-through cache backends. Values must be JSON
+    serializable so that every backend can hold them.
+
+    Every lookup returns the generation of its key along with the value, an
+    opaque marker that a value read from the database after a miss is cached
+    with. Invalidating a key moves it to a new generation, so a read
+    that raced an invalidation never puts the old value back.
+
+    Args:
+        ABC (ABC): Abstract base class
+    """
+
+    @abstractmethod
+    def get(self: "CacheBackend", key: str) -> Tuple[Optional[Any], Any]:
+        """Get a cached value
+
+        Args:
+            self (CacheBackend): Current class type
+            key (str): Key of the value
+
+        Returns:
+            Tuple[Optional[Any], Any]: Cached value or None if it is missing
+                or expired, along with the generation of the key
+        """
+
+    @abstractmethod
+    def set(
+        self: "CacheBackend", key: str, value: Any, generation: Any
+    ) -> None:
+        """Cache a value unless its key was invalidated since the lookup
+
+        Args:
+            self (CacheBackend): Current class type
+            key (str): Key of the value
+            value (Any): Value to cache
+            generation (int): Generation returned by the lookup of the key
+        """
+
+    @abstractmethod
+    def delete(self: "CacheBackend", key: str) -> None:
+        """Invalidate a cached value
+
+        Args:
+            self (CacheBackend): Current class type
+            key (str): Key of the value
+        """
+
+    @abstractmethod
+    def stats(self: "CacheBackend") -> dict:
+        """Get the counters of the cache
+
+        Args:
+            self (CacheBackend): Current class type
+
+        Returns:
+            dict: Counters of the cache
+        """
+
+    async def get_async(
+        self: "CacheBackend", key: str
+    ) -> Tuple[Optional[Any], Any]:
+        """Get a cached value without blocking the event loop, calling get
+        on the default executor
+
+        Args:
+            self (CacheBackend): Current class type
+            key (str): Key of the value
+
+        Returns:
+            Tuple[Optional[Any], Any]: Cached value or None if it is missing
+                or expired, along with the generation of the key
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.get, key)
+
+    async def set_async(
+        self: "CacheBackend", key: str, value: Any, generation: Any
+    ) -> None:
+        """Cache a value without blocking the event loop, calling set on the
+        default executor
+
+        Args:
+            self (CacheBackend): Current class type
+            key (str): Key of the value
+            value (Any): Value to cache
+            generation (int): Generation returned by the lookup of the key
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.set, key, value, generation)
+
+    async def delete_async(self: "CacheBackend", key: str) -> None:
+        """Invalidate a cached value without blocking the event loop,
+        calling delete on the default executor
+
+        Args:
+            self (CacheBackend): Current class type
+            key (str): Key of the value
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, self.delete, key)
+
+
+class MemoryCache(CacheBackend):
+    """In-process cache bounded by size with least recently used eviction
+    and a time to live on every entry. Its calls never wait on the network,
+    so the async calls run them in place
+
+    Args:
+        CacheBackend (CacheBackend): Cache backend interface
+    """
+
+    def __init__(
+        self: "MemoryCache", max_size: int = 1024, ttl: float = 30.0
+    ) -> None:
+        """Constructor for the MemoryCache class
+
+        Args:
+            self (MemoryCache): Current class type
+            max_size (int, optional): Maximum amount of entries. Defaults to
+                1024.
+            ttl (float, optional): Seconds an entry stays valid. Defaults to
+                30.0.
+        """
+
+        # Save settings
+        self.max_size = max_size
+        self.ttl = ttl
+
+        # Entries by key along with their expiry, least recently used first
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = (
+            OrderedDict()
+        )
+        self._lock = threading.Lock()
+
+        # Generations are a clock that ticks on every invalidation. The
+        # generation of the latest invalidations is kept by key, and the
+        # ones dropped to bound their amount are covered by the floor
+        self._clock = 0
+        self._floor = 0
+        self._invalidated: "OrderedDict[Hashable, int]" = OrderedDict()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.rejections = 0
+
+    def get(self: "MemoryCache", key: str) -> Tuple[Optional[Any], Any]:
+        """Get a cached value and mark it as recently used
+
+        Args:
+            self (MemoryCache): Current class type
+            key (str): Key of the value
+
+        Returns:
+            Tuple[Optional[Any], Any]: Cached value or None if it is missing
+                or expired, along with the generation of the key
+        """
+        with self._lock:
+            # Count a miss if the entry is missing or expired
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None, self._clock
+
+            # Mark the entry as the most recently used
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1], self._clock
+
+    def set(
+        self: "MemoryCache", key: str, value: Any, generation: Any
+    ) -> None:
+        """Cache a value, evicting the least recently used entry if full
+
+        Args:
+            self (MemoryCache): Current class type
+            key (str): Key of the value
+            value (Any): Value to cache
+            generation (int): Generation returned by the lookup of the key
+        """
+        with self._lock:
+            # Skip values read before the latest invalidation of the key
+            if self._invalidated.get(key, self._floor) > generation:
+                self.rejections += 1
+                return
+
+            # Cache the value
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def delete(self: "MemoryCache", key: str) -> None:
+        """Invalidate a cached value
+
+        Args:
+            self (MemoryCache): Current class type
+            key (str): Key of the value
+        """
+        with self._lock:
+            # Move the key to a new generation
+            self._clock += 1
+            self._invalidated[key] = self._clock
+            self._invalidated.move_to_end(key)
+            while len(self._invalidated) > self.max_size:
+                _, generation = self._invalidated.popitem(last=False)
+                self._floor = max(self._floor, generation)
+
+            # Drop the cached value
+            if self._entries.pop(key, None) is not None:
+                self.invalidations += 1
+
+    async def get_async(
+        self: "MemoryCache", key: str
+    ) -> Tuple[Optional[Any], Any]:
+        """Get a cached value, see get
+
+        Args:
+            self (MemoryCache): Current class type
+            key (str): Key of the value
+
+        Returns:
+            Tuple[Optional[Any], Any]: Cached value or None if it is missing
+                or expired, along with the generation of the key
+        """
+        return self.get(key)
+
+    async def set_async(
+        self: "MemoryCache", key: str, value: Any, generation: Any
+    ) -> None:
+        """Cache a value, see set
+
+        Args:
+            self (MemoryCache): Current class type
+            key (str): Key of the value
+            value (Any): Value to cache
+            generation (int): Generation returned by the lookup of the key
+        """
+        self.set(key, value, generation)
+
+    async def delete_async(self: "MemoryCache", key: str) -> None:
+        """Invalidate a cached value, see delete
+
+        Args:
+            self (MemoryCache): Current class type
+            key (str): Key of the value
+        """
+        self.delete(key)
+
+    def stats(self: "MemoryCache") -> dict:
+        """Get the counters of the cache
+
+        Args:
+            self (MemoryCache): Current class type
+
+        Returns:
+            dict: Counters of the cache along with its hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "memory",
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+                "rejections": self.rejections,
+            }
+
+
+class LocalNetworkClient:
+    """In-process stand-in for a shared network cache client such as
+    redis.Redis, implementing the get, mget, set with expiry and delete
+    calls used by NetworkCache"""
+
+    def __init__(self: "LocalNetworkClient") -> None:
+        """Constructor for the LocalNetworkClient class
+
+        Args:
+            self (LocalNetworkClient): Current class type
+        """
+        self._data: Dict[str, Tuple[float, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def get(self: "LocalNetworkClient", key: str) -> Optional[bytes]:
+        """Get the bytes of a key if it has not expired
+
+        Args:
+            self (LocalNetworkClient): Current class type
+            key (str): Key to get
+
+        Returns:
+            Optional[bytes]: Stored bytes or None
+        """
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._data.pop(key, None)
+                return None
+            return entry[1]
+
+    def mget(
+        self: "LocalNetworkClient", keys: List[str]
+    ) -> List[Optional[bytes]]:
+        """Get the bytes of several keys at once
+
+        Args:
+            self (LocalNetworkClient): Current class type
+            keys (List[str]): Keys to get
+
+        Returns:
+            List[Optional[bytes]]: Stored bytes or None for every key
+        """
+        return [self.get(key) for key in keys]
+
+    def set(
+        self: "LocalNetworkClient", key: str, value: bytes, ex: int
+    ) -> None:
+        """Store bytes under a key for some seconds
+
+        Args:
+            self (LocalNetworkClient): Current class type
+            key (str): Key to set
+            value (bytes): Bytes to store
+            ex (int): Seconds before the key expires
+        """
+        with self._lock:
+            self._data[key] = (time.monotonic() + ex, value)
+
+    def delete(self: "LocalNetworkClient", key: str) -> None:
+        """Remove a key
+
+        Args:
+            self (LocalNetworkClient): Current class type
+            key (str): Key to remove
+        """
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class NetworkCache(CacheBackend):
+    """Cache shared by every worker through a network cache client, which
+    bounds its size and evicts on its own. The generation of a key is a
+    random marker kept under a key of its own, which every invalidation
+    replaces, and entries are only served along with the marker they were
+    cached with
+
+    Args:
+        CacheBackend (CacheBackend): Cache backend interface
+    """
+
+    def __init__(
+        self: "NetworkCache",
+        client: Any,
+        ttl: float = 30.0,
+        prefix: str = "",
+    ) -> None:
+        """Constructor for the NetworkCache class
+
+        Args:
+            self (NetworkCache): Current class type
+            client (Any): Client with get(key), mget(keys),
+                set(key, value, ex=seconds) and delete(key), e.g.
+                redis.Redis or LocalNetworkClient
+            ttl (float, optional): Seconds an entry stays valid. Defaults to
+                30.0.
+            prefix (str, optional): Prefix of the keys. Defaults to "".
+        """
+
+        # Save settings
+        self.client = client
+        self.ttl = max(1, int(ttl))
+        self.prefix = prefix
+
+        # Counters, evictions happen on the server and are not seen here
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale = 0
+
+    def _keys(self: "NetworkCache", key: str) -> List[str]:
+        """Get the keys of an entry and of its generation
+
+        Args:
+            self (NetworkCache): Current class type
+            key (str): Key of the value
+
+        Returns:
+            List[str]: Key of the entry and key of its generation
+        """
+        return [f"{self.prefix}value:{key}", f"{self.prefix}generation:{key}"]
+
+    def get(self: "NetworkCache", key: str) -> Tuple[Optional[Any], Any]:
+        """Get a cached value along with the generation of its key in a
+        single round trip
+
+        Args:
+            self (NetworkCache): Current class type
+            key (str): Key of the value
+
+        Returns:
+            Tuple[Optional[Any], Any]: Cached value or None if it is missing,
+                expired or was cached before the latest invalidation, along
+                with the generation of the key
+        """
+        raw, generation = self.client.mget(self._keys(key))
+        generation = generation.decode() if generation else None
+        entry = json.loads(raw) if raw is not None else None
+        with self._lock:
+            if entry is None or entry["generation"] != generation:
+                self.misses += 1
+                self.stale += entry is not None
+                return None, generation
+            self.hits += 1
+        return entry["value"], generation
+
+    def set(
+        self: "NetworkCache", key: str, value: Any, generation: Any
+    ) -> None:
+        """Cache a value with the generation of its lookup
+
+        Args:
+            self (NetworkCache): Current class type
+            key (str): Key of the value
+            value (Any): Value to cache
+            generation (Any): Generation returned by the lookup of the key
+        """
+        raw = json.dumps(
+            {"generation": generation, "value": value},
+            separators=(",", ":"),
+            default=str,
+        )
+        self.client.set(self._keys(key)[0], raw.encode(), ex=self.ttl)
+
+    def delete(self: "NetworkCache", key: str) -> None:
+        """Invalidate a cached value for every worker by moving its key to
+        a new generation, which outlives any entry cached before it
+
+        Args:
+            self (NetworkCache): Current class type
+            key (str): Key of the value
+        """
+        self.client.set(
+            self._keys(key)[1], uuid.uuid4().hex.encode(), ex=self.ttl * 2
+        )
+        with self._lock:
+            self.invalidations += 1
+
+    def stats(self: "NetworkCache") -> dict:
+        """Get the counters of the cache as seen by this worker
+
+        Args:
+            self (NetworkCache): Current class type
+
+        Returns:
+            dict: Counters of the cache along with its hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "backend": "network",
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else None,
+                "evictions": None,
+                "invalidations": self.invalidations,
+                "stale": self.stale,
+            }
+
+
+def make_cache(settings: Any, namespace: str) -> CacheBackend:
+    """Make the cache backend described by the settings
+
+    Args:
+        settings (Any): Settings with the backend name, memory, local or
+            redis, along with max_size, ttl, max_stale, url and prefix
+        namespace (str): Name of what the cache holds, which keeps its keys
+            apart from those of other caches made with the same settings
+
+    Raises:
+        ValueError: If the backend is unknown
+
+    Returns:
+        CacheBackend: Cache backend
+    """
+
+    # In-process cache of the worker. Invalidations only reach the worker
+    # that made the write, so the time to live of its entries is capped by
+    # how long other workers may keep serving a changed value
+    prefix = f"{settings.prefix}{namespace}:"
+    if settings.backend == "memory":
+        return MemoryCache(
+            settings.max_size, min(settings.ttl, settings.max_stale)
+        )
+
+    # In-process stand-in of the shared cache
+    if settings.backend == "local":
+        return NetworkCache(LocalNetworkClient(), settings.ttl, prefix)
+
+    # Shared cache, redis is only needed when it is used
+    if settings.backend == "redis":
+        import redis
+
+        return NetworkCache(
+            redis.Redis.from_url(settings.url), settings.ttl, prefix
+        )
+    raise ValueError(f"Unknown cache backend {settings.backend}")
@@ -0,0 +1,353 @@
+# Imports
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
+from pymongo import UpdateOne
+from typing import Dict, Iterable, List, Optional
+import threading
+import asyncio
+import datetime
+import time
+import jwt
+
+
+def revocation(claims: dict) -> dict:
+    """Make the blocklist entry of a token, which keeps only what a lookup
+    needs and expires along with the token
+
+    Args:
+        claims (dict): Verified claims of the token
+
+    Returns:
+        dict: JTI, type and expiry of the token
+    """
+    return {
+        "jti": claims["jti"],
+        "type": claims["type"],
+        "expires_at": datetime.datetime.utcfromtimestamp(claims["exp"]),
+    }
+
+
+def revocation_writes(entries: Iterable[dict]) -> List[UpdateOne]:
+    """Make the upserts adding blocklist entries, which are stamped with the
+    server's time of the revocation so that polls never depend on the clock
+    of the host that revoked the token
+
+    Args:
+        entries (Iterable[dict]): Entries made by revocation
+
+    Returns:
+        List[UpdateOne]: Upserts for a single unordered bulk write
+    """
+    return [
+        UpdateOne(
+            {"jti": entry["jti"]},
+            {
+                "$setOnInsert": {
+                    "type": entry["type"],
+                    "expires_at": entry["expires_at"],
+                },
+                "$currentDate": {"revoked_at": True},
+            },
+            upsert=True,
+        )
+        for entry in entries
+    ]
+
+
+def revoked_query(jtis: Iterable[str]) -> dict:
+    """Make the query matching the blocklist entry of any of the JTIs
+
+    Args:
+        jtis (Iterable[str]): JTIs presented together
+
+    Returns:
+        dict: Query for a single lookup of every JTI
+    """
+    return {"jti": {"$in": list(jtis)}}
+
+
+def only_duplicates(error: BulkWriteError) -> bool:
+    """Check if an unordered insert of blocklist entries only failed on
+    tokens that were already revoked
+
+    Args:
+        error (BulkWriteError): Error of the insert
+
+    Returns:
+        bool: True if every failed entry was a duplicate JTI
+    """
+    details = error.details or {}
+    return not details.get("writeConcernErrors") and all(
+        e.get("code") == 11000 for e in details.get("writeErrors", [])
+    )
+
+
+def legacy_revocations(doc: dict) -> List[dict]:
+    """Convert a legacy blocklist document, which held both raw tokens of a
+    signout, to the entries of its tokens that have not expired yet
+
+    Args:
+        doc (dict): Legacy document with refresh_jti, access_jti and the
+            expiry of the later token
+
+    Returns:
+        List[dict]: Entries of the tokens that could still validate
+    """
+    now = datetime.datetime.utcnow()
+    entries = []
+    for kind in ["refresh", "access"]:
+        # Prefer the expiry of the token itself over the shared one
+        expires_at = doc.get("expires_at")
+        try:
+            exp = jwt.decode(
+                doc[kind], options={"verify_signature": False}
+            )["exp"]
+            expires_at = datetime.datetime.utcfromtimestamp(exp)
+        except (KeyError, TypeError, jwt.PyJWTError):
+            pass
+
+        # Skip the tokens that could no longer validate anyway
+        if doc.get(f"{kind}_jti") and (expires_at is None or expires_at > now):
+            entries.append(
+                {
+                    "jti": doc[f"{kind}_jti"],
+                    "type": kind,
+                    "expires_at": expires_at,
+                }
+            )
+    return entries
+
+
+class RevocationCache:
+    """Per-worker, in-memory view of the revoked JWT identifiers
+
+    The cache is seeded from the blocklist collection on first use and is
+    kept fresh by incrementally polling for entries revoked since the latest
+    server-assigned revoked_at seen, with a full reload every few polls to
+    reconcile anything a poll missed. A lookup never waits on the database
+    unless the local view is older than the configured staleness bound.
+    """
+
+    def __init__(
+        self: "RevocationCache",
+        collection: Collection,
+        field: str = "jti",
+        max_staleness: float = 5.0,
+        poll_overlap: float = 30.0,
+        reconcile_every: int = 60,
+    ) -> None:
+        """Constructor for the RevocationCache class
+
+        Args:
+            self (RevocationCache): Current class type
+            collection (Collection): Blocklist collection to mirror
+            field (str, optional): Document field holding the revoked JTI.
+                Defaults to "jti".
+            max_staleness (float, optional): Maximum age in seconds of the
+                local view before a lookup triggers a poll. Defaults to 5.0.
+            poll_overlap (float, optional): Seconds before the latest
+                revoked_at seen that every poll reaches back, which must be
+                well past the time an entry takes to become visible.
+                Defaults to 30.0.
+            reconcile_every (int, optional): Polls between full reloads of
+                the collection. Defaults to 60.
+        """
+
+        # Save settings
+        self.collection = collection
+        self.field = field
+        self.max_staleness = max_staleness
+        self.poll_overlap = datetime.timedelta(seconds=poll_overlap)
+        self.reconcile_every = max(1, reconcile_every)
+
+        # Local state of the cache
+        self._revoked: Dict[str, Optional[datetime.datetime]] = {}
+        self._since_reload = 0
+        self._last_poll = 0.0
+        self._watermark: Optional[datetime.datetime] = None
+        self._lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.misses = 0
+        self.polls = 0
+        self.reloads = 0
+
+    def _load(
+        self: "RevocationCache",
+        query: dict,
+        revoked: Dict[str, Optional[datetime.datetime]],
+    ) -> None:
+        """Load the blocklist entries matching the query and advance the
+        watermark to the latest revoked_at among them
+
+        Args:
+            self (RevocationCache): Current class type
+            query (dict): Query to run against the blocklist collection
+            revoked (Dict[str, Optional[datetime.datetime]]): Entries to
+                load into
+        """
+
+        # Only fetch the fields that are needed to answer lookups
+        cursor = self.collection.find(
+            query,
+            {"_id": 0, self.field: 1, "expires_at": 1, "revoked_at": 1},
+        )
+        for doc in cursor:
+            if doc.get(self.field):
+                revoked[doc[self.field]] = doc.get("expires_at")
+            revoked_at = doc.get("revoked_at")
+            if revoked_at is not None and (
+                self._watermark is None or revoked_at > self._watermark
+            ):
+                self._watermark = revoked_at
+
+    def _prune(self: "RevocationCache") -> None:
+        """Drop entries whose tokens could no longer validate anyway
+
+        Args:
+            self (RevocationCache): Current class type
+        """
+
+        # Remove every entry that is past its expiry
+        now = datetime.datetime.utcnow()
+        expired = [
+            jti
+            for jti, expiry in list(self._revoked.items())
+            if expiry is not None and expiry <= now
+        ]
+        for jti in expired:
+            del self._revoked[jti]
+
+    def _fresh(self: "RevocationCache") -> bool:
+        """Check if the local view is within the staleness bound"""
+        return time.monotonic() - self._last_poll < self.max_staleness
+
+    def refresh(self: "RevocationCache", force: bool = False) -> bool:
+        """Bring the local view up to date with the blocklist collection
+
+        Args:
+            self (RevocationCache): Current class type
+            force (bool, optional): Poll even if the local view is still
+                within the staleness bound. Defaults to False.
+
+        Returns:
+            bool: True if the database was polled, False if not
+        """
+
+        # Skip if the local view is fresh enough
+        if not force and self._fresh():
+            return False
+
+        with self._lock:
+            # Another thread may have polled while waiting on the lock
+            if not force and self._fresh():
+                return False
+
+            # Reload the whole collection when seeding and every few polls,
+            # which also drops entries that were removed from it
+            if self._since_reload == 0 or self._watermark is None:
+                revoked: Dict[str, Optional[datetime.datetime]] = {}
+                self._load({}, revoked)
+                self._revoked = revoked
+                self.reloads += 1
+
+            # Poll for the entries revoked since the latest one seen
+            else:
+                since = self._watermark - self.poll_overlap
+                self._load({"revoked_at": {"$gte": since}}, self._revoked)
+                self._prune()
+
+            # Record the poll
+            self._since_reload += 1
+            self._since_reload %= self.reconcile_every
+            self._last_poll = time.monotonic()
+            self.polls += 1
+            return True
+
+    def add(
+        self: "RevocationCache",
+        jti: str,
+        expires_at: Optional[datetime.datetime] = None,
+    ) -> None:
+        """Mark a JTI as revoked locally without waiting for the next poll
+
+        Args:
+            self (RevocationCache): Current class type
+            jti (str): JTI of the revoked token
+            expires_at (Optional[datetime.datetime], optional): Expiry of the
+                revoked token. Defaults to None.
+        """
+        with self._lock:
+            self._revoked[jti] = expires_at
+
+    def is_revoked(self: "RevocationCache", *jtis: str) -> bool:
+        """Check if any of the given JTIs is revoked
+
+        Args:
+            self (RevocationCache): Current class type
+            *jtis (str): JTIs to check
+
+        Returns:
+            bool: True if a JTI is revoked, False if not
+        """
+
+        # Make sure the local view is within the staleness bound, counting
+        # lookups answered without touching the database as hits
+        return self._answer(self.refresh(), jtis)
+
+    async def is_revoked_async(self: "RevocationCache", *jtis: str) -> bool:
+        """Check if any of the given JTIs is revoked without blocking the
+        event loop, polling on the default executor when the local view is
+        stale. The same cache answers the sync and async applications.
+
+        Args:
+            self (RevocationCache): Current class type
+            *jtis (str): JTIs to check
+
+        Returns:
+            bool: True if a JTI is revoked, False if not
+        """
+        polled = False
+        if not self._fresh():
+            loop = asyncio.get_running_loop()
+            polled = await loop.run_in_executor(None, self.refresh)
+        return self._answer(polled, jtis)
+
+    def _answer(
+        self: "RevocationCache", polled: bool, jtis: Iterable[str]
+    ) -> bool:
+        """Count a lookup and answer it from the local view
+
+        Args:
+            self (RevocationCache): Current class type
+            polled (bool): Was the database polled for the lookup?
+            jtis (Iterable[str]): JTIs to check
+
+        Returns:
+            bool: True if a JTI is revoked, False if not
+        """
+        if polled:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return any(jti in self._revoked for jti in jtis)
+
+    def stats(self: "RevocationCache") -> dict:
+        """Returns the counters of the cache
+
+        Args:
+            self (RevocationCache): Current class type
+
+        Returns:
+            dict: Hit, miss, poll and reload counters along with the cache
+                size
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "polls": self.polls,
+            "reloads": self.reloads,
+            "size": len(self._revoked),
+            "max_staleness": self.max_staleness,
+        }
@@ -1,5 +1,5 @@
 # Imports
-from typing import get_args, get_origin, Any, Type
+from typing import get_args, get_origin, Any, Callable, Type, Union
 
 
 def is_valid_type(value: Any, expected_type: Type) -> bool:
@@ -33,3 +33,60 @@ def is_valid_type(value: Any, expected_type: Type) -> bool:
     else:
         # Handle non-generic types
         return isinstance(value, expected_type)
+
+
+def compile_validator(expected_type: Type) -> Callable[[Any], bool]:
+    """
+    Compile the expected type into a flat checker function so that the
+    typing introspection is only done once
+
+    Args:
+        expected_type (Type): The expected type. Can be a regular type or a
+            generic type from the typing module.
+
+    Returns:
+        Callable[[Any], bool]: Function that returns True if the given value
+            is of the expected type, False otherwise.
+    """
+
+    # Anything goes for Any
+    if expected_type is Any:
+        return lambda value: True
+
+    # Handle non-generic types
+    origin = get_origin(expected_type)
+    if origin is None:
+        return lambda value: isinstance(value, expected_type)
+
+    # Handle unions (e.g., Optional) by accepting any of the members
+    args = get_args(expected_type)
+    if origin is Union:
+        members = [compile_validator(arg) for arg in args]
+        return lambda value: any(check(value) for check in members)
+
+    # Generic types without parameters only need the container check
+    if not args:
+        return lambda value: isinstance(value, origin)
+
+    # Handle mappings by checking both keys and values
+    if issubclass(origin, dict):
+        check_key = compile_validator(args[0])
+        check_value = compile_validator(args[-1])
+        return lambda value: isinstance(value, dict) and all(
+            check_key(k) and check_value(v) for k, v in value.items()
+        )
+
+    # Handle fixed-length tuples by checking each position
+    if origin is tuple and not (len(args) == 2 and args[1] is Ellipsis):
+        positions = [compile_validator(arg) for arg in args]
+        return lambda value: (
+            isinstance(value, tuple)
+            and len(value) == len(positions)
+            and all(check(item) for check, item in zip(positions, value))
+        )
+
+    # Handle homogeneous containers (e.g., List, Set, Tuple[int, ...])
+    check_item = compile_validator(args[0])
+    return lambda value: isinstance(value, origin) and all(
+        check_item(item) for item in value
+    )
@@ -0,0 +1,244 @@
+# Imports
+from apscheduler.schedulers.background import BackgroundScheduler
+from pymongo.collection import Collection
+from pymongo import ReplaceOne
+from typing import Any, Dict, Hashable, Optional, Tuple
+from apscheduler.job import Job
+import threading
+import datetime
+import logging
+import atexit
+import os
+
+# Logger of the buffer
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindFull(RuntimeError):
+    """Raised instead of buffering a new key when the buffer already holds
+    the maximum amount of pending documents, as happens when writes keep
+    failing"""
+
+
+class WriteBehindBuffer:
+    """In-memory buffer that coalesces upserts per key and writes them behind
+
+    Only the latest document of every key is kept. Pending documents are
+    written as a single unordered bulk write by a background job on an
+    interval, right away once the buffer reaches its size threshold, and
+    when the process exits. Requests never wait on the write.
+    """
+
+    def __init__(
+        self: "WriteBehindBuffer",
+        collection: Collection,
+        flush_interval: float = 2.0,
+        max_size: int = 500,
+        max_pending: int = 5000,
+    ) -> None:
+        """Constructor for the WriteBehindBuffer class
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+            collection (Collection): Collection the documents are written to
+            flush_interval (float, optional): Seconds between periodic
+                flushes. Defaults to 2.0.
+            max_size (int, optional): Amount of pending keys that triggers a
+                flush. Defaults to 500.
+            max_pending (int, optional): Amount of pending keys past which
+                new keys are refused, bounding the buffer while writes
+                fail. Defaults to 5000.
+        """
+
+        # Save settings
+        self.collection = collection
+        self.flush_interval = flush_interval
+        self.max_size = max_size
+        self.max_pending = max(max_size, max_pending)
+
+        # Pending documents by key along with the filter to upsert them with
+        self._pending: Dict[Hashable, Tuple[dict, dict]] = {}
+        self._inflight: Dict[Hashable, Tuple[dict, dict]] = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+
+        # The scheduler is started lazily so that it lives in the worker
+        # process and not in a parent that forks before serving
+        self._scheduler: Optional[BackgroundScheduler] = None
+        self._job: Optional[Job] = None
+        self._pid: Optional[int] = None
+        self._flush_requested = False
+
+        # Counters
+        self.puts = 0
+        self.flushes = 0
+        self.written = 0
+        self.rejected = 0
+
+    def _ensure_scheduler(self: "WriteBehindBuffer") -> None:
+        """Start the periodic flush job for the current process
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+        """
+
+        # Skip if the scheduler already runs in this process
+        if self._pid == os.getpid():
+            return
+
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+
+            # Start the periodic flush and flush on exit
+            self._scheduler = BackgroundScheduler(daemon=True)
+            self._job = self._scheduler.add_job(
+                self.flush,
+                "interval",
+                seconds=self.flush_interval,
+                max_instances=1,
+                coalesce=True,
+            )
+            self._scheduler.start()
+            atexit.register(self.shutdown)
+            self._pid = os.getpid()
+
+    def put(
+        self: "WriteBehindBuffer", key: Hashable, filter: dict, document: dict
+    ) -> None:
+        """Buffer the latest document of a key
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+            key (Hashable): Key the updates are coalesced on
+            filter (dict): Filter used to upsert the document
+            document (dict): Replacement document
+
+        Raises:
+            WriteBehindFull: If the key is new and the buffer already holds
+                max_pending documents
+        """
+
+        # Make sure the periodic flush is running
+        self._ensure_scheduler()
+
+        # Replace any pending document of the key, refusing new keys once
+        # failed writes have filled the buffer
+        with self._lock:
+            if (
+                len(self._pending) >= self.max_pending
+                and key not in self._pending
+            ):
+                self.rejected += 1
+                raise WriteBehindFull("The write-behind buffer is full")
+            self._pending[key] = (filter, document)
+            self.puts += 1
+            wake = (
+                len(self._pending) >= self.max_size
+                and not self._flush_requested
+            )
+            if wake:
+                self._flush_requested = True
+
+        # Have the background job flush right away once the size threshold
+        # is reached, the request does not wait on the write
+        if wake:
+            self._job.modify(next_run_time=datetime.datetime.now())
+
+    def get(self: "WriteBehindBuffer", key: Hashable) -> Optional[dict]:
+        """Get the pending document of a key
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+            key (Hashable): Key to look up
+
+        Returns:
+            Optional[dict]: Pending document or None if nothing is pending
+        """
+        with self._lock:
+            pending = self._pending.get(key) or self._inflight.get(key)
+        return pending[1] if pending else None
+
+    def flush(self: "WriteBehindBuffer") -> int:
+        """Write every pending document as a single unordered bulk write
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+
+        Returns:
+            int: Amount of documents written
+        """
+
+        with self._flush_lock:
+            # Take the pending documents out of the buffer, keeping them
+            # readable until they are written
+            with self._lock:
+                batch = self._inflight = self._pending
+                self._pending = {}
+                self._flush_requested = False
+            if not batch:
+                return 0
+
+            # Write the batch and put it back if the write fails, unless a
+            # newer document was buffered in the meantime, leaving the retry
+            # to the next interval instead of waking the job on every put
+            try:
+                self.collection.bulk_write(
+                    [
+                        ReplaceOne(filter, document, upsert=True)
+                        for filter, document in batch.values()
+                    ],
+                    ordered=False,
+                )
+            except Exception:
+                with self._lock:
+                    for key, pending in batch.items():
+                        self._pending.setdefault(key, pending)
+                    self._inflight = {}
+                    self._flush_requested = True
+                raise
+
+            # Forget the written documents
+            with self._lock:
+                self._inflight = {}
+
+            # Count the write and return the amount of documents written
+            self.flushes += 1
+            self.written += len(batch)
+            return len(batch)
+
+    def shutdown(self: "WriteBehindBuffer") -> None:
+        """Stop the periodic flush and write whatever is still pending
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+        """
+
+        # Stop the scheduler of this process
+        if self._scheduler is not None and self._pid == os.getpid():
+            self._scheduler.shutdown(wait=False)
+            self._scheduler = None
+            self._job = None
+            self._pid = None
+
+        # Write the remaining documents
+        self.flush()
+
+    def stats(self: "WriteBehindBuffer") -> Dict[str, Any]:
+        """Returns the counters of the buffer
+
+        Args:
+            self (WriteBehindBuffer): Current class type
+
+        Returns:
+            Dict[str, Any]: Put, flush, write and rejection counters along
+                with the amount of pending documents
+        """
+        return {
+            "puts": self.puts,
+            "flushes": self.flushes,
+            "written": self.written,
+            "rejected": self.rejected,
+            "pending": len(self._pending),
+            "max_pending": self.max_pending,
+        }